@@ -0,0 +1,49 @@
+"""
+🔀 Entorno de migraciones Alembic
+Usa la misma URL y metadata que la aplicación (app.database)
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import Base, DATABASE_URL, get_engine
+from app.models import indicador, usuario, replica, archivo, cambio  # noqa: F401 - registra los modelos en Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    """Genera el SQL sin conectarse (alembic upgrade head --sql)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    with get_engine().connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # El batch de SQLite recrea tablas con DROP: con las claves foráneas
+            # activas (app.database) borrar indicadores borraría sus hitos en cascada
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,62 @@
+"""Esquema inicial: indicadores e hitos
+
+Las bases existentes ya tienen estas tablas (creadas con create_all);
+en ese caso la migración no hace nada y solo queda registrada.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tablas = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "indicadores" not in tablas:
+        op.create_table(
+            "indicadores",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("vp", sa.String),
+            sa.Column("area", sa.String),
+            sa.Column("nombreIndicador", sa.String),
+            sa.Column("tipoIndicador", sa.String),
+            sa.Column("fechaInicioGeneral", sa.Date),
+            sa.Column("fechaFinalizacionGeneral", sa.Date),
+            sa.Column("responsableGeneral", sa.String),
+            sa.Column("responsableCargaGeneral", sa.String),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("updated_at", sa.DateTime),
+        )
+        op.create_index("ix_indicadores_id", "indicadores", ["id"])
+        op.create_index("ix_indicadores_vp", "indicadores", ["vp"])
+        op.create_index("ix_indicadores_area", "indicadores", ["area"])
+        op.create_index("ix_indicadores_nombreIndicador", "indicadores", ["nombreIndicador"])
+
+    if "hitos" not in tablas:
+        op.create_table(
+            "hitos",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("indicador_id", sa.Integer, sa.ForeignKey("indicadores.id")),
+            sa.Column("nombreHito", sa.String),
+            sa.Column("fechaInicioHito", sa.Date),
+            sa.Column("fechaFinalizacionHito", sa.Date),
+            sa.Column("avanceHito", sa.Float),
+            sa.Column("estadoHito", sa.String),
+            sa.Column("responsableHito", sa.String),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("updated_at", sa.DateTime),
+        )
+        op.create_index("ix_hitos_id", "hitos", ["id"])
+
+
+def downgrade():
+    op.drop_table("hitos")
+    op.drop_table("indicadores")
@@ -0,0 +1,56 @@
+"""Índices trigram sin acentos para la búsqueda (solo PostgreSQL)
+
+Crea pg_trgm y unaccent, una envoltura IMMUTABLE de unaccent (requisito
+para usarla en índices) e índices GIN sobre f_unaccent(lower(col)),
+la misma expresión que consulta app.busqueda. En SQLite no hace nada:
+allí la búsqueda usa el índice en memoria o FTS5.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+COLUMNAS = [
+    ("indicadores", "nombreIndicador"),
+    ("indicadores", "area"),
+    ("indicadores", "responsableGeneral"),
+    ("indicadores", "responsableCargaGeneral"),
+    ("hitos", "nombreHito"),
+    ("hitos", "responsableHito"),
+]
+
+
+def _nombre_indice(tabla, columna):
+    return f"ix_{tabla}_{columna}_trgm"
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+        "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+    )
+    for tabla, columna in COLUMNAS:
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS {_nombre_indice(tabla, columna)} '
+            f'ON {tabla} USING gin (f_unaccent(lower("{columna}")) gin_trgm_ops)'
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for tabla, columna in COLUMNAS:
+        op.execute(f"DROP INDEX IF EXISTS {_nombre_indice(tabla, columna)}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
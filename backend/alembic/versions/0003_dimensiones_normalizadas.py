@@ -0,0 +1,112 @@
+"""Tablas de lookup para vp, área, responsables y estados (opt-in)
+
+Siempre crea las tablas dim_*; solo convierte las columnas de texto a
+claves enteras si SCHEMA_NORMALIZADO está activo al migrar. Para cambiar
+de esquema después, usar migrar_dimensiones.py aplicar|revertir.
+
+La conversión está copiada aquí tal como era en esta revisión: el script
+sigue cambiando (tablas de archivo, índices de 0007) y la migración no.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (tabla, columna de texto, columna fk, tabla de lookup, índice original de la columna de texto)
+REFERENCIAS = [
+    ("indicadores", "vp", "vp_id", "dim_vp", "ix_indicadores_vp"),
+    ("indicadores", "area", "area_id", "dim_area", "ix_indicadores_area"),
+    ("indicadores", "responsableGeneral", "responsable_general_id", "dim_responsable", None),
+    ("indicadores", "responsableCargaGeneral", "responsable_carga_id", "dim_responsable", None),
+    ("hitos", "estadoHito", "estado_id", "dim_estado", None),
+    ("hitos", "responsableHito", "responsable_id", "dim_responsable", None),
+]
+
+TABLAS_DIMENSION = ["dim_vp", "dim_area", "dim_responsable", "dim_estado"]
+
+
+def _esta_normalizado():
+    columnas = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("indicadores")}
+    return "vp_id" in columnas
+
+
+def _por_tabla():
+    tablas = {}
+    for referencia in REFERENCIAS:
+        tablas.setdefault(referencia[0], []).append(referencia)
+    return tablas.items()
+
+
+def _aplicar():
+    """Texto repetido por fila -> tablas de lookup + claves enteras indexadas"""
+    for tabla, texto, _, dim, _ in REFERENCIAS:
+        op.execute(
+            f'INSERT INTO {dim} (nombre) SELECT DISTINCT "{texto}" FROM {tabla} '
+            f'WHERE "{texto}" IS NOT NULL AND "{texto}" NOT IN (SELECT nombre FROM {dim})'
+        )
+
+    for tabla, referencias in _por_tabla():
+        with op.batch_alter_table(tabla) as batch:
+            for _, _, fk, dim, _ in referencias:
+                batch.add_column(sa.Column(fk, sa.Integer))
+                batch.create_foreign_key(f"fk_{tabla}_{fk}", dim, [fk], ["id"])
+        for _, texto, fk, dim, _ in referencias:
+            op.execute(
+                f'UPDATE {tabla} SET {fk} = (SELECT id FROM {dim} WHERE nombre = {tabla}."{texto}")'
+            )
+        with op.batch_alter_table(tabla) as batch:
+            for _, texto, fk, _, indice in referencias:
+                if indice:
+                    batch.drop_index(indice)
+                batch.drop_column(texto)
+                batch.create_index(f"ix_{tabla}_{fk}", [fk])
+
+
+def _revertir():
+    """Claves enteras -> columnas de texto originales"""
+    for tabla, referencias in _por_tabla():
+        with op.batch_alter_table(tabla) as batch:
+            for _, texto, _, _, _ in referencias:
+                batch.add_column(sa.Column(texto, sa.String))
+        for _, texto, fk, dim, _ in referencias:
+            op.execute(
+                f'UPDATE {tabla} SET "{texto}" = (SELECT nombre FROM {dim} WHERE id = {tabla}.{fk})'
+            )
+        with op.batch_alter_table(tabla) as batch:
+            for _, texto, fk, _, indice in referencias:
+                batch.drop_index(f"ix_{tabla}_{fk}")
+                batch.drop_constraint(f"fk_{tabla}_{fk}", type_="foreignkey")
+                batch.drop_column(fk)
+                if indice:
+                    batch.create_index(indice, [texto])
+
+
+def upgrade():
+    existentes = set(sa.inspect(op.get_bind()).get_table_names())
+    for tabla in TABLAS_DIMENSION:
+        if tabla not in existentes:
+            op.create_table(
+                tabla,
+                sa.Column("id", sa.Integer, primary_key=True),
+                sa.Column("nombre", sa.String, nullable=False, unique=True),
+            )
+    normalizar = os.getenv("SCHEMA_NORMALIZADO", "false").lower() in ("1", "true", "yes")
+    if normalizar and not _esta_normalizado():
+        _aplicar()
+
+
+def downgrade():
+    if _esta_normalizado():
+        _revertir()
+    for tabla in reversed(TABLAS_DIMENSION):
+        op.drop_table(tabla)
@@ -0,0 +1,36 @@
+"""Tabla de usuarios para la autenticación
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "usuarios" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "usuarios",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("username", sa.String, nullable=False),
+        sa.Column("email", sa.String),
+        sa.Column("full_name", sa.String),
+        sa.Column("hashed_password", sa.String, nullable=False),
+        sa.Column("disabled", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    op.create_index("ix_usuarios_id", "usuarios", ["id"])
+    op.create_index("ix_usuarios_username", "usuarios", ["username"], unique=True)
+
+
+def downgrade():
+    op.drop_table("usuarios")
@@ -0,0 +1,30 @@
+"""Tabla de latido para medir el retraso de la réplica de lectura
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "replica_latido" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "replica_latido",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("momento", sa.Float, nullable=False, server_default="0"),
+        sa.Column("ultima_escritura", sa.Float, nullable=False, server_default="0"),
+    )
+    op.execute("INSERT INTO replica_latido (id, momento, ultima_escritura) VALUES (1, 0, 0)")
+
+
+def downgrade():
+    op.drop_table("replica_latido")
@@ -0,0 +1,77 @@
+"""Tablas de archivo para indicadores cerrados y sus hitos
+
+Mismas columnas que indicadores e hitos más archivado_at. Si la base ya
+usa el esquema normalizado, las tablas de archivo se crean normalizadas
+(claves a dim_*, con los mismos nombres de columna, clave foránea e índice
+que deja migrar_dimensiones.py).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Columnas de dimensión: (columna de texto, columna fk, tabla de lookup)
+DIMENSIONES_INDICADOR = [
+    ("vp", "vp_id", "dim_vp"),
+    ("area", "area_id", "dim_area"),
+    ("responsableGeneral", "responsable_general_id", "dim_responsable"),
+    ("responsableCargaGeneral", "responsable_carga_id", "dim_responsable"),
+]
+DIMENSIONES_HITO = [
+    ("estadoHito", "estado_id", "dim_estado"),
+    ("responsableHito", "responsable_id", "dim_responsable"),
+]
+
+
+def _columnas_dimension(tabla, dimensiones, normalizado):
+    if not normalizado:
+        return [sa.Column(texto, sa.String) for texto, _, _ in dimensiones]
+    return [
+        sa.Column(fk, sa.Integer, sa.ForeignKey(f"{dim}.id", name=f"fk_{tabla}_{fk}"), index=True)
+        for _, fk, dim in dimensiones
+    ]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if "indicadores_archivo" in sa.inspect(bind).get_table_names():
+        return
+    normalizado = "vp_id" in {c["name"] for c in sa.inspect(bind).get_columns("indicadores")}
+    op.create_table(
+        "indicadores_archivo",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+        *_columnas_dimension("indicadores_archivo", DIMENSIONES_INDICADOR, normalizado),
+        sa.Column("nombreIndicador", sa.String),
+        sa.Column("tipoIndicador", sa.String),
+        sa.Column("fechaInicioGeneral", sa.Date),
+        sa.Column("fechaFinalizacionGeneral", sa.Date),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+        sa.Column("archivado_at", sa.DateTime, nullable=False),
+    )
+    op.create_table(
+        "hitos_archivo",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("indicador_id", sa.Integer, sa.ForeignKey("indicadores_archivo.id")),
+        sa.Column("nombreHito", sa.String),
+        sa.Column("fechaInicioHito", sa.Date),
+        sa.Column("fechaFinalizacionHito", sa.Date),
+        sa.Column("avanceHito", sa.Float),
+        *_columnas_dimension("hitos_archivo", DIMENSIONES_HITO, normalizado),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    op.create_index("ix_hitos_archivo_indicador_id", "hitos_archivo", ["indicador_id"])
+
+
+def downgrade():
+    op.drop_table("hitos_archivo")
+    op.drop_table("indicadores_archivo")
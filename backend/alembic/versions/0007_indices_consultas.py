@@ -0,0 +1,82 @@
+"""Índices según las consultas reales
+
+- hitos.indicador_id: carga de los hitos de un indicador y borrado en cascada
+  (era una clave foránea sin índice)
+- indicadores.fechaFinalizacionGeneral: candidatos a archivar
+- (vp, area) y (estado, avanceHito): cubren los conteos de /dimensiones y la
+  agregación de /estadisticas sin leer las tablas
+- ix_hitos_pendientes (parcial): solo los hitos sin completar, para el NOT
+  EXISTS de app.archivo (sin equivalente en el esquema normalizado)
+- Se borran ix_indicadores_id e ix_hitos_id (repiten la clave primaria) e
+  ix_indicadores_nombreIndicador (la búsqueda no lo usa)
+
+Los que dependen de columnas de dimensión se crean para el esquema que
+tenga la base al migrar; migrar_dimensiones.py mantiene su propia copia de
+estas listas para cambiarlos de esquema junto con las columnas.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+NUEVOS = [
+    ("hitos", "ix_hitos_indicador_id", ["indicador_id"]),
+    ("indicadores", "ix_indicadores_fechaFinalizacionGeneral", ["fechaFinalizacionGeneral"]),
+]
+BORRADOS = [
+    ("indicadores", "ix_indicadores_id", ["id"]),
+    ("hitos", "ix_hitos_id", ["id"]),
+    ("indicadores", "ix_indicadores_nombreIndicador", ["nombreIndicador"]),
+]
+
+_PENDIENTE = (sa.column("estadoHito") == "Completado").is_not(True)
+# (tabla, nombre, columnas, condición del índice parcial)
+DIMENSION_TEXTO = [
+    ("indicadores", "ix_indicadores_vp_area", ["vp", "area"], None),
+    ("hitos", "ix_hitos_estadoHito_avanceHito", ["estadoHito", "avanceHito"], None),
+    ("hitos", "ix_hitos_responsableHito", ["responsableHito"], None),
+    ("hitos", "ix_hitos_pendientes", ["indicador_id"], _PENDIENTE),
+]
+DIMENSION_NORMALIZADO = [
+    ("indicadores", "ix_indicadores_vp_id_area_id", ["vp_id", "area_id"], None),
+    ("hitos", "ix_hitos_estado_id_avanceHito", ["estado_id", "avanceHito"], None),
+]
+
+
+def _existentes(tabla):
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(tabla)}
+
+
+def _de_dimension():
+    columnas = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("indicadores")}
+    return DIMENSION_NORMALIZADO if "vp_id" in columnas else DIMENSION_TEXTO
+
+
+def upgrade():
+    for tabla, nombre, _ in BORRADOS:
+        if nombre in _existentes(tabla):
+            op.drop_index(nombre, table_name=tabla)
+    for tabla, nombre, columnas in NUEVOS:
+        if nombre not in _existentes(tabla):
+            op.create_index(nombre, tabla, columnas)
+    for tabla, nombre, columnas, condicion in _de_dimension():
+        if nombre not in _existentes(tabla):
+            op.create_index(nombre, tabla, columnas, postgresql_where=condicion, sqlite_where=condicion)
+
+
+def downgrade():
+    for tabla, nombre, _, _ in _de_dimension():
+        if nombre in _existentes(tabla):
+            op.drop_index(nombre, table_name=tabla)
+    for tabla, nombre, _ in NUEVOS:
+        op.drop_index(nombre, table_name=tabla)
+    for tabla, nombre, columnas in BORRADOS:
+        op.create_index(nombre, tabla, columnas)
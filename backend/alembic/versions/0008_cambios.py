@@ -0,0 +1,41 @@
+"""Registro de cambios para la sincronización incremental
+
+Una fila por indicador o hito creado, modificado o borrado; el id es el
+token que guardan los clientes (app.cambios). Arranca con un corte: los
+datos anteriores a la migración solo se obtienen con una carga completa.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "cambios" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    cambios = op.create_table(
+        "cambios",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("entidad", sa.String, nullable=False),
+        sa.Column("entidad_id", sa.Integer),
+        sa.Column("indicador_id", sa.Integer),
+        sa.Column("borrado", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("momento", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_cambios_momento", "cambios", ["momento"])
+    corte = sa.column("entidad") == "corte"
+    op.create_index("ix_cambios_cortes", "cambios", ["id"], postgresql_where=corte, sqlite_where=corte)
+    op.bulk_insert(cambios, [{"entidad": "corte", "entidad_id": None, "borrado": False}])
+
+
+def downgrade():
+    op.drop_table("cambios")
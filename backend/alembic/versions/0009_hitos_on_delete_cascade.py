@@ -0,0 +1,47 @@
+"""ON DELETE CASCADE en hitos.indicador_id
+
+Borrar un indicador es un solo DELETE: la BD borra sus hitos sin que el ORM
+los cargue (passive_deletes en la relación). En SQLite la clave foránea solo
+se cambia recreando la tabla (batch, que conserva los índices).
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+NOMBRE = "hitos_indicador_id_fkey"
+# La clave de create_all en SQLite no tiene nombre: el batch la identifica con esta convención
+CONVENCION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _cambiar_clave(ondelete):
+    bind = op.get_bind()
+    actuales = [
+        clave["name"] or "fk_hitos_indicador_id_indicadores"
+        for clave in sa.inspect(bind).get_foreign_keys("hitos") if clave["referred_table"] == "indicadores"
+    ]
+    if bind.dialect.name == "sqlite":
+        with op.batch_alter_table("hitos", recreate="always", naming_convention=CONVENCION) as batch:
+            for nombre in actuales:
+                batch.drop_constraint(nombre, type_="foreignkey")
+            batch.create_foreign_key(NOMBRE, "indicadores", ["indicador_id"], ["id"], ondelete=ondelete)
+        return
+    for nombre in actuales:
+        op.drop_constraint(nombre, "hitos", type_="foreignkey")
+    op.create_foreign_key(NOMBRE, "hitos", "indicadores", ["indicador_id"], ["id"], ondelete=ondelete)
+
+
+def upgrade():
+    _cambiar_clave("CASCADE")
+
+
+def downgrade():
+    _cambiar_clave(None)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+🚦 Reporte de hitos vencidos y en riesgo
+Corre el mismo análisis que GET /api/indicadores/riesgo (ver app/riesgo.py)
+sobre todos los hitos e imprime el resumen, los agregados por área y los
+hitos con más riesgo. Pensado para un cron que deje el reporte en JSON.
+
+Uso (desde backend/):
+    python analizar_riesgo.py                          # resumen y los 20 hitos con más riesgo
+    python analizar_riesgo.py --vp VPD --limite 50
+    python analizar_riesgo.py --hoy 2025-06-30         # como si fuera otra fecha
+    python analizar_riesgo.py --json riesgo.json       # reporte con todos los hitos con riesgo
+"""
+
+import argparse
+import json
+import time
+from datetime import date
+
+from app.database import Base, SessionLocal, USANDO_SQLITE_LOCAL, get_engine
+from app.models import indicador, usuario, archivo as modelos_archivo  # noqa: F401 (registran las tablas en Base)
+from app import riesgo
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de hitos vencidos y en riesgo")
+    parser.add_argument("--hoy", type=date.fromisoformat, help="fecha del análisis (AAAA-MM-DD, por defecto hoy)")
+    parser.add_argument("--vp")
+    parser.add_argument("--area")
+    parser.add_argument("--limite", type=int, default=20, help="hitos a listar")
+    parser.add_argument("--json", help="escribir el reporte en este archivo, con todos los hitos con riesgo")
+    args = parser.parse_args()
+
+    if USANDO_SQLITE_LOCAL:
+        Base.metadata.create_all(bind=get_engine())
+    with SessionLocal() as db:
+        inicio = time.perf_counter()
+        analisis = riesgo.analizar(db, args.hoy)
+        segundos = time.perf_counter() - inicio
+        limite = len(analisis.puntaje) if args.json else args.limite
+        reporte = riesgo.reporte(db, analisis, limite=max(limite, 1), vp=args.vp, area=args.area)
+
+    resumen = reporte["resumen"]
+    print(f"🚦 {resumen['totalHitos']} hitos al {reporte['hoy']} (análisis en {segundos * 1000:.0f}ms): "
+          f"{resumen['hitosVencidos']} vencidos, {resumen['hitosEnRiesgo']} en riesgo, "
+          f"{resumen['hitosCompletados']} completados")
+    print(f"\n{'vp':<6}{'área':<34}{'vencidos':>10}{'en riesgo':>11}{'días prom.':>12}{'puntaje prom.':>15}")
+    for fila in reporte["porArea"]:
+        if (args.vp is None or fila["vp"] == args.vp) and (args.area is None or fila["area"] == args.area):
+            print(f"{fila['vp'] or '-':<6}{(fila['area'] or '-')[:33]:<34}{fila['hitosVencidos']:>10}{fila['hitosEnRiesgo']:>11}"
+                  f"{fila['diasVencidoPromedio']:>12}{fila['puntajePromedio']:>15}")
+    print(f"\n{'puntaje':>8}  {'nivel':<10}{'días':>6}{'avance':>8}{'esperado':>10}  hito")
+    for hito in reporte["hitos"][:args.limite]:
+        print(f"{hito['puntajeRiesgo']:>8}  {hito['nivelRiesgo']:<10}{hito['diasVencido']:>6}{hito['avanceHito']:>8}"
+              f"{hito['avanceEsperado']:>10}  #{hito['id']} {hito['nombreHito']} ({hito['area']}, {hito['nombreIndicador']})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+        print(f"\n✅ Reporte con {len(reporte['hitos'])} hitos en {args.json}")
+
+if __name__ == "__main__":
+    main()
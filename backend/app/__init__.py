@@ -1 +1,9 @@
-# Este archivo hace que Python reconozca esta carpeta como un paquete 
\ No newline at end of file
+# Este archivo hace que Python reconozca esta carpeta como un paquete
+import os
+
+# Medir el costo de cada import desde el primer momento (se reporta cuando el
+# worker queda listo). PERFIL_IMPORTS=false lo desactiva.
+if os.getenv("PERFIL_IMPORTS", "true").lower() in ("1", "true", "yes"):
+    from . import perfil_imports
+
+    perfil_imports.activar()
@@ -0,0 +1,243 @@
+"""
+🧮 Almacén de contadores de seguridad
+Ventanas deslizantes, bloqueos y rate limiting (GCRA) por clave (IP,
+usuario), en memoria del proceso o compartidos entre workers vía Redis
+"""
+
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from .cache import CacheLRUTTL
+
+logger = logging.getLogger("security")
+
+# Costo aproximado de una clave en AlmacenLocal además de sus buckets y su
+# nombre (objeto, array y nodo del OrderedDict), medido con tracemalloc
+BYTES_POR_CLAVE_BASE = 320
+# Una clave de rate limiting guarda solo un float (el TAT de GCRA)
+BYTES_POR_CLAVE_GCRA = 150
+
+class _Ventana:
+    __slots__ = ("ultimo", "total", "cuentas")
+
+    def __init__(self, buckets: int):
+        self.ultimo = 0
+        self.total = 0
+        self.cuentas = array("I", bytes(4 * buckets))
+
+class AlmacenLocal:
+    """Almacén en memoria del proceso.
+
+    Cada clave ocupa un tamaño fijo (`buckets` enteros, o un float para
+    GCRA): cada operación es O(1) en el número de eventos. Todas las claves
+    comparten un LRU global que las desaloja para no superar
+    `max_memoria_bytes`. Sirve como reemplazo local de AlmacenRedis
+    (desarrollo, un solo worker o pruebas).
+    """
+
+    compartido = False
+
+    def __init__(self, max_memoria_bytes: int = 16 * 1024 * 1024, max_bloqueos: int = 10000):
+        self.max_memoria_bytes = max_memoria_bytes
+        self._lock = threading.Lock()
+        self._claves: "OrderedDict[str, object]" = OrderedDict()
+        self._bytes = 0
+        self._bloqueos = CacheLRUTTL(max_entradas=max_bloqueos, ttl=float("inf"))
+
+    @staticmethod
+    def _costo(clave: str, valor) -> int:
+        if isinstance(valor, _Ventana):
+            return BYTES_POR_CLAVE_BASE + 4 * len(valor.cuentas) + len(clave)
+        return BYTES_POR_CLAVE_GCRA + len(clave)
+
+    def _guardar(self, clave: str, valor):
+        """Inserta o reemplaza la clave y desaloja por LRU (con el lock tomado)"""
+        anterior = self._claves.pop(clave, None)
+        if anterior is not None:
+            self._bytes -= self._costo(clave, anterior)
+        self._claves[clave] = valor
+        self._bytes += self._costo(clave, valor)
+        while self._bytes > self.max_memoria_bytes and len(self._claves) > 1:
+            vieja, desalojada = self._claves.popitem(last=False)
+            self._bytes -= self._costo(vieja, desalojada)
+
+    def sumar_ventana(self, clave: str, ventana: float, buckets: int, ahora: Optional[float] = None) -> int:
+        """Registra un evento y devuelve cuántos hubo en los últimos `ventana` segundos.
+
+        La ventana se divide en `buckets` tramos; el conteo incluye el
+        tramo en curso, así que la ventana efectiva está entre
+        ventana*(buckets-1)/buckets y `ventana`.
+        """
+        ahora = time.time() if ahora is None else ahora
+        bucket = int(ahora // (ventana / buckets))
+        with self._lock:
+            v = self._claves.get(clave)
+            if not isinstance(v, _Ventana) or len(v.cuentas) != buckets:
+                v = _Ventana(buckets)
+                v.ultimo = bucket
+                self._guardar(clave, v)
+            else:
+                self._claves.move_to_end(clave)
+
+            avance = bucket - v.ultimo
+            if avance >= buckets:
+                for i in range(buckets):
+                    v.cuentas[i] = 0
+                v.total = 0
+            elif avance > 0:
+                # Vaciar los tramos que salieron de la ventana (a lo más `buckets`)
+                for paso in range(1, avance + 1):
+                    i = (v.ultimo + paso) % buckets
+                    v.total -= v.cuentas[i]
+                    v.cuentas[i] = 0
+            if avance > 0:
+                v.ultimo = bucket
+            v.cuentas[v.ultimo % buckets] += 1
+            v.total += 1
+            return v.total
+
+    def gcra(self, clave: str, intervalo: float, tolerancia: float, ahora: Optional[float] = None) -> Tuple[bool, float]:
+        """Generic Cell Rate Algorithm: un request cada `intervalo` segundos con ráfagas de hasta `tolerancia`.
+
+        Devuelve (permitido, segundos): si se permite, la ocupación actual
+        (TAT - ahora); si no, cuánto esperar para reintentar.
+        """
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            tat = self._claves.get(clave)
+            if not isinstance(tat, float) or tat < ahora:
+                tat = ahora
+            espera = tat - ahora - tolerancia
+            if espera > 0:
+                return False, espera
+            self._guardar(clave, tat + intervalo)
+            return True, tat + intervalo - ahora
+
+    def bloquear(self, clave: str, segundos: float):
+        self._bloqueos.guardar(clave, True, expira=time.time() + segundos)
+
+    def bloqueado(self, clave: str) -> bool:
+        return self._bloqueos.obtener(clave, False)
+
+    def __len__(self):
+        return len(self._claves)
+
+# GCRA atómico en Redis: lee el TAT, decide y lo actualiza en un solo paso.
+# Los floats vuelven como texto porque Lua convierte números a enteros.
+_LUA_GCRA = """
+local ahora = tonumber(ARGV[1])
+local intervalo = tonumber(ARGV[2])
+local tolerancia = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1])) or ahora
+if tat < ahora then tat = ahora end
+local espera = tat - ahora - tolerancia
+if espera > 0 then
+    return {0, tostring(espera)}
+end
+local nuevo = tat + intervalo
+redis.call('SET', KEYS[1], tostring(nuevo), 'PX', math.ceil((nuevo - ahora) * 1000) + 1)
+return {1, tostring(nuevo - ahora)}
+"""
+
+class AlmacenRedis:
+    """Mismo contrato que AlmacenLocal, con el estado en Redis compartido por todos los workers.
+
+    Cada tramo de la ventana es una clave con expiración propia, así que
+    Redis limpia solo lo que deja de usarse.
+    """
+
+    compartido = True
+
+    def __init__(self, url: str, prefijo: str = "indicadores:seguridad:"):
+        import redis  # dependencia opcional: solo si se configura REDIS_URL
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefijo = prefijo
+        self._script_gcra = self._redis.register_script(_LUA_GCRA)
+
+    def sumar_ventana(self, clave: str, ventana: float, buckets: int, ahora: Optional[float] = None) -> int:
+        ahora = time.time() if ahora is None else ahora
+        ancho = ventana / buckets
+        bucket = int(ahora // ancho)
+        base = f"{self.prefijo}v:{clave}:"
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.incr(base + str(bucket))
+        pipe.expire(base + str(bucket), int(ventana + ancho) + 1)
+        pipe.mget([base + str(b) for b in range(bucket - buckets + 1, bucket + 1)])
+        _, _, cuentas = pipe.execute()
+        return sum(int(c) for c in cuentas if c is not None)
+
+    def gcra(self, clave: str, intervalo: float, tolerancia: float, ahora: Optional[float] = None) -> Tuple[bool, float]:
+        ahora = time.time() if ahora is None else ahora
+        permitido, segundos = self._script_gcra(
+            keys=[f"{self.prefijo}g:{clave}"], args=[repr(ahora), repr(intervalo), repr(tolerancia)]
+        )
+        return bool(int(permitido)), float(segundos)
+
+    def bloquear(self, clave: str, segundos: float):
+        self._redis.set(f"{self.prefijo}b:{clave}", 1, ex=max(1, int(segundos)))
+
+    def bloqueado(self, clave: str) -> bool:
+        return bool(self._redis.exists(f"{self.prefijo}b:{clave}"))
+
+class AlmacenConRespaldo:
+    """Usa el almacén compartido y, si falla (Redis caído), sigue con uno local por worker.
+
+    Tras un error no se reintenta el compartido durante `reintentar_cada`
+    segundos, para no pagar un timeout ni llenar el log en cada request.
+    """
+
+    compartido = True
+
+    def __init__(self, principal, respaldo, reintentar_cada: float = 5.0):
+        self.principal = principal
+        self.respaldo = respaldo
+        self.reintentar_cada = reintentar_cada
+        self._caido_hasta = 0.0
+
+    def _llamar(self, operacion: str, *args):
+        if time.monotonic() >= self._caido_hasta:
+            try:
+                return getattr(self.principal, operacion)(*args)
+            except Exception as e:
+                self._caido_hasta = time.monotonic() + self.reintentar_cada
+                logger.error(f"Shared security store unavailable ({e}); using local counters")
+        return getattr(self.respaldo, operacion)(*args)
+
+    def sumar_ventana(self, *args):
+        return self._llamar("sumar_ventana", *args)
+
+    def gcra(self, *args):
+        return self._llamar("gcra", *args)
+
+    def bloquear(self, *args):
+        return self._llamar("bloquear", *args)
+
+    def bloqueado(self, *args):
+        return self._llamar("bloqueado", *args)
+
+async def sin_bloquear(almacen, funcion, *args):
+    """Llama `funcion(*args)` desde código async sin frenar el event loop.
+
+    Con un almacén compartido la operación es un round-trip a Redis (hasta
+    socket_timeout si está lento o caído) y corre en el threadpool; con el
+    local es un lock y unos microsegundos, así que se llama directo.
+    """
+    if getattr(almacen, "compartido", False):
+        return await run_in_threadpool(funcion, *args)
+    return funcion(*args)
+
+def crear_almacen(redis_url: Optional[str] = None, max_memoria_bytes: int = 16 * 1024 * 1024):
+    """AlmacenRedis (con respaldo local) si hay URL y el paquete `redis` está instalado; si no, AlmacenLocal"""
+    if redis_url:
+        try:
+            return AlmacenConRespaldo(AlmacenRedis(redis_url), AlmacenLocal(max_memoria_bytes=max_memoria_bytes))
+        except ImportError:
+            logger.error("REDIS_URL configurada pero falta el paquete 'redis'; usando almacén local por worker")
+    return AlmacenLocal(max_memoria_bytes=max_memoria_bytes)
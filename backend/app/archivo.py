@@ -0,0 +1,171 @@
+"""
+🗄️ Archivo de indicadores cerrados
+Un indicador está cerrado cuando su fechaFinalizacionGeneral ya pasó, tiene
+hitos y ninguno está sin completar. Se mueve con sus hitos a indicadores_archivo y
+hitos_archivo (mismos id), así el listado, las estadísticas, la búsqueda y
+los índices de las tablas activas crecen con el trabajo vigente y no con
+los años de historia.
+
+- `archivar(db)` mueve todos los cerrados, de a ARCHIVO_LOTE por transacción
+- Con ARCHIVO_CADA_SEGUNDOS > 0 cada worker lo intenta en segundo plano; un
+  flock deja correr a uno solo por máquina (dos corridas a la vez en distintas
+  máquinas chocan en la clave primaria del archivo y una se deshace)
+- Lo archivado se lee con GET /api/indicadores/archivados y con
+  ?include_archived=true en el listado
+"""
+
+import fcntl
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, exists, insert, literal, select
+from sqlalchemy.orm import Session, selectinload
+
+from .database import SessionLocal
+from .models.indicador import Indicador, Hito
+from .models.archivo import IndicadorArchivado, HitoArchivado
+from . import cambios, eventos
+
+ARCHIVO_CADA_SEGUNDOS = float(os.getenv("ARCHIVO_CADA_SEGUNDOS", "0"))
+ARCHIVO_LOTE = int(os.getenv("ARCHIVO_LOTE", "500"))
+# Días después de fechaFinalizacionGeneral antes de archivar
+ARCHIVO_GRACIA_DIAS = int(os.getenv("ARCHIVO_GRACIA_DIAS", "0"))
+# Pausa entre lotes para no acaparar la BD mientras hay tráfico
+ARCHIVO_PAUSA_SEGUNDOS = float(os.getenv("ARCHIVO_PAUSA_SEGUNDOS", "0.2"))
+ARCHIVO_LOCK = os.getenv("ARCHIVO_LOCK", os.path.join(tempfile.gettempdir(), "indicadores-archivo.lock"))
+ESTADO_CERRADO = "Completado"
+
+_hilo: Optional[threading.Thread] = None
+_ultima_corrida = {"momento": None, "archivados": 0, "error": None}
+
+def condicion_cerrado(hoy: Optional[date] = None):
+    """WHERE de los indicadores archivables (vale también con el esquema normalizado)"""
+    limite = (hoy or date.today()) - timedelta(days=ARCHIVO_GRACIA_DIAS)
+    # IS NOT TRUE: un estado nulo (o sin fila "Completado" en dim_estado) cuenta como pendiente
+    pendiente = exists().where(Hito.indicador_id == Indicador.id, (Hito.estadoHito == ESTADO_CERRADO).is_not(True))
+    # Sin hitos no hay nada completado: se queda activo (p. ej. cargado sin plan todavía)
+    con_hitos = exists().where(Hito.indicador_id == Indicador.id)
+    return Indicador.fechaFinalizacionGeneral < limite, con_hitos, ~pendiente
+
+def _copiar(db: Session, origen, destino, condicion, **extra):
+    """INSERT INTO destino SELECT columnas comunes de origen WHERE condicion, sin pasar filas por Python"""
+    columnas = [c.name for c in origen.__table__.columns if c.name in destino.__table__.c]
+    consulta = select(*[origen.__table__.c[c] for c in columnas], *[literal(v) for v in extra.values()]).where(condicion)
+    db.execute(insert(destino.__table__).from_select(columnas + list(extra), consulta))
+
+def archivar_lote(db: Session, hoy: Optional[date] = None) -> List[int]:
+    """Archiva hasta ARCHIVO_LOTE indicadores cerrados en una transacción; devuelve sus id"""
+    # Antes del FOR UPDATE y en el mismo orden que las escrituras por ORM: sin deadlocks
+    cambios.bloquear(db)
+    # FOR UPDATE (PostgreSQL): nadie agrega hitos ni edita estos indicadores mientras se mueven
+    ids = db.execute(
+        select(Indicador.id).where(*condicion_cerrado(hoy)).order_by(Indicador.id)
+        .limit(ARCHIVO_LOTE).with_for_update()
+    ).scalars().all()
+    if not ids:
+        db.rollback()
+        return []
+    areas = set(db.execute(select(Indicador.area).where(Indicador.id.in_(ids))).scalars())
+
+    indicadores, hitos = Indicador.__table__, Hito.__table__
+    _copiar(db, Indicador, IndicadorArchivado, indicadores.c.id.in_(ids), archivado_at=datetime.utcnow())
+    _copiar(db, Hito, HitoArchivado, hitos.c.indicador_id.in_(ids))
+    db.execute(delete(hitos).where(hitos.c.indicador_id.in_(ids)))
+    db.execute(delete(indicadores).where(indicadores.c.id.in_(ids)))
+    # Para los clientes sincronizados, archivar es borrar de las tablas activas
+    cambios.registrar(db, ids, borrado=True)
+    db.commit()
+    eventos.notificar_escritura(ids, areas)
+    return ids
+
+def archivar(db: Session, hoy: Optional[date] = None) -> int:
+    """Archiva todos los indicadores cerrados, lote a lote; devuelve cuántos"""
+    total = 0
+    while True:
+        ids = archivar_lote(db, hoy)
+        total += len(ids)
+        if len(ids) < ARCHIVO_LOTE:
+            return total
+        time.sleep(ARCHIVO_PAUSA_SEGUNDOS)
+
+def desarchivar(db: Session, indicador_id: int) -> bool:
+    """Devuelve un indicador archivado (con sus hitos) a las tablas activas"""
+    cambios.bloquear(db)
+    archivado = db.execute(
+        select(IndicadorArchivado.area.label("area")).where(IndicadorArchivado.id == indicador_id)
+        .with_for_update(of=IndicadorArchivado.__table__)
+    ).first()
+    if archivado is None:
+        db.rollback()
+        return False
+    area = archivado.area
+    indicadores, hitos = IndicadorArchivado.__table__, HitoArchivado.__table__
+    _copiar(db, IndicadorArchivado, Indicador, indicadores.c.id == indicador_id)
+    _copiar(db, HitoArchivado, Hito, hitos.c.indicador_id == indicador_id)
+    db.execute(delete(hitos).where(hitos.c.indicador_id == indicador_id))
+    db.execute(delete(indicadores).where(indicadores.c.id == indicador_id))
+    cambios.registrar(db, [indicador_id])
+    db.commit()
+    eventos.notificar_escritura([indicador_id], [area])
+    return True
+
+def get_archivados(db: Session, skip: int = 0, limit: int = 100):
+    return db.execute(
+        select(IndicadorArchivado).options(selectinload(IndicadorArchivado.hitos))
+        .order_by(IndicadorArchivado.id).offset(skip).limit(limit)
+    ).scalars().all()
+
+def get_archivado(db: Session, indicador_id: int):
+    return db.execute(
+        select(IndicadorArchivado).options(selectinload(IndicadorArchivado.hitos))
+        .where(IndicadorArchivado.id == indicador_id)
+    ).scalar_one_or_none()
+
+def _corrida():
+    """Una corrida completa si ningún otro proceso de esta máquina está archivando"""
+    fd = os.open(ARCHIVO_LOCK, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        with SessionLocal() as db:
+            archivados = archivar(db)
+            purgados = cambios.purgar(db)
+        _ultima_corrida.update(momento=time.time(), archivados=archivados, error=None)
+        if archivados:
+            print(f"🗄️ Archivados {archivados} indicadores cerrados")
+        if purgados:
+            print(f"🔄 Purgados {purgados} cambios de más de {cambios.CAMBIOS_RETENCION_DIAS} días")
+    except Exception as e:
+        _ultima_corrida.update(momento=time.time(), error=str(e))
+        print(f"⚠️ Error archivando indicadores cerrados: {e}")
+    finally:
+        os.close(fd)
+
+def _bucle():
+    while True:
+        time.sleep(ARCHIVO_CADA_SEGUNDOS)
+        _corrida()
+
+def iniciar():
+    """Hilo de archivo periódico (una vez por worker, después del fork)"""
+    global _hilo
+    if ARCHIVO_CADA_SEGUNDOS <= 0 or _hilo is not None:
+        return
+    _hilo = threading.Thread(target=_bucle, name="archivo", daemon=True)
+    _hilo.start()
+
+def resumen() -> dict:
+    return {
+        "cada_segundos": ARCHIVO_CADA_SEGUNDOS or None,
+        "lote": ARCHIVO_LOTE,
+        "gracia_dias": ARCHIVO_GRACIA_DIAS,
+        "ultima_corrida": _ultima_corrida["momento"],
+        "archivados": _ultima_corrida["archivados"],
+        "error": _ultima_corrida["error"],
+    }
@@ -4,15 +4,20 @@ Implementa JWT tokens, hash de passwords y validaciones de seguridad
 """
 
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Union
+import asyncio
+import hashlib
 import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from .database import get_db
+from .database import get_db, SessionLocal
+from .cache import CacheLRUTTL
+from .crud import usuario as crud_usuario
+from . import eventos
 
 # ===================================================
 # 🔧 CONFIGURACIÓN DE SEGURIDAD
@@ -22,9 +27,34 @@ from .database import get_db
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Usuarios (separados por coma) con acceso a /api/admin
+ADMIN_USUARIOS = {u.strip() for u in os.getenv("ADMIN_USUARIOS", "admin").split(",") if u.strip()}
 
-# Context para hash de passwords
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cachés por proceso: tokens ya verificados y usuarios ya resueltos
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+TOKEN_CACHE_TTL_SEGUNDOS = int(os.getenv("TOKEN_CACHE_TTL_SEGUNDOS", "300"))
+USUARIOS_CACHE_MAX = int(os.getenv("USUARIOS_CACHE_MAX", "1000"))
+USUARIOS_CACHE_TTL_SEGUNDOS = int(os.getenv("USUARIOS_CACHE_TTL_SEGUNDOS", "30"))
+
+# Context para hash de passwords. Si cambia BCRYPT_ROUNDS, los hashes
+# existentes se regeneran con el nuevo costo en el siguiente login exitoso.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+_pwd_context = None
+
+def get_pwd_context():
+    """CryptContext creado en el primer login (passlib no se importa al arrancar)"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _pwd_context
+
+# Verificación de login fuera del event loop: bcrypt libera el GIL, así que
+# basta un pool de hilos acotado. Con todo ocupado y la cola llena se
+# rechaza en vez de encolar sin límite.
+LOGIN_WORKERS = int(os.getenv("LOGIN_WORKERS", "2"))
+LOGIN_COLA_MAX = int(os.getenv("LOGIN_COLA_MAX", "16"))
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -55,11 +85,11 @@ class UserInDB(User):
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica que la contraseña coincida con el hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Genera hash de la contraseña"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crea un token JWT de acceso"""
@@ -74,48 +104,121 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 # ===================================================
-# 👤 GESTIÓN DE USUARIOS (Mock - Reemplazar con DB real)
+# 👤 GESTIÓN DE USUARIOS
 # ===================================================
 
-# Base de datos mock de usuarios (reemplazar con DB real)
-fake_users_db = {
-    "admin": {
-        "username": "admin",
-        "full_name": "Administrador del Sistema",
-        "email": "admin@indicadores.com",
-        "hashed_password": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",  # secret
-        "disabled": False,
-    },
-    "user": {
-        "username": "user",
-        "full_name": "Usuario del Sistema",
-        "email": "user@indicadores.com",
-        "hashed_password": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",  # secret
-        "disabled": False,
-    }
-}
-
-def get_user(username: str):
-    """Obtiene usuario de la base de datos"""
-    if username in fake_users_db:
-        user_dict = fake_users_db[username]
-        return UserInDB(**user_dict)
+# username -> UserInDB. El TTL acota cuánto tarda en verse un cambio hecho
+# desde otro worker; en este proceso se invalida al instante (app.eventos).
+usuarios_cache = CacheLRUTTL(max_entradas=USUARIOS_CACHE_MAX, ttl=USUARIOS_CACHE_TTL_SEGUNDOS)
+_cambios_usuarios = 0
+
+@eventos.suscribir_usuarios
+def invalidar_usuario(username: str):
+    """Descarta el usuario cacheado (se llama al cambiarlo o deshabilitarlo)"""
+    global _cambios_usuarios
+    _cambios_usuarios += 1
+    usuarios_cache.invalidar(username)
+
+def _cargar_usuario(db: Session, username: str):
+    cambios = _cambios_usuarios
+    db_usuario = crud_usuario.get_usuario(db, username)
+    if db_usuario is None:
+        return None
+    user = UserInDB(
+        username=db_usuario.username,
+        email=db_usuario.email,
+        full_name=db_usuario.full_name,
+        disabled=db_usuario.disabled,
+        hashed_password=db_usuario.hashed_password,
+    )
+    # Si el usuario cambió mientras se leía, no guardar la versión vieja
+    if cambios == _cambios_usuarios:
+        usuarios_cache.guardar(username, user)
+    return user
+
+def get_user(username: str, db: Optional[Session] = None):
+    """Obtiene usuario de la base de datos (cacheado por proceso)"""
+    user = usuarios_cache.obtener(username)
+    if user is not None:
+        return user
+    if db is not None:
+        return _cargar_usuario(db, username)
+    with SessionLocal() as db:
+        return _cargar_usuario(db, username)
 
 def authenticate_user(username: str, password: str):
-    """Autentica usuario verificando credenciales"""
+    """Autentica usuario verificando credenciales (bloqueante: ~250ms de CPU)"""
     user = get_user(username)
     if not user:
+        # Mismo costo que un password incorrecto: no revelar qué usuarios existen
+        get_pwd_context().dummy_verify()
         return False
-    if not verify_password(password, user.hashed_password):
+    valido, nuevo_hash = get_pwd_context().verify_and_update(password, user.hashed_password)
+    if not valido:
         return False
+    if nuevo_hash:
+        with SessionLocal() as db:
+            crud_usuario.update_usuario(db, username, hashed_password=nuevo_hash)
     return user
 
+class LoginSaturado(Exception):
+    """El pool de verificación de passwords y su cola están llenos"""
+
+_pool_login: Optional[ThreadPoolExecutor] = None
+_logins_pendientes = 0
+
+async def authenticate_user_async(username: str, password: str):
+    """authenticate_user en el pool de login, sin bloquear el event loop.
+
+    Lanza LoginSaturado si ya hay LOGIN_WORKERS + LOGIN_COLA_MAX logins
+    en curso, para responder 503 de inmediato.
+    """
+    global _pool_login, _logins_pendientes
+    if _logins_pendientes >= LOGIN_WORKERS + LOGIN_COLA_MAX:
+        raise LoginSaturado()
+    if _pool_login is None:
+        _pool_login = ThreadPoolExecutor(max_workers=LOGIN_WORKERS, thread_name_prefix="login")
+    _logins_pendientes += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pool_login, authenticate_user, username, password)
+    finally:
+        _logins_pendientes -= 1
+
+# ===================================================
+# 🎫 VERIFICACIÓN DE TOKENS
+# ===================================================
+
+# sha256(token) -> username. Cada entrada vence con el `exp` del token.
+tokens_verificados = CacheLRUTTL(max_entradas=TOKEN_CACHE_MAX, ttl=TOKEN_CACHE_TTL_SEGUNDOS)
+
+def verificar_token(token: str) -> str:
+    """Devuelve el `sub` de un token válido; lanza JWTError si no lo es.
+
+    La firma y la expiración se verifican una sola vez por token; los
+    usos siguientes se resuelven desde la caché hasta su `exp`.
+    """
+    clave = hashlib.sha256(token.encode()).digest()
+    username = tokens_verificados.obtener(clave)
+    if username is not None:
+        return username
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    username = payload.get("sub")
+    if username is None:
+        raise JWTError("Token sin sujeto")
+    tokens_verificados.guardar(clave, username, expira=payload.get("exp"))
+    return username
+
 # ===================================================
 # 🔐 DEPENDENCIAS DE AUTENTICACIÓN
 # ===================================================
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Obtiene el usuario actual desde el token JWT"""
+def get_current_user(token: str = Depends(oauth2_scheme)):
+    """Obtiene el usuario actual desde el token JWT.
+
+    Síncrona a propósito: FastAPI la corre en el threadpool, así que la
+    consulta de get_user cuando el usuario no está en caché no frena el event loop.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
@@ -123,11 +226,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=verificar_token(token))
     except JWTError:
         raise credentials_exception
     
@@ -142,6 +241,12 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
 
+async def requerir_admin(current_user: User = Depends(get_current_active_user)):
+    """Solo deja pasar a los usuarios listados en ADMIN_USUARIOS"""
+    if current_user.username not in ADMIN_USUARIOS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Se requieren permisos de administrador")
+    return current_user
+
 # ===================================================
 # 🔒 VALIDACIONES DE SEGURIDAD ADICIONALES
 # ===================================================
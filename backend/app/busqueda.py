@@ -0,0 +1,470 @@
+"""
+🔎 Búsqueda de indicadores e hitos
+Coincidencia sin acentos y tolerante a errores de tipeo sobre nombres, áreas y responsables.
+PostgreSQL usa índices pg_trgm; en SQLite se usa un índice invertido en memoria
+y, como respaldo, una tabla FTS5 que mantienen el arranque y las escrituras.
+"""
+
+import heapq
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Integer, bindparam, func, literal, or_, select, text, union_all
+from sqlalchemy.orm import Session
+
+from . import eventos
+from .database import SessionLocal
+from .models.indicador import Indicador, Hito
+
+# ===================================================
+# 🔧 CONFIGURACIÓN
+# ===================================================
+
+# auto | memoria | fts | postgres
+BUSQUEDA_BACKEND = os.getenv("BUSQUEDA_BACKEND", "auto")
+# Similitud mínima (0-1) para aceptar una palabra como coincidencia
+BUSQUEDA_UMBRAL = float(os.getenv("BUSQUEDA_UMBRAL", "0.3"))
+# Por encima de este número de documentos SQLite usa FTS5 en vez del índice en memoria
+BUSQUEDA_MAX_DOCS_MEMORIA = int(os.getenv("BUSQUEDA_MAX_DOCS_MEMORIA", "500000"))
+# Antigüedad máxima del índice local; acota lo desactualizado frente a escrituras de otros workers
+BUSQUEDA_TTL_SEGUNDOS = int(os.getenv("BUSQUEDA_TTL_SEGUNDOS", "60"))
+
+# Campos indexados por tipo de documento y su peso en el ranking
+PESOS_INDICADOR = {
+    "nombreIndicador": 1.0,
+    "area": 0.6,
+    "responsableGeneral": 0.5,
+    "responsableCargaGeneral": 0.5,
+}
+PESOS_HITO = {
+    "nombreHito": 1.0,
+    "responsableHito": 0.5,
+}
+
+STOPWORDS = frozenset({
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+    "o", "para", "por", "se", "su", "un", "una", "y",
+})
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+# ===================================================
+# 🔤 NORMALIZACIÓN
+# ===================================================
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin acentos ni signos: 'Acreditación Gestión' -> 'acreditacion gestion'"""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", str(texto).lower())
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(" ", sin_acentos).strip()
+
+def palabras(texto: str) -> List[str]:
+    return [p for p in normalizar(texto).split() if len(p) > 1 and p not in STOPWORDS]
+
+def trigramas(palabra: str) -> set:
+    """Trigramas con el mismo relleno que pg_trgm ('  pal', 'pal ')"""
+    relleno = f"  {palabra} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+# ===================================================
+# 🧠 ÍNDICE INVERTIDO EN MEMORIA
+# ===================================================
+
+class IndiceInvertido:
+    """Índice palabra -> documentos, con un índice de trigramas sobre el vocabulario.
+
+    Los errores de tipeo se resuelven comparando el término contra el
+    vocabulario (pocas miles de palabras), no contra cada documento.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.construido = 0.0
+        self.demasiado_grande = False
+        self.docs: List[Tuple[str, int, int, str]] = []  # (tipo, indicador_id, hito_id, nombreHito)
+        self.indicadores: Dict[int, dict] = {}
+        self.vocabulario: Dict[str, int] = {}
+        self.lista_palabras: List[str] = []  # word_id -> palabra
+        self.tamanos: List[int] = []  # word_id -> cantidad de trigramas
+        self.por_trigrama: Dict[str, array] = {}
+        self.postings: List[Dict[float, array]] = []  # word_id -> {peso: doc_ids}
+
+    def _indexar(self, doc_id: int, texto: str, peso: float):
+        for palabra in set(palabras(texto)):
+            word_id = self.vocabulario.get(palabra)
+            if word_id is None:
+                word_id = len(self.tamanos)
+                self.vocabulario[palabra] = word_id
+                self.lista_palabras.append(palabra)
+                tris = trigramas(palabra)
+                self.tamanos.append(len(tris))
+                self.postings.append({})
+                for tri in tris:
+                    self.por_trigrama.setdefault(tri, array("I")).append(word_id)
+            self.postings[word_id].setdefault(peso, array("I")).append(doc_id)
+
+    def construir(self, filas_indicadores, filas_hitos, version=None):
+        for fila in filas_indicadores:
+            self.indicadores[fila.id] = {
+                "vp": fila.vp,
+                "area": fila.area,
+                "nombreIndicador": fila.nombreIndicador,
+            }
+            doc_id = len(self.docs)
+            self.docs.append(("indicador", fila.id, None, None))
+            for campo, peso in PESOS_INDICADOR.items():
+                self._indexar(doc_id, getattr(fila, campo), peso)
+        for fila in filas_hitos:
+            doc_id = len(self.docs)
+            self.docs.append(("hito", fila.indicador_id, fila.id, fila.nombreHito))
+            for campo, peso in PESOS_HITO.items():
+                self._indexar(doc_id, getattr(fila, campo), peso)
+        self.version = version
+        self.construido = time.monotonic()
+
+    def palabras_similares(self, termino: str):
+        """Genera (word_id, similitud) para las palabras del vocabulario cercanas al término"""
+        exacta = self.vocabulario.get(termino)
+        if exacta is not None:
+            yield exacta, 1.0
+        tris = trigramas(termino)
+        compartidos: Dict[int, int] = {}
+        for tri in tris:
+            for word_id in self.por_trigrama.get(tri, ()):
+                compartidos[word_id] = compartidos.get(word_id, 0) + 1
+        for word_id, comunes in compartidos.items():
+            if word_id == exacta:
+                continue
+            similitud = comunes / (len(tris) + self.tamanos[word_id] - comunes)
+            if similitud < BUSQUEDA_UMBRAL and len(termino) >= 3:
+                # Coincidencia por prefijo mientras el usuario escribe
+                palabra = self.lista_palabras[word_id]
+                if palabra.startswith(termino):
+                    similitud = 0.5 + 0.4 * len(termino) / len(palabra)
+            if similitud >= BUSQUEDA_UMBRAL:
+                yield word_id, similitud
+
+    def buscar(self, consulta: str, skip: int = 0, limit: int = 20):
+        terminos = palabras(consulta)
+        if not terminos:
+            return 0, []
+        puntajes: Dict[int, float] = {}
+        for termino in terminos:
+            mejor: Dict[int, float] = {}
+            for word_id, similitud in self.palabras_similares(termino):
+                for peso, doc_ids in self.postings[word_id].items():
+                    puntaje = similitud * peso
+                    for doc_id in doc_ids:
+                        if puntaje > mejor.get(doc_id, 0.0):
+                            mejor[doc_id] = puntaje
+            for doc_id, puntaje in mejor.items():
+                puntajes[doc_id] = puntajes.get(doc_id, 0.0) + puntaje
+        top = heapq.nlargest(skip + limit, puntajes.items(), key=lambda par: (par[1], -par[0]))
+        resultados = []
+        for doc_id, puntaje in top[skip:]:
+            tipo, indicador_id, hito_id, nombre_hito = self.docs[doc_id]
+            resultados.append(_resultado(
+                tipo, indicador_id, hito_id, nombre_hito,
+                self.indicadores.get(indicador_id, {}), puntaje / len(terminos),
+            ))
+        return len(puntajes), resultados
+
+_indice = IndiceInvertido()
+_indice_lock = threading.Lock()
+
+def _indice_actualizado(db: Session):
+    """Reconstruye el índice en memoria si hubo escrituras desde la última vez.
+
+    El índice nuevo se arma aparte y se publica de una vez, así las
+    búsquedas concurrentes siguen usando el anterior mientras tanto.
+    Devuelve None si el volumen supera BUSQUEDA_MAX_DOCS_MEMORIA.
+    """
+    global _indice
+    version = eventos.version_datos()
+    if _indice.version != version or time.monotonic() - _indice.construido > BUSQUEDA_TTL_SEGUNDOS:
+        with _indice_lock:
+            if _indice.version != version or time.monotonic() - _indice.construido > BUSQUEDA_TTL_SEGUNDOS:
+                nuevo = IndiceInvertido()
+                total_docs = (
+                    db.execute(select(func.count(Indicador.id))).scalar()
+                    + db.execute(select(func.count(Hito.id))).scalar()
+                )
+                if total_docs > BUSQUEDA_MAX_DOCS_MEMORIA:
+                    nuevo.demasiado_grande = True
+                    nuevo.version = version
+                    nuevo.construido = time.monotonic()
+                else:
+                    filas_indicadores = db.execute(select(
+                        Indicador.id, Indicador.vp.label("vp"),
+                        *[getattr(Indicador, c).label(c) for c in PESOS_INDICADOR],
+                    )).all()
+                    filas_hitos = db.execute(select(
+                        Hito.id, Hito.indicador_id, *[getattr(Hito, c).label(c) for c in PESOS_HITO]
+                    )).all()
+                    nuevo.construir(filas_indicadores, filas_hitos, version)
+                _indice = nuevo
+    indice = _indice
+    return None if indice.demasiado_grande else indice
+
+# ===================================================
+# 🗃️ RESPALDO FTS5 (SQLite)
+# ===================================================
+
+class FTSNoDisponible(RuntimeError):
+    """La tabla FTS5 de este worker todavía se está armando"""
+
+# La tabla la crean y mantienen el arranque del worker y las escrituras
+# (eventos), siempre en una sesión de escritura; la búsqueda solo la lee
+_fts_listo = False
+_fts_lock = threading.Lock()
+_fts_pendientes = set()
+_fts_completo = None  # None: sin pasada completa pendiente; si no, su `forzar`
+_fts_hilo = None
+
+def _filas_fts(db: Session, indicador_ids=None):
+    """Documentos FTS de los indicadores dados (todos si es None) y de sus hitos"""
+    consulta_indicadores = select(
+        Indicador.id, Indicador.nombreIndicador, Indicador.area.label("area"),
+        Indicador.responsableGeneral.label("responsableGeneral"),
+        Indicador.responsableCargaGeneral.label("responsableCargaGeneral"),
+    )
+    consulta_hitos = select(
+        Hito.id, Hito.indicador_id, Hito.nombreHito, Hito.responsableHito.label("responsableHito"),
+    )
+    if indicador_ids is not None:
+        consulta_indicadores = consulta_indicadores.where(Indicador.id.in_(indicador_ids))
+        consulta_hitos = consulta_hitos.where(Hito.indicador_id.in_(indicador_ids))
+    filas = [
+        {"tipo": "indicador", "indicador_id": f.id, "hito_id": None, "nombre": f.nombreIndicador,
+         "area": f.area, "responsables": f"{f.responsableGeneral or ''} {f.responsableCargaGeneral or ''}"}
+        for f in db.execute(consulta_indicadores)
+    ]
+    filas += [
+        {"tipo": "hito", "indicador_id": f.indicador_id, "hito_id": f.id, "nombre": f.nombreHito,
+         "area": None, "responsables": f.responsableHito}
+        for f in db.execute(consulta_hitos)
+    ]
+    return filas
+
+def actualizar_fts(db: Session, indicador_ids=None, forzar: bool = False):
+    """Crea la tabla virtual FTS5 si falta y la sincroniza con las tablas principales.
+
+    Con ids reemplaza solo los documentos de esos indicadores. Sin ids la
+    rehace entera, salvo que ya tenga un documento por fila (la armó otro
+    worker) y no se pida `forzar`. BEGIN IMMEDIATE toma el lock de escritura
+    de SQLite antes de mirar: los workers que arrancan juntos se turnan y
+    el segundo encuentra el trabajo hecho. Usar una sesión de escritura nueva.
+    """
+    global _fts_listo
+    db.execute(text("BEGIN IMMEDIATE"))
+    try:
+        db.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_fts USING fts5("
+            "tipo UNINDEXED, indicador_id UNINDEXED, hito_id UNINDEXED, "
+            "nombre, area, responsables, tokenize='unicode61 remove_diacritics 2')"
+        ))
+        if indicador_ids is not None:
+            db.execute(
+                text("DELETE FROM busqueda_fts WHERE indicador_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": list(indicador_ids)},
+            )
+            filas = _filas_fts(db, indicador_ids)
+        else:
+            documentos = (
+                db.execute(select(func.count(Indicador.id))).scalar()
+                + db.execute(select(func.count(Hito.id))).scalar()
+            )
+            if not forzar and db.execute(text("SELECT count(*) FROM busqueda_fts")).scalar() == documentos:
+                filas = []
+            else:
+                db.execute(text("DELETE FROM busqueda_fts"))
+                filas = _filas_fts(db)
+        if filas:
+            db.execute(text(
+                "INSERT INTO busqueda_fts (tipo, indicador_id, hito_id, nombre, area, responsables) "
+                "VALUES (:tipo, :indicador_id, :hito_id, :nombre, :area, :responsables)"
+            ), filas)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    _fts_listo = True
+
+def _programar_fts(indicador_ids=None, forzar: bool = False):
+    """Encola una sincronización de la tabla FTS en un hilo con su propia sesión de escritura.
+
+    Las escrituras que llegan mientras el hilo trabaja se juntan en la
+    siguiente pasada; una sincronización completa absorbe las parciales.
+    """
+    global _fts_completo, _fts_hilo
+    with _fts_lock:
+        if indicador_ids:
+            _fts_pendientes.update(indicador_ids)
+        elif _fts_completo is None or forzar:
+            _fts_completo = forzar
+        if _fts_hilo is None:
+            _fts_hilo = threading.Thread(target=_sincronizar_fts, name="busqueda-fts", daemon=True)
+            _fts_hilo.start()
+
+def _sincronizar_fts():
+    global _fts_completo, _fts_hilo
+    while True:
+        with _fts_lock:
+            if not _fts_pendientes and _fts_completo is None:
+                _fts_hilo = None
+                return
+            ids, forzar = (None, _fts_completo) if _fts_completo is not None else (set(_fts_pendientes), False)
+            _fts_pendientes.clear()
+            _fts_completo = None
+        try:
+            with SessionLocal() as db:
+                actualizar_fts(db, ids, forzar=forzar)
+        except Exception as e:
+            print(f"⚠️ No se pudo actualizar la tabla FTS de búsqueda: {e}")
+
+@eventos.suscribir
+def _al_escribir(indicador_ids, areas):
+    """Reemplaza los documentos FTS de lo escrito (todo si fue un cambio masivo)"""
+    if _fts_listo:
+        _programar_fts(indicador_ids, forzar=not indicador_ids)
+
+def _buscar_fts(db: Session, consulta: str, skip: int, limit: int):
+    if not _fts_listo:
+        # Lo arma el hilo de escritura; este request no toca la tabla
+        _programar_fts()
+        raise FTSNoDisponible("El índice de búsqueda se está armando, reintente en unos segundos")
+    terminos = palabras(consulta)
+    if not terminos:
+        return 0, []
+    # Prefijo por término; FTS5 no tolera errores de tipeo, solo acentos
+    expresion = " OR ".join(f'"{t}"*' for t in terminos)
+    total = db.execute(
+        text("SELECT count(*) FROM busqueda_fts WHERE busqueda_fts MATCH :q"), {"q": expresion}
+    ).scalar()
+    filas = db.execute(text(
+        "SELECT tipo, indicador_id, hito_id, nombre, -bm25(busqueda_fts, 0, 0, 0, 1.0, 0.6, 0.5) AS score "
+        "FROM busqueda_fts WHERE busqueda_fts MATCH :q ORDER BY score DESC LIMIT :limit OFFSET :skip"
+    ), {"q": expresion, "limit": limit, "skip": skip}).all()
+    return total, _completar(db, [
+        (f.tipo, f.indicador_id, f.hito_id, f.nombre if f.tipo == "hito" else None, f.score) for f in filas
+    ])
+
+# ===================================================
+# 🐘 POSTGRESQL (pg_trgm + unaccent)
+# ===================================================
+
+def _buscar_postgres(db: Session, consulta: str, skip: int, limit: int):
+    """Usa los índices GIN trigram de la migración 0002 sobre f_unaccent(lower(col))"""
+    q = normalizar(consulta)
+    if not q:
+        return 0, []
+    db.execute(
+        select(func.set_config("pg_trgm.word_similarity_threshold", str(BUSQUEDA_UMBRAL), True))
+    )
+
+    def expr(columna):
+        return func.f_unaccent(func.lower(columna))
+
+    def puntaje(modelo, pesos):
+        return func.greatest(*[
+            func.coalesce(func.word_similarity(q, expr(getattr(modelo, c))), 0) * peso
+            for c, peso in pesos.items()
+        ])
+
+    def coincide(modelo, pesos):
+        return or_(*[literal(q).op("<%")(expr(getattr(modelo, c))) for c in pesos])
+
+    resultados = union_all(
+        select(
+            literal("indicador").label("tipo"), Indicador.id.label("indicador_id"),
+            literal(None, Integer).label("hito_id"), puntaje(Indicador, PESOS_INDICADOR).label("score"),
+        ).where(coincide(Indicador, PESOS_INDICADOR)),
+        select(
+            literal("hito").label("tipo"), Hito.indicador_id.label("indicador_id"),
+            Hito.id.label("hito_id"), puntaje(Hito, PESOS_HITO).label("score"),
+        ).where(coincide(Hito, PESOS_HITO)),
+    ).subquery()
+    total = db.execute(select(func.count()).select_from(resultados)).scalar()
+    filas = db.execute(
+        select(resultados).order_by(resultados.c.score.desc()).offset(skip).limit(limit)
+    ).all()
+    return total, _completar(db, [(f.tipo, f.indicador_id, f.hito_id, None, f.score) for f in filas])
+
+# ===================================================
+# 📋 RESULTADOS
+# ===================================================
+
+def _resultado(tipo, indicador_id, hito_id, nombre_hito, indicador: dict, score: float) -> dict:
+    return {
+        "tipo": tipo,
+        "indicador_id": indicador_id,
+        "hito_id": hito_id,
+        "nombreIndicador": indicador.get("nombreIndicador"),
+        "nombreHito": nombre_hito,
+        "vp": indicador.get("vp"),
+        "area": indicador.get("area"),
+        "score": round(float(score), 4),
+    }
+
+def _completar(db: Session, filas) -> List[dict]:
+    """Agrega datos de presentación a (tipo, indicador_id, hito_id, nombreHito, score)"""
+    ids_indicador = {f[1] for f in filas}
+    ids_hito_sin_nombre = [f[2] for f in filas if f[0] == "hito" and f[3] is None]
+    indicadores = {
+        f.id: {"vp": f.vp, "area": f.area, "nombreIndicador": f.nombreIndicador}
+        for f in db.execute(
+            select(Indicador.id, Indicador.vp.label("vp"), Indicador.area.label("area"), Indicador.nombreIndicador)
+            .where(Indicador.id.in_(ids_indicador))
+        )
+    } if ids_indicador else {}
+    nombres_hito = dict(db.execute(
+        select(Hito.id, Hito.nombreHito).where(Hito.id.in_(ids_hito_sin_nombre))
+    ).all()) if ids_hito_sin_nombre else {}
+    return [
+        _resultado(tipo, indicador_id, hito_id, nombre or nombres_hito.get(hito_id),
+                   indicadores.get(indicador_id, {}), score)
+        for tipo, indicador_id, hito_id, nombre, score in filas
+    ]
+
+def backend_para(db: Session) -> str:
+    if BUSQUEDA_BACKEND != "auto":
+        return BUSQUEDA_BACKEND
+    if db.get_bind().dialect.name == "postgresql":
+        return "postgres"
+    return "memoria"
+
+def precalentar(db: Session):
+    """Arma de antemano el índice en memoria o la tabla FTS (con `db` de escritura, al arrancar el worker)"""
+    backend = backend_para(db)
+    if backend == "fts" or (backend == "memoria" and _indice_actualizado(db) is None):
+        actualizar_fts(db)
+
+def buscar(db: Session, consulta: str, skip: int = 0, limit: int = 20) -> dict:
+    """Busca en nombres de indicadores e hitos, áreas y responsables; resultados ordenados por score"""
+    backend = backend_para(db)
+    if backend == "postgres":
+        total, resultados = _buscar_postgres(db, consulta, skip, limit)
+    elif backend == "memoria":
+        indice = _indice_actualizado(db)
+        if indice is None:
+            backend = "fts"
+            total, resultados = _buscar_fts(db, consulta, skip, limit)
+        else:
+            total, resultados = indice.buscar(consulta, skip, limit)
+    else:
+        total, resultados = _buscar_fts(db, consulta, skip, limit)
+    return {
+        "q": consulta,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "backend": backend,
+        "resultados": resultados,
+    }
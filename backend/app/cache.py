@@ -0,0 +1,88 @@
+"""
+🗄️ Cachés en memoria del proceso
+Valores derivados de la BD que se invalidan con cada escritura (app.eventos)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from . import eventos
+
+class CacheVersionado:
+    """Caché clave -> valor atada a la versión de datos.
+
+    Una entrada solo es válida mientras no haya escrituras notificadas
+    (misma versión) y no supere `ttl` segundos, que acota cuánto puede
+    quedar desactualizada frente a escrituras hechas en otros workers.
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: Dict[Hashable, Tuple[int, float, Any]] = {}
+
+    def obtener(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        version = eventos.version_datos()
+        ahora = time.monotonic()
+        entrada = self._entradas.get(clave)
+        if entrada is not None and entrada[0] == version and ahora - entrada[1] < self.ttl:
+            return entrada[2]
+        valor = calcular()
+        with self._lock:
+            if version != eventos.version_datos():
+                # Hubo una escritura mientras se calculaba: no guardar un valor viejo
+                return valor
+            self._entradas[clave] = (version, ahora, valor)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+class CacheLRUTTL:
+    """Caché acotada: a lo más `max_entradas` claves, cada una con vencimiento.
+
+    El vencimiento es `ttl` segundos desde que se guarda, o antes si se pasa
+    `expira` (epoch, p. ej. el `exp` de un JWT). Al llenarse se descarta la
+    clave usada hace más tiempo.
+    """
+
+    def __init__(self, max_entradas: int = 10000, ttl: float = 60):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def obtener(self, clave: Hashable, defecto: Any = None) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return defecto
+            if entrada[0] <= time.time():
+                del self._entradas[clave]
+                return defecto
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+
+    def guardar(self, clave: Hashable, valor: Any, expira: Optional[float] = None):
+        vence = time.time() + self.ttl
+        if expira is not None:
+            vence = min(vence, expira)
+        with self._lock:
+            self._entradas[clave] = (vence, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, clave: Hashable):
+        with self._lock:
+            self._entradas.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
@@ -0,0 +1,262 @@
+"""
+📦 Caché de respuestas de lectura
+Guarda el JSON ya codificado de los GET de indicadores, con etiquetas
+(`listado`, `area:<área>`, `indicador:<id>`) para invalidar solo lo que
+cambió en cada escritura (app.eventos)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from . import eventos
+
+RESPUESTAS_CACHE_MB = float(os.getenv("RESPUESTAS_CACHE_MB", "32"))
+# Acota cuánto puede quedar desactualizada una respuesta frente a
+# escrituras hechas en otros workers (sin nivel compartido)
+RESPUESTAS_TTL_SEGUNDOS = float(os.getenv("RESPUESTAS_TTL_SEGUNDOS", "60"))
+# Nivel compartido entre workers: "redis" (con RESPUESTAS_REDIS_URL) o "local"
+RESPUESTAS_COMPARTIDO = os.getenv("RESPUESTAS_COMPARTIDO", "")
+RESPUESTAS_REDIS_URL = os.getenv("RESPUESTAS_REDIS_URL")
+
+# Costo aproximado de una entrada además del cuerpo (clave, tupla, nodo del LRU)
+BYTES_POR_ENTRADA = 400
+TODO = "*"  # etiqueta que llevan todas las entradas: invalidarla vacía la caché
+
+class CompartidoLocal:
+    """Nivel compartido en memoria del proceso, con el mismo contrato que CompartidoRedis.
+
+    Sirve de reemplazo local (desarrollo, pruebas): cada etiqueta tiene
+    una versión y una entrada solo vale si las versiones de sus etiquetas
+    no cambiaron desde antes de calcularla.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versiones: Dict[str, int] = {}
+        self._entradas: Dict[str, Tuple[float, Dict[str, int], bytes]] = {}
+
+    def versiones(self, etiquetas: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            return {e: self._versiones.get(e, 0) for e in etiquetas}
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            vence, versiones, cuerpo = entrada
+            if vence <= time.time() or any(self._versiones.get(e, 0) != v for e, v in versiones.items()):
+                del self._entradas[clave]
+                return None
+            return cuerpo
+
+    def guardar(self, clave: str, cuerpo: bytes, versiones: Dict[str, int], ttl: float):
+        with self._lock:
+            self._entradas[clave] = (time.time() + ttl, versiones, cuerpo)
+
+    def invalidar(self, etiquetas: Iterable[str]):
+        with self._lock:
+            for etiqueta in etiquetas:
+                self._versiones[etiqueta] = self._versiones.get(etiqueta, 0) + 1
+
+class CompartidoRedis:
+    """Nivel compartido en Redis: las invalidaciones de un worker valen para todos.
+
+    Cada entrada guarda las versiones de sus etiquetas; invalidar es un
+    INCR por etiqueta, así que no hay que buscar qué claves borrar.
+    """
+
+    def __init__(self, url: str, prefijo: str = "indicadores:respuestas:"):
+        import redis  # dependencia opcional: solo con RESPUESTAS_COMPARTIDO=redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefijo = prefijo
+
+    def versiones(self, etiquetas: Iterable[str]) -> Dict[str, int]:
+        etiquetas = list(etiquetas)
+        valores = self._redis.mget([f"{self.prefijo}e:{e}" for e in etiquetas])
+        return {e: int(v or 0) for e, v in zip(etiquetas, valores)}
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        valor = self._redis.get(f"{self.prefijo}r:{clave}")
+        if valor is None:
+            return None
+        cabecera, cuerpo = valor.split(b"\n", 1)
+        versiones = json.loads(cabecera)
+        if self.versiones(versiones) != versiones:
+            return None
+        return cuerpo
+
+    def guardar(self, clave: str, cuerpo: bytes, versiones: Dict[str, int], ttl: float):
+        valor = json.dumps(versiones).encode() + b"\n" + cuerpo
+        self._redis.set(f"{self.prefijo}r:{clave}", valor, ex=max(1, int(ttl)))
+
+    def invalidar(self, etiquetas: Iterable[str]):
+        pipe = self._redis.pipeline(transaction=False)
+        for etiqueta in etiquetas:
+            pipe.incr(f"{self.prefijo}e:{etiqueta}")
+        pipe.execute()
+
+class CacheRespuestas:
+    """LRU en memoria del proceso acotado por bytes, con etiquetas y nivel compartido opcional.
+
+    `obtener_o_calcular` devuelve el cuerpo guardado o calcula uno nuevo;
+    si hubo una escritura mientras se calculaba no se guarda. Un fallo del
+    nivel compartido (Redis caído) no rompe el request: se sigue solo con
+    el nivel local.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, compartido=None, reintentar_cada: float = 5.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compartido = compartido
+        self.reintentar_cada = reintentar_cada
+        self._compartido_caido_hasta = 0.0
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, Tuple[float, bytes, frozenset]]" = OrderedDict()
+        self._por_etiqueta: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self.contadores = {"hits": 0, "hits_compartido": 0, "misses": 0, "desalojos": 0, "invalidadas": 0, "errores_compartido": 0}
+
+    def _quitar(self, clave: str):
+        """Saca la entrada y sus etiquetas (con el lock tomado)"""
+        _, cuerpo, etiquetas = self._entradas.pop(clave)
+        self._bytes -= len(cuerpo) + len(clave) + BYTES_POR_ENTRADA
+        for etiqueta in etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def _guardar_local(self, clave: str, cuerpo: bytes, etiquetas: frozenset):
+        costo = len(cuerpo) + len(clave) + BYTES_POR_ENTRADA
+        if costo > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (time.monotonic() + self.ttl, cuerpo, etiquetas)
+            self._bytes += costo
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+                self.contadores["desalojos"] += 1
+
+    def _obtener_local(self, clave: str) -> Optional[bytes]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[0] <= time.monotonic():
+                self._quitar(clave)
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+
+    def _compartido(self, operacion: str, *args):
+        # Tras un error no se reintenta por unos segundos, para no pagar un timeout en cada request
+        if time.monotonic() < self._compartido_caido_hasta:
+            return None
+        try:
+            return getattr(self.compartido, operacion)(*args)
+        except Exception as e:
+            self.contadores["errores_compartido"] += 1
+            self._compartido_caido_hasta = time.monotonic() + self.reintentar_cada
+            print(f"⚠️ Caché de respuestas compartida no disponible ({e}); sigue solo la local")
+            return None
+
+    def obtener_local(self, clave: str) -> Optional[bytes]:
+        """Solo el nivel local (sin I/O): para el camino rápido desde el event loop"""
+        cuerpo = self._obtener_local(clave)
+        if cuerpo is not None:
+            self.contadores["hits"] += 1
+        return cuerpo
+
+    def obtener_o_calcular(self, clave: str, etiquetas: Iterable[str], calcular: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """(cuerpo, origen) con origen "local", "compartido" o "calculado" """
+        cuerpo = self._obtener_local(clave)
+        if cuerpo is not None:
+            self.contadores["hits"] += 1
+            return cuerpo, "local"
+
+        etiquetas = frozenset(etiquetas) | {TODO}
+        version = eventos.version_datos()
+        versiones = None
+        if self.compartido is not None:
+            cuerpo = self._compartido("obtener", clave)
+            if cuerpo is not None:
+                self.contadores["hits_compartido"] += 1
+                self._guardar_local(clave, cuerpo, etiquetas)
+                return cuerpo, "compartido"
+            versiones = self._compartido("versiones", etiquetas)
+
+        self.contadores["misses"] += 1
+        cuerpo = calcular()
+        if version == eventos.version_datos():
+            self._guardar_local(clave, cuerpo, etiquetas)
+            if versiones is not None:
+                self._compartido("guardar", clave, cuerpo, versiones, self.ttl)
+        return cuerpo, "calculado"
+
+    def invalidar(self, etiquetas: Iterable[str]):
+        etiquetas = set(etiquetas)
+        with self._lock:
+            if TODO in etiquetas:
+                claves = set(self._entradas)
+            else:
+                claves = set().union(*(self._por_etiqueta.get(e, ()) for e in etiquetas))
+            for clave in claves:
+                self._quitar(clave)
+            self.contadores["invalidadas"] += len(claves)
+        if self.compartido is not None:
+            self._compartido("invalidar", etiquetas)
+
+    def limpiar(self):
+        self.invalidar({TODO})
+
+    def estadisticas(self) -> dict:
+        consultas = self.contadores["hits"] + self.contadores["hits_compartido"] + self.contadores["misses"]
+        return {
+            **self.contadores,
+            "hit_ratio": round((consultas - self.contadores["misses"]) / consultas, 3) if consultas else None,
+            "entradas": len(self._entradas),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "compartido": type(self.compartido).__name__ if self.compartido is not None else None,
+        }
+
+def crear_compartido():
+    if RESPUESTAS_COMPARTIDO == "redis" and RESPUESTAS_REDIS_URL:
+        try:
+            return CompartidoRedis(RESPUESTAS_REDIS_URL)
+        except ImportError:
+            print("⚠️ RESPUESTAS_COMPARTIDO=redis pero falta el paquete 'redis'; caché solo local")
+    elif RESPUESTAS_COMPARTIDO == "local":
+        return CompartidoLocal()
+    return None
+
+respuestas = CacheRespuestas(
+    max_bytes=int(RESPUESTAS_CACHE_MB * 1024 * 1024),
+    ttl=RESPUESTAS_TTL_SEGUNDOS,
+    compartido=crear_compartido(),
+)
+
+@eventos.suscribir
+def _invalidar_por_escritura(indicador_ids, areas):
+    """Sin ids ni áreas (carga del Excel) se vacía todo; si no, solo lo afectado.
+
+    El listado paginado se invalida en cada escritura: altas y bajas
+    corren las páginas y cada página incluye casi todos los indicadores.
+    """
+    if not indicador_ids and not areas:
+        respuestas.limpiar()
+        return
+    respuestas.invalidar(
+        {"listado"} | {f"indicador:{i}" for i in indicador_ids} | {f"area:{a}" for a in areas}
+    )
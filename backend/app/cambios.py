@@ -0,0 +1,137 @@
+"""
+🔄 Sincronización incremental
+Cada escritura de indicadores o hitos deja una fila en la tabla cambios (por
+ORM, con los listeners de app.models.cambio; las escrituras en bloque de
+app.archivo, volcado.py y cargar_datos.py las registran a mano). Un cliente
+guarda el id del último cambio como token y con
+GET /api/indicadores/cambios?token= recibe solo lo posterior: los indicadores
+creados o modificados (con sus hitos) y los id borrados, en vez de volver a
+descargar todo.
+
+- Sin token, o con uno que ya no se puede responder (purgado, BD restaurada
+  o recargada), la respuesta trae `completo: true` y el token actual: el
+  cliente recarga todo y sigue desde ahí
+- Las filas de más de CAMBIOS_RETENCION_DIAS se purgan junto con el archivo
+  de cerrados; la purga deja un corte para los tokens anteriores
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.orm import Session, selectinload
+
+from .models.cambio import Cambio, bloquear  # noqa: F401 (bloquear se reexporta para app.archivo)
+from .models.indicador import Indicador
+
+# Cambios por respuesta; con más, `hay_mas` y el cliente vuelve a pedir con el token nuevo
+CAMBIOS_LIMITE = int(os.getenv("CAMBIOS_LIMITE", "500"))
+CAMBIOS_RETENCION_DIAS = int(os.getenv("CAMBIOS_RETENCION_DIAS", "30"))
+
+class TokenInvalido(ValueError):
+    pass
+
+def leer_token(token: Optional[str]) -> Optional[int]:
+    if token in (None, ""):
+        return None
+    try:
+        valor = int(token)
+    except ValueError:
+        raise TokenInvalido(f"Token inválido: {token}")
+    if valor < 0:
+        raise TokenInvalido(f"Token inválido: {token}")
+    return valor
+
+def registrar(db: Session, indicador_ids: Iterable[int], borrado: bool = False):
+    """Registra indicadores escritos sin pasar por el ORM (INSERT ... SELECT, DELETE en bloque)"""
+    momento = datetime.utcnow()
+    filas = [
+        {"entidad": "indicador", "entidad_id": i, "indicador_id": i, "borrado": borrado, "momento": momento}
+        for i in indicador_ids
+    ]
+    if filas:
+        db.execute(insert(Cambio.__table__), filas)
+
+def cortar(conn, hasta: Optional[int] = None):
+    """Invalida los tokens anteriores a `hasta` (sin `hasta`, todos los emitidos hasta ahora).
+
+    Para lo que cambia datos sin dejar rastro fila a fila: restaurar un
+    volcado, recargar el Excel, purgar cambios viejos.
+    """
+    conn.execute(insert(Cambio.__table__).values(
+        entidad="corte", entidad_id=hasta, borrado=False, momento=datetime.utcnow()
+    ))
+
+def _ultimo(db: Session) -> int:
+    return db.execute(select(func.max(Cambio.id))).scalar() or 0
+
+def _completo(token: int) -> dict:
+    return {"token": str(token), "completo": True, "hay_mas": False,
+            "indicadores": [], "borrados": {"indicadores": [], "hitos": []}}
+
+def desde(db: Session, token: Optional[int], limite: int = CAMBIOS_LIMITE) -> dict:
+    """Cambios posteriores al token: indicadores a reemplazar enteros y id borrados.
+
+    Pagina por filas de cambios (no por indicadores); el token devuelto es
+    el id del último cambio incluido.
+    """
+    ultimo = _ultimo(db)
+    # token > último: la tabla se vació (BD recreada) y los id empezaron de nuevo
+    if token is None or token > ultimo:
+        return _completo(ultimo)
+    corte = db.execute(
+        select(Cambio.id).where(
+            Cambio.entidad == "corte", Cambio.id > token,
+            or_(Cambio.entidad_id.is_(None), Cambio.entidad_id > token),
+        ).limit(1)
+    ).first()
+    if corte is not None:
+        return _completo(ultimo)
+
+    filas = db.execute(
+        select(Cambio).where(Cambio.id > token).order_by(Cambio.id).limit(limite + 1)
+    ).scalars().all()
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    # El último cambio de cada indicador decide si se reenvía o se borra
+    borrado_indicador, hitos_borrados = {}, []
+    for fila in filas:
+        if fila.entidad == "indicador":
+            borrado_indicador[fila.indicador_id] = fila.borrado
+        elif fila.entidad == "hito":
+            if fila.borrado:
+                hitos_borrados.append(fila.entidad_id)
+            # El hito cambió: se reenvía su indicador, salvo que se haya borrado
+            borrado_indicador.setdefault(fila.indicador_id, False)
+
+    vigentes = [i for i, borrado in borrado_indicador.items() if not borrado]
+    indicadores = db.execute(
+        select(Indicador).options(selectinload(Indicador.hitos))
+        .where(Indicador.id.in_(vigentes)).order_by(Indicador.id)
+    ).scalars().all() if vigentes else []
+    # Lo que ya no está (borrado o archivado en un cambio posterior a esta página) también es lápida
+    encontrados = {i.id for i in indicadores}
+    borrados = sorted(i for i in borrado_indicador if i not in encontrados)
+    return {
+        "token": str(filas[-1].id if filas else token),
+        "completo": False,
+        "hay_mas": hay_mas,
+        "indicadores": indicadores,
+        "borrados": {"indicadores": borrados, "hitos": sorted(set(hitos_borrados))},
+    }
+
+def purgar(db: Session, dias: int = CAMBIOS_RETENCION_DIAS) -> int:
+    """Borra los cambios de más de `dias` y deja un corte para los tokens que los necesitaban"""
+    limite = datetime.utcnow() - timedelta(days=dias)
+    hasta = db.execute(select(func.max(Cambio.id)).where(Cambio.momento < limite)).scalar()
+    # Nunca la última fila: el token actual se sigue pudiendo validar
+    if hasta is None or hasta >= _ultimo(db):
+        db.rollback()
+        return 0
+    bloquear(db)
+    borrados = db.execute(delete(Cambio).where(Cambio.id <= hasta)).rowcount
+    cortar(db, hasta)
+    db.commit()
+    return borrados
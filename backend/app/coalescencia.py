@@ -0,0 +1,102 @@
+"""
+🛬 Coalescencia de lecturas idénticas (single-flight)
+Requests concurrentes con la misma clave dentro de un worker comparten una
+sola ejecución: el primero (líder) la corre en el threadpool y los demás
+esperan su resultado en el event loop, sin ocupar hilos ni conexiones
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, Hashable
+
+from fastapi.concurrency import run_in_threadpool
+
+from . import eventos
+
+# Cuánto espera un seguidor al líder antes de desprenderse y calcular por
+# su cuenta: una consulta lenta o trabada no cuelga a los que llegan después
+COALESCENCIA_TIMEOUT_SEGUNDOS = float(os.getenv("COALESCENCIA_TIMEOUT_SEGUNDOS", "10"))
+COALESCENCIA_ACTIVA = os.getenv("COALESCENCIA_ACTIVA", "true").lower() in ("1", "true", "yes")
+
+class VueloUnico:
+    """Una ejecución en curso por clave; se usa siempre desde el event loop del worker"""
+
+    def __init__(self, nombre: str, timeout: float = COALESCENCIA_TIMEOUT_SEGUNDOS):
+        self.nombre = nombre
+        self.timeout = timeout
+        self._en_curso: Dict[Hashable, asyncio.Future] = {}
+        self.lideres = 0
+        self.seguidores = 0
+        self.timeouts = 0
+
+    async def ejecutar(self, clave: Hashable, funcion: Callable[[], Any]) -> Any:
+        # Con la versión de datos en la clave, quien llega después de una
+        # escritura no se suma a un cálculo que empezó antes y leería datos viejos
+        if not COALESCENCIA_ACTIVA:
+            self.lideres += 1
+            return await run_in_threadpool(funcion)
+        clave = (clave, eventos.version_datos())
+        return await self._ejecutar(clave, funcion, esperar=True)
+
+    async def _ejecutar(self, clave: Hashable, funcion: Callable[[], Any], esperar: bool, descartado=None) -> Any:
+        vuelo = self._en_curso.get(clave)
+        if vuelo is not None and esperar and vuelo is not descartado:
+            self.seguidores += 1
+            try:
+                # shield: que el timeout de un seguidor no cancele el vuelo de los demás
+                return await asyncio.wait_for(asyncio.shield(vuelo), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self.seguidores -= 1  # se cuenta de nuevo en el vuelo al que se sume o que lidere
+                if self._en_curso.get(clave) is vuelo:
+                    # Los que lleguen después arrancan un vuelo nuevo en vez de sumarse a este
+                    del self._en_curso[clave]
+                # El primero en desprenderse lidera el vuelo nuevo y el resto se suma
+                return await self._ejecutar(clave, funcion, esperar=True, descartado=vuelo)
+            except asyncio.CancelledError:
+                if not vuelo.cancelled():
+                    raise  # cancelaron a este seguidor, no al líder
+                self.seguidores -= 1
+                return await self._ejecutar(clave, funcion, esperar=False)
+
+        vuelo = asyncio.get_running_loop().create_future()
+        # Si nadie lo espera, que una excepción no quede como "never retrieved"
+        vuelo.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._en_curso[clave] = vuelo
+        self.lideres += 1
+        try:
+            resultado = await run_in_threadpool(funcion)
+        except asyncio.CancelledError:
+            vuelo.cancel()
+            raise
+        except BaseException as e:
+            vuelo.set_exception(e)
+            raise
+        else:
+            vuelo.set_result(resultado)
+            return resultado
+        finally:
+            if self._en_curso.get(clave) is vuelo:
+                del self._en_curso[clave]
+
+    def estadisticas(self) -> dict:
+        total = self.lideres + self.seguidores
+        return {
+            "ejecuciones": self.lideres,
+            "coalescidos": self.seguidores,
+            "ratio_coalescencia": round(self.seguidores / total, 3) if total else None,
+            "timeouts": self.timeouts,
+            "en_curso": len(self._en_curso),
+            "timeout_segundos": self.timeout,
+        }
+
+# Un registro por familia de endpoints, para ver el ratio de cada una
+vuelos: Dict[str, VueloUnico] = {}
+
+def vuelo(nombre: str) -> VueloUnico:
+    if nombre not in vuelos:
+        vuelos[nombre] = VueloUnico(nombre)
+    return vuelos[nombre]
+
+def estadisticas() -> dict:
+    return {nombre: v.estadisticas() for nombre, v in vuelos.items()}
@@ -0,0 +1,294 @@
+"""
+🐢 Registro de consultas lentas
+Hooks de SQLAlchemy en cada engine (app.database y la réplica) que miden
+cada sentencia. Por debajo de CONSULTAS_LENTAS_MS el costo es tomar la hora
+dos veces; por encima se registra, agrupado por SQL normalizado (literales y
+listas IN como ?):
+- forma de los parámetros (tipos, nunca valores) y rutas que la ejecutaron
+- cantidad, tiempo total y máximo
+- el plan (EXPLAIN en PostgreSQL, EXPLAIN QUERY PLAN en SQLite) de la peor
+  ejecución; con probabilidad CONSULTAS_LENTAS_ANALYZE un SELECT se vuelve a
+  correr con EXPLAIN ANALYZE para ver tiempos reales
+
+Cada worker guarda hasta CONSULTAS_LENTAS_MAX sentencias (se descarta la de
+menor tiempo total) y las publica en CONSULTAS_LENTAS_DIR; GET
+/api/admin/consultas-lentas junta las de todos los workers, también las de
+workers ya reciclados.
+"""
+
+import contextvars
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+CONSULTAS_LENTAS_ACTIVO = os.getenv("CONSULTAS_LENTAS_ACTIVO", "true").lower() in ("1", "true", "yes")
+CONSULTAS_LENTAS_MS = float(os.getenv("CONSULTAS_LENTAS_MS", "200"))
+CONSULTAS_LENTAS_MAX = int(os.getenv("CONSULTAS_LENTAS_MAX", "200"))
+CONSULTAS_LENTAS_EXPLAIN = os.getenv("CONSULTAS_LENTAS_EXPLAIN", "true").lower() in ("1", "true", "yes")
+# Fracción de SELECT lentos que se repiten con EXPLAIN ANALYZE (solo PostgreSQL)
+CONSULTAS_LENTAS_ANALYZE = float(os.getenv("CONSULTAS_LENTAS_ANALYZE", "0.05"))
+CONSULTAS_LENTAS_DIR = os.getenv("CONSULTAS_LENTAS_DIR", os.path.join(tempfile.gettempdir(), "indicadores-consultas-lentas"))
+CONSULTAS_LENTAS_PUBLICAR_SEGUNDOS = float(os.getenv("CONSULTAS_LENTAS_PUBLICAR_SEGUNDOS", "5"))
+# Archivos de workers que ya no existen se descartan pasado este tiempo
+CONSULTAS_LENTAS_RETENCION_HORAS = float(os.getenv("CONSULTAS_LENTAS_RETENCION_HORAS", "24"))
+
+_MAX_SQL = 4000
+_MAX_PARAMETROS = 12
+_EXPLICABLES = ("select", "with", "insert", "update", "delete")
+
+_TEXTOS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAMETROS = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\?")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+
+# Scope ASGI del request en curso: la ruta se lee recién al registrar (el
+# router la agrega al scope después de que pasa el middleware)
+_scope_actual: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("consulta_scope", default=None)
+
+_lock = threading.Lock()
+_consultas: Dict[str, dict] = {}
+_ultimo_publicado = 0.0
+# Marca en CONSULTAS_LENTAS_DIR que deja `limpiar`: cada worker vacía lo suyo al verla
+_REINICIO = "reinicio"
+_reinicio_visto = time.time()
+
+def normalizar(sql: str) -> str:
+    """SQL sin valores: literales y parámetros como ?, listas IN como (?...), espacios simples"""
+    sql = _TEXTOS.sub("?", sql)
+    sql = _NUMEROS.sub("?", sql)
+    sql = _PARAMETROS.sub("?", sql)
+    sql = _LISTAS.sub("(?...)", sql)
+    return _ESPACIOS.sub(" ", sql).strip()[:_MAX_SQL]
+
+def forma_parametros(parametros, executemany: bool = False) -> str:
+    """Tipos de los parámetros, sin sus valores"""
+    if executemany:
+        primeros = parametros[0] if parametros else ()
+        return f"executemany x{len(parametros)}: {forma_parametros(primeros)}"
+    if isinstance(parametros, dict):
+        partes = [f"{nombre}: {type(valor).__name__}" for nombre, valor in parametros.items()]
+    else:
+        partes = [type(valor).__name__ for valor in (parametros or ())]
+    if len(partes) > _MAX_PARAMETROS:
+        partes = partes[:_MAX_PARAMETROS] + [f"… (+{len(partes) - _MAX_PARAMETROS})"]
+    return ", ".join(partes)
+
+def _ruta() -> str:
+    scope = _scope_actual.get()
+    if scope is None:
+        return f"(hilo {threading.current_thread().name})"
+    ruta = scope.get("route")
+    return f"{scope.get('method', '')} {getattr(ruta, 'path', None) or scope.get('path', '')}"
+
+def explicar(conn, statement: str, parametros, analizar: bool) -> Optional[str]:
+    """Plan de la sentencia en la misma conexión; en PostgreSQL dentro de un savepoint"""
+    postgres = conn.dialect.name == "postgresql"
+    if postgres:
+        prefijo = "EXPLAIN (ANALYZE, BUFFERS) " if analizar else "EXPLAIN "
+    elif conn.dialect.name == "sqlite":
+        prefijo = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if postgres:
+            cursor.execute("SAVEPOINT consulta_lenta")
+        try:
+            cursor.execute(prefijo + statement, parametros)
+            filas = cursor.fetchall()
+        except Exception as e:
+            return f"(sin plan: {e})"
+        finally:
+            if postgres:
+                # También deshace lo que haya escrito un EXPLAIN ANALYZE
+                cursor.execute("ROLLBACK TO SAVEPOINT consulta_lenta")
+                cursor.execute("RELEASE SAVEPOINT consulta_lenta")
+        if postgres:
+            return "\n".join(fila[0] for fila in filas)
+        # SQLite: (id, padre, no usado, detalle) -> árbol indentado
+        niveles, lineas = {0: -1}, []
+        for id_, padre, _, detalle in filas:
+            niveles[id_] = niveles.get(padre, -1) + 1
+            lineas.append("  " * niveles[id_] + detalle)
+        return "\n".join(lineas) or None
+    finally:
+        cursor.close()
+
+def _registrar(conn, statement: str, parametros, executemany: bool, duracion_ms: float):
+    sql = normalizar(statement)
+    ruta = _ruta()
+    with _lock:
+        entrada = _consultas.get(sql)
+        nueva = entrada is None
+        if nueva:
+            if len(_consultas) >= CONSULTAS_LENTAS_MAX:
+                del _consultas[min(_consultas, key=lambda k: _consultas[k]["total_ms"])]
+            entrada = _consultas[sql] = {
+                "sql": sql, "parametros": forma_parametros(parametros, executemany),
+                "cantidad": 0, "total_ms": 0.0, "max_ms": 0.0, "ultima": 0.0, "rutas": {},
+                "plan": None, "plan_analyze": False, "plan_ms": None,
+            }
+        peor = duracion_ms > entrada["max_ms"]
+        entrada["cantidad"] += 1
+        entrada["total_ms"] += duracion_ms
+        entrada["max_ms"] = max(entrada["max_ms"], duracion_ms)
+        entrada["ultima"] = time.time()
+        entrada["rutas"][ruta] = entrada["rutas"].get(ruta, 0) + 1
+
+    explicable = not executemany and statement.lstrip()[:6].lower().startswith(_EXPLICABLES)
+    if CONSULTAS_LENTAS_EXPLAIN and explicable:
+        analizar = (
+            conn.dialect.name == "postgresql" and CONSULTAS_LENTAS_ANALYZE > 0
+            and statement.lstrip()[:6].lower().startswith(("select", "with"))
+            and random.random() < CONSULTAS_LENTAS_ANALYZE
+        )
+        if nueva or peor or (analizar and not entrada["plan_analyze"]):
+            try:
+                plan = explicar(conn, statement, parametros, analizar)
+            except Exception as e:
+                plan = f"(sin plan: {e})"
+            with _lock:
+                entrada.update(plan=plan, plan_analyze=analizar, plan_ms=round(duracion_ms, 1))
+    if time.monotonic() - _ultimo_publicado > CONSULTAS_LENTAS_PUBLICAR_SEGUNDOS:
+        publicar()
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_consulta = time.perf_counter()
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_consulta", None)
+    if inicio is None:
+        return
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+    if duracion_ms < CONSULTAS_LENTAS_MS:
+        return
+    try:
+        _registrar(conn, statement, parameters, executemany, duracion_ms)
+    except Exception as e:
+        print(f"⚠️ No se pudo registrar una consulta lenta: {e}")
+
+def instrumentar(engine):
+    """Engancha la medición al engine (una vez; no hace nada si está desactivado)"""
+    if CONSULTAS_LENTAS_ACTIVO and not event.contains(engine, "after_cursor_execute", _despues):
+        event.listen(engine, "before_cursor_execute", _antes)
+        event.listen(engine, "after_cursor_execute", _despues)
+    return engine
+
+class RutaConsultasMiddleware:
+    """Deja el scope del request a mano para saber qué ruta ejecutó cada consulta lenta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _scope_actual.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _scope_actual.reset(token)
+
+def publicar():
+    """Escribe las consultas de este worker (reemplazo atómico del archivo)"""
+    global _ultimo_publicado, _reinicio_visto
+    _ultimo_publicado = time.monotonic()
+    try:
+        reinicio = os.path.getmtime(os.path.join(CONSULTAS_LENTAS_DIR, _REINICIO))
+    except OSError:
+        reinicio = 0.0
+    with _lock:
+        if reinicio > _reinicio_visto:
+            _reinicio_visto = reinicio
+            _consultas.clear()
+        if not _consultas:
+            return
+        contenido = json.dumps(list(_consultas.values()))
+    try:
+        os.makedirs(CONSULTAS_LENTAS_DIR, exist_ok=True)
+        ruta = os.path.join(CONSULTAS_LENTAS_DIR, f"{os.getpid()}.json")
+        with open(ruta + ".tmp", "w") as archivo:
+            archivo.write(contenido)
+        os.replace(ruta + ".tmp", ruta)
+    except OSError:
+        pass
+
+def _combinar(destino: Dict[str, dict], entrada: dict):
+    actual = destino.get(entrada["sql"])
+    if actual is None:
+        destino[entrada["sql"]] = {**entrada, "rutas": dict(entrada["rutas"])}
+        return
+    # El plan que queda es el de la peor ejecución
+    if entrada["max_ms"] > actual["max_ms"] and entrada["plan"] is not None:
+        actual.update(plan=entrada["plan"], plan_analyze=entrada["plan_analyze"], plan_ms=entrada["plan_ms"])
+    actual["cantidad"] += entrada["cantidad"]
+    actual["total_ms"] += entrada["total_ms"]
+    actual["max_ms"] = max(actual["max_ms"], entrada["max_ms"])
+    actual["ultima"] = max(actual["ultima"], entrada["ultima"])
+    for ruta, veces in entrada["rutas"].items():
+        actual["rutas"][ruta] = actual["rutas"].get(ruta, 0) + veces
+
+def leer_todas() -> tuple:
+    """(consultas combinadas de todos los workers, cantidad de workers que aportaron)"""
+    publicar()
+    combinadas: Dict[str, dict] = {}
+    workers = 0
+    vencimiento = time.time() - CONSULTAS_LENTAS_RETENCION_HORAS * 3600
+    try:
+        nombres = os.listdir(CONSULTAS_LENTAS_DIR)
+    except OSError:
+        nombres = []
+    for nombre in nombres:
+        if not nombre.endswith(".json"):
+            continue
+        ruta = os.path.join(CONSULTAS_LENTAS_DIR, nombre)
+        try:
+            if os.path.getmtime(ruta) < vencimiento:
+                os.remove(ruta)
+                continue
+            with open(ruta) as archivo:
+                entradas = json.load(archivo)
+        except (OSError, ValueError):
+            continue
+        workers += 1
+        for entrada in entradas:
+            _combinar(combinadas, entrada)
+    return list(combinadas.values()), workers
+
+ORDENES = {"total": "total_ms", "cantidad": "cantidad", "max": "max_ms", "promedio": "promedio_ms"}
+
+def top(orden: str = "total", limite: int = 20) -> tuple:
+    """(las `limite` consultas con mayor `orden`, cantidad de workers que aportaron)"""
+    consultas, workers = leer_todas()
+    for consulta in consultas:
+        consulta["promedio_ms"] = round(consulta["total_ms"] / consulta["cantidad"], 1)
+        consulta["total_ms"] = round(consulta["total_ms"], 1)
+        consulta["max_ms"] = round(consulta["max_ms"], 1)
+        consulta["rutas"] = dict(sorted(consulta["rutas"].items(), key=lambda r: -r[1]))
+    consultas.sort(key=lambda c: c[ORDENES[orden]], reverse=True)
+    return consultas[:limite], workers
+
+def limpiar():
+    """Vacía el registro de todos los workers (los demás lo hacen en su próxima publicación)"""
+    global _reinicio_visto
+    try:
+        os.makedirs(CONSULTAS_LENTAS_DIR, exist_ok=True)
+        with open(os.path.join(CONSULTAS_LENTAS_DIR, _REINICIO), "w") as archivo:
+            archivo.write(str(time.time()))
+        for nombre in os.listdir(CONSULTAS_LENTAS_DIR):
+            if nombre.endswith(".json"):
+                os.remove(os.path.join(CONSULTAS_LENTAS_DIR, nombre))
+        _reinicio_visto = os.path.getmtime(os.path.join(CONSULTAS_LENTAS_DIR, _REINICIO))
+    except OSError:
+        pass
+    with _lock:
+        _consultas.clear()
@@ -1,17 +1,124 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import os
+import time
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import delete, func, select
 from ..models.indicador import Indicador, Hito
+from ..models.dimensiones import ComparadorDimension
 from ..schemas.indicador import IndicadorCreate, IndicadorUpdate, HitoCreate
+from .. import cambios, eventos
+
+# Borrado en bloque (borrar_indicadores): filas por transacción, así ninguna
+# retiene los locks de las tablas más de lo que dura un lote
+BORRADO_LOTE = int(os.getenv("BORRADO_LOTE", "200"))
+BORRADO_LOTE_HITOS = int(os.getenv("BORRADO_LOTE_HITOS", "5000"))
+BORRADO_PAUSA_SEGUNDOS = float(os.getenv("BORRADO_PAUSA_SEGUNDOS", "0"))
 
 def get_indicador(db: Session, indicador_id: int):
     return db.query(Indicador).filter(Indicador.id == indicador_id).first()
 
 def get_indicadores(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Indicador).offset(skip).limit(limit).all()
+    # Orden por id: páginas estables (sin ORDER BY PostgreSQL no garantiza el orden)
+    return db.query(Indicador).order_by(Indicador.id).offset(skip).limit(limit).all()
+
+def contar_indicadores(db: Session) -> int:
+    return db.query(func.count(Indicador.id)).scalar()
 
 def get_indicadores_by_area(db: Session, area: str):
     return db.query(Indicador).filter(Indicador.area == area).all()
 
+# Columnas proyectables con ?fields= (nombre público -> columna SQL)
+CAMPOS_INDICADOR = {
+    "id": Indicador.id,
+    "vp": Indicador.vp,
+    "area": Indicador.area,
+    "nombreIndicador": Indicador.nombreIndicador,
+    "tipoIndicador": Indicador.tipoIndicador,
+    "fechaInicioGeneral": Indicador.fechaInicioGeneral,
+    "fechaFinalizacionGeneral": Indicador.fechaFinalizacionGeneral,
+    "responsableGeneral": Indicador.responsableGeneral,
+    "responsableCargaGeneral": Indicador.responsableCargaGeneral,
+    "created_at": Indicador.created_at,
+    "updated_at": Indicador.updated_at,
+}
+
+CAMPOS_HITO = {
+    "id": Hito.id,
+    "idHito": Hito.id,  # Compatibilidad con frontend
+    "indicador_id": Hito.indicador_id,
+    "nombreHito": Hito.nombreHito,
+    "fechaInicioHito": Hito.fechaInicioHito,
+    "fechaFinalizacionHito": Hito.fechaFinalizacionHito,
+    "avanceHito": Hito.avanceHito,
+    "estadoHito": Hito.estadoHito,
+    "responsableHito": Hito.responsableHito,
+    "created_at": Hito.created_at,
+    "updated_at": Hito.updated_at,
+}
+
+def parsear_campos(fields: str):
+    """Convierte 'vp,area,hitos.nombreHito' en (campos_indicador, campos_hito).
+
+    'hitos' sin sufijo selecciona todos los campos del hito. El id del
+    indicador siempre se incluye. Lanza ValueError con campos desconocidos.
+    """
+    campos_indicador = ["id"]
+    campos_hito = []
+    for campo in (c.strip() for c in fields.split(",")):
+        if not campo:
+            continue
+        if campo == "hitos":
+            destino, nombre, permitidos = campos_hito, None, CAMPOS_HITO
+        elif campo.startswith("hitos."):
+            destino, nombre, permitidos = campos_hito, campo[len("hitos."):], CAMPOS_HITO
+        else:
+            destino, nombre, permitidos = campos_indicador, campo, CAMPOS_INDICADOR
+        if nombre is None:
+            destino.extend(c for c in CAMPOS_HITO if c not in destino)
+        elif nombre not in permitidos:
+            raise ValueError(f"Campo desconocido: {campo}")
+        elif nombre not in destino:
+            destino.append(nombre)
+    return campos_indicador, campos_hito
+
+def _valor_json(valor):
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+def get_indicadores_proyectados(db: Session, campos_indicador, campos_hito, skip: int = 0, limit: int = 100, area: str = None, indicador_id: int = None):
+    """Lee solo las columnas pedidas como filas planas, sin hidratar entidades ORM.
+
+    Los hitos se consultan en una segunda sentencia acotada a los ids
+    devueltos, y solo si se pidió algún campo de hito.
+    """
+    query = select(*[CAMPOS_INDICADOR[c].label(c) for c in campos_indicador])
+    if indicador_id is not None:
+        query = query.where(Indicador.id == indicador_id)
+    if area is not None:
+        query = query.where(Indicador.area == area)
+    else:
+        query = query.order_by(Indicador.id).offset(skip).limit(limit)
+
+    data = [
+        {campo: _valor_json(valor) for campo, valor in fila._mapping.items()}
+        for fila in db.execute(query)
+    ]
+    if not campos_hito or not data:
+        return data
+
+    por_indicador = {indicador["id"]: indicador for indicador in data}
+    for indicador in data:
+        indicador["hitos"] = []
+    query_hitos = (
+        select(Hito.indicador_id.label("_indicador_id"), *[CAMPOS_HITO[c].label(c) for c in campos_hito])
+        .where(Hito.indicador_id.in_(list(por_indicador)))
+        .order_by(Hito.indicador_id, Hito.id)
+    )
+    for fila in db.execute(query_hitos):
+        valores = fila._mapping
+        por_indicador[valores["_indicador_id"]]["hitos"].append(
+            {campo: _valor_json(valores[campo]) for campo in campos_hito}
+        )
+    return data
+
 def create_indicador(db: Session, indicador: IndicadorCreate):
     db_indicador = Indicador(
         vp=indicador.vp,
@@ -40,6 +147,7 @@ def create_indicador(db: Session, indicador: IndicadorCreate):
 
     db.commit()
     db.refresh(db_indicador)
+    eventos.notificar_escritura([db_indicador.id], [db_indicador.area])
     return db_indicador
 
 def update_indicador(db: Session, indicador_id: int, indicador: IndicadorUpdate):
@@ -47,36 +155,150 @@ def update_indicador(db: Session, indicador_id: int, indicador: IndicadorUpdate)
     if not db_indicador:
         return None
 
+    area_anterior = db_indicador.area
     update_data = indicador.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_indicador, field, value)
 
     db.commit()
     db.refresh(db_indicador)
+    eventos.notificar_escritura([indicador_id], [area_anterior, db_indicador.area])
     return db_indicador
 
 def delete_indicador(db: Session, indicador_id: int):
-    db_indicador = get_indicador(db, indicador_id)
-    if not db_indicador:
+    # Sin cargar el indicador ni sus hitos: un DELETE y la BD borra los hitos (ON DELETE CASCADE)
+    cambios.bloquear(db)
+    area = db.execute(select(Indicador.area).where(Indicador.id == indicador_id)).first()
+    if area is None:
+        db.rollback()
         return None
 
-    db.delete(db_indicador)
+    indicadores = Indicador.__table__
+    db.execute(delete(indicadores).where(indicadores.c.id == indicador_id))
+    cambios.registrar(db, [indicador_id], borrado=True)
     db.commit()
-    return db_indicador
+    eventos.notificar_escritura([indicador_id], [area[0]])
+    return indicador_id
+
+def borrar_indicadores(db: Session, vp: str = None, area: str = None, ids=None) -> int:
+    """Borra los indicadores que cumplen todos los filtros (todos si no hay) y sus hitos.
+
+    Solo sentencias por conjunto y en transacciones cortas: los hitos de a
+    BORRADO_LOTE_HITOS y después los indicadores de a BORRADO_LOTE (lo que
+    se haya agregado entre medio lo borra ON DELETE CASCADE). Devuelve cuántos
+    indicadores borró.
+    """
+    condiciones = []
+    if vp is not None:
+        condiciones.append(Indicador.vp == vp)
+    if area is not None:
+        condiciones.append(Indicador.area == area)
+    if ids is not None:
+        condiciones.append(Indicador.id.in_(ids))
+
+    indicadores, hitos = Indicador.__table__, Hito.__table__
+    total = 0
+    while True:
+        lote_ids = db.execute(
+            select(Indicador.id).where(*condiciones).order_by(Indicador.id).limit(BORRADO_LOTE)
+        ).scalars().all()
+        if not lote_ids:
+            db.rollback()
+            return total
+
+        while True:
+            cambios.bloquear(db)
+            # Claves primero y DELETE por clave: con `id IN (SELECT ... LIMIT)` PostgreSQL
+            # puede elegir un plan que repite la subconsulta por fila
+            lote = db.execute(
+                select(hitos.c.id, hitos.c.indicador_id).where(hitos.c.indicador_id.in_(lote_ids)).limit(BORRADO_LOTE_HITOS)
+            ).all()
+            if lote:
+                db.execute(delete(hitos).where(hitos.c.id.in_([hito_id for hito_id, _ in lote])))
+                # Si el borrado se corta a mitad, los clientes sincronizados recargan esos indicadores
+                cambios.registrar(db, {indicador_id for _, indicador_id in lote})
+            db.commit()
+            if len(lote) < BORRADO_LOTE_HITOS:
+                break
+
+        cambios.bloquear(db)
+        areas = set(db.execute(select(Indicador.area).where(Indicador.id.in_(lote_ids))).scalars())
+        db.execute(delete(indicadores).where(indicadores.c.id.in_(lote_ids)))
+        cambios.registrar(db, lote_ids, borrado=True)
+        db.commit()
+        eventos.notificar_escritura(lote_ids, areas)
+        total += len(lote_ids)
+        if len(lote_ids) < BORRADO_LOTE:
+            return total
+        time.sleep(BORRADO_PAUSA_SEGUNDOS)
+
+def _clave_dimension(atributo):
+    """(columna_fk, modelo_dim) si el atributo está normalizado, si no None"""
+    comparador = getattr(atributo, "comparator", None)
+    if isinstance(comparador, ComparadorDimension):
+        return comparador.columna_fk, comparador.modelo_dim
+    return None
+
+def _conteos(db: Session, modelo, *columnas):
+    """SELECT columnas, count(*) ... GROUP BY columnas, ignorando nulos.
+
+    En el esquema normalizado agrupa por la clave entera y une la tabla
+    de lookup solo para obtener el nombre.
+    """
+    seleccion, agrupacion, filtros, uniones = [], [], [], []
+    for columna in columnas:
+        dimension = _clave_dimension(columna)
+        if dimension:
+            columna_fk, modelo_dim = dimension
+            dim = aliased(modelo_dim)
+            uniones.append((dim, dim.id == columna_fk))
+            seleccion.append(dim.nombre)
+            agrupacion += [columna_fk, dim.nombre]
+        else:
+            seleccion.append(columna)
+            agrupacion.append(columna)
+            filtros.append(columna.isnot(None))
+    query = select(*seleccion, func.count().label("total")).select_from(modelo).where(*filtros)
+    for dim, condicion in uniones:
+        query = query.join(dim, condicion)
+    return db.execute(query.group_by(*agrupacion).order_by(*seleccion)).all()
+
+def get_dimensiones(db: Session):
+    """Valores distintos con conteo para los filtros: vps, áreas por vp, responsables y estados"""
+    areas_por_vp = {}
+    for vp, area, total in _conteos(db, Indicador, Indicador.vp, Indicador.area):
+        areas_por_vp.setdefault(vp, []).append({"valor": area, "total": total})
+    return {
+        "vps": [{"valor": vp, "total": total} for vp, total in _conteos(db, Indicador, Indicador.vp)],
+        "areas": areas_por_vp,
+        "responsables": [{"valor": r, "total": total} for r, total in _conteos(db, Hito, Hito.responsableHito)],
+        "estados": [{"valor": e, "total": total} for e, total in _conteos(db, Hito, Hito.estadoHito)],
+    }
 
 def get_estadisticas(db: Session):
     total_indicadores = db.query(func.count(Indicador.id)).scalar()
-    total_hitos = db.query(func.count(Hito.id)).scalar()
-    hitos_completados = db.query(func.count(Hito.id)).filter(Hito.estadoHito == "Completado").scalar()
-    hitos_en_progreso = db.query(func.count(Hito.id)).filter(Hito.estadoHito == "En Progreso").scalar()
-    hitos_por_comenzar = db.query(func.count(Hito.id)).filter(Hito.estadoHito == "Por Comenzar").scalar()
-    promedio_avance = db.query(func.avg(Hito.avanceHito)).scalar() or 0
+
+    # Un solo recorrido de hitos agrupado por estado (clave entera si está normalizado)
+    dimension = _clave_dimension(Hito.estadoHito)
+    clave = dimension[0] if dimension else Hito.estadoHito
+    filas = db.execute(
+        # count(*) y no count(id): así el índice (estado, avanceHito) cubre la consulta
+        select(clave, func.count(), func.sum(Hito.avanceHito), func.count(Hito.avanceHito))
+        .group_by(clave)
+    ).all()
+    nombres = dict(db.execute(select(dimension[1].id, dimension[1].nombre)).all()) if dimension else {}
+    por_estado = {nombres.get(estado, estado): total for estado, total, _, _ in filas}
+
+    total_hitos = sum(total for _, total, _, _ in filas)
+    suma_avance = sum(suma or 0 for _, _, suma, _ in filas)
+    con_avance = sum(cantidad for _, _, _, cantidad in filas)
+    promedio_avance = suma_avance / con_avance if con_avance else 0
 
     return {
         "totalIndicadores": total_indicadores,
         "totalHitos": total_hitos,
-        "hitosCompletados": hitos_completados,
-        "hitosEnProgreso": hitos_en_progreso,
-        "hitosPorComenzar": hitos_por_comenzar,
+        "hitosCompletados": por_estado.get("Completado", 0),
+        "hitosEnProgreso": por_estado.get("En Progreso", 0),
+        "hitosPorComenzar": por_estado.get("Por Comenzar", 0),
         "promedioAvance": round(promedio_avance, 2)
     } 
\ No newline at end of file
@@ -0,0 +1,44 @@
+from sqlalchemy.orm import Session
+from ..models.usuario import Usuario
+from .. import eventos
+
+def get_usuario(db: Session, username: str):
+    return db.query(Usuario).filter(Usuario.username == username).first()
+
+def get_usuarios(db: Session):
+    return db.query(Usuario).order_by(Usuario.username).all()
+
+def create_usuario(db: Session, username: str, hashed_password: str, email: str = None, full_name: str = None):
+    db_usuario = Usuario(
+        username=username,
+        hashed_password=hashed_password,
+        email=email,
+        full_name=full_name,
+        disabled=False,
+    )
+    db.add(db_usuario)
+    db.commit()
+    db.refresh(db_usuario)
+    eventos.notificar_cambio_usuario(username)
+    return db_usuario
+
+def update_usuario(db: Session, username: str, **cambios):
+    """Actualiza campos del usuario (email, full_name, hashed_password, disabled)"""
+    db_usuario = get_usuario(db, username)
+    if db_usuario is None:
+        return None
+    for campo, valor in cambios.items():
+        setattr(db_usuario, campo, valor)
+    db.commit()
+    db.refresh(db_usuario)
+    eventos.notificar_cambio_usuario(username)
+    return db_usuario
+
+def delete_usuario(db: Session, username: str):
+    db_usuario = get_usuario(db, username)
+    if db_usuario is None:
+        return None
+    db.delete(db_usuario)
+    db.commit()
+    eventos.notificar_cambio_usuario(username)
+    return db_usuario
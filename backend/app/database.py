@@ -1,40 +1,79 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import threading
 from dotenv import load_dotenv
+from .consultas_lentas import instrumentar
 
 load_dotenv()
 
 # Configuración simplificada para Railway
 DATABASE_URL = os.getenv("DATABASE_URL")
+USANDO_SQLITE_LOCAL = not DATABASE_URL
 
 if DATABASE_URL:
-    # Railway o producción con DATABASE_URL
-    print(f"✅ Usando DATABASE_URL: {DATABASE_URL[:50]}...")
-    
     # Convertir postgres:// a postgresql:// si es necesario
     if DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-        print("🔄 Convertido postgres:// a postgresql://")
-    
-    # Configuración para Railway PostgreSQL
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True,
-        pool_recycle=300
-    )
-    
 else:
     # Desarrollo local - usar SQLite como fallback
-    print("⚠️ DATABASE_URL no encontrada, usando SQLite para desarrollo")
     DATABASE_URL = "sqlite:///./indicadores.db"
+
+# El engine se crea en el primer uso y no al importar: importar la app (o
+# alembic, o un script) no abre conexiones
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _crear_engine()
+    return _engine
+
+def _pragma_claves_foraneas(conexion_dbapi, registro):
+    cursor = conexion_dbapi.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def activar_claves_foraneas(engine):
+    """SQLite no aplica las claves foráneas (ni ON DELETE CASCADE) sin un pragma por conexión"""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _pragma_claves_foraneas)
+    return engine
+
+def _crear_engine():
+    if USANDO_SQLITE_LOCAL:
+        print("⚠️ DATABASE_URL no encontrada, usando SQLite para desarrollo")
+        return instrumentar(activar_claves_foraneas(create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False}
+        )))
+
+    # Railway o producción con DATABASE_URL
     engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False}
+        DATABASE_URL,
+        pool_pre_ping=True,
+        pool_recycle=300
     )
+    print(f"✅ Usando DATABASE_URL: {engine.url.render_as_string(hide_password=True)[:50]}...")
+    # Mide cada sentencia y registra las lentas con su plan (app.consultas_lentas)
+    return instrumentar(activar_claves_foraneas(engine))
+
+def __getattr__(nombre):
+    # Compatibilidad con `from app.database import engine`
+    if nombre == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+_fabrica_sesiones = sessionmaker(autocommit=False, autoflush=False)
+
+def SessionLocal():
+    """Nueva sesión sobre el engine (creándolo si hace falta)"""
+    return _fabrica_sesiones(bind=get_engine())
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 def get_db():
@@ -42,4 +81,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -0,0 +1,52 @@
+"""
+📣 Notificación de escrituras
+Versión de datos por proceso y suscriptores para invalidar lo derivado de la BD
+(indicadores y usuarios)
+"""
+
+import threading
+from typing import Callable, Iterable, List
+
+_lock = threading.Lock()
+_version = 0
+_suscriptores: List[Callable] = []
+_suscriptores_usuarios: List[Callable] = []
+
+def version_datos() -> int:
+    """Versión actual de los datos; cambia en cada escritura notificada"""
+    return _version
+
+def suscribir(callback: Callable):
+    """Registra callback(indicador_ids: set, areas: set) que se invoca tras cada escritura"""
+    with _lock:
+        if callback not in _suscriptores:
+            _suscriptores.append(callback)
+    return callback
+
+def notificar_escritura(indicador_ids: Iterable[int] = (), areas: Iterable[str] = ()):
+    """Incrementa la versión y avisa a los suscriptores (llamar después del commit).
+
+    Sin ids ni áreas se interpreta como un cambio masivo que afecta a todo.
+    """
+    global _version
+    ids = {i for i in indicador_ids if i is not None}
+    areas = {a for a in areas if a is not None}
+    with _lock:
+        _version += 1
+        suscriptores = list(_suscriptores)
+    for callback in suscriptores:
+        callback(ids, areas)
+
+def suscribir_usuarios(callback: Callable):
+    """Registra callback(username) que se invoca cuando cambia o se deshabilita un usuario"""
+    with _lock:
+        if callback not in _suscriptores_usuarios:
+            _suscriptores_usuarios.append(callback)
+    return callback
+
+def notificar_cambio_usuario(username: str):
+    """Avisa que los datos del usuario cambiaron (llamar después del commit)"""
+    with _lock:
+        suscriptores = list(_suscriptores_usuarios)
+    for callback in suscriptores:
+        callback(username)
@@ -0,0 +1,204 @@
+"""
+📗 Lectura del Excel de indicadores (Base de datos.xlsx)
+Lee solo las columnas que usa la carga, con tipos fijos y las fechas
+convertidas en un solo paso vectorizado. El motor se elige con EXCEL_MOTOR:
+- calamine: lector nativo (paquete opcional `python-calamine`), el más rápido
+- openpyxl: modo streaming de solo lectura, sin armar el libro en memoria
+- pandas: `pd.read_excel` de siempre (referencia para comparar)
+Con "auto" (default) se usa calamine si está instalado y si no openpyxl.
+
+El resultado se guarda en EXCEL_CACHE_DIR con el hash del contenido del
+archivo como clave: volver a cargar el mismo Excel no lo parsea de nuevo.
+Es un pickle (cargarlo ejecuta código), así que solo se usa si el directorio
+es del usuario del proceso y nadie más puede escribir en él.
+"""
+
+import hashlib
+import os
+import stat
+import tempfile
+from datetime import datetime
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+EXCEL_MOTOR = os.getenv("EXCEL_MOTOR", "auto")
+EXCEL_CACHE = os.getenv("EXCEL_CACHE", "true").lower() in ("1", "true", "yes")
+# Con el uid en el nombre, otro usuario del sistema no puede crearlo antes y tomarlo
+_SUFIJO_USUARIO = f"-{os.getuid()}" if hasattr(os, "getuid") else ""
+EXCEL_CACHE_DIR = os.getenv("EXCEL_CACHE_DIR", os.path.join(tempfile.gettempdir(), f"indicadores-excel{_SUFIJO_USUARIO}"))
+
+COLUMNAS_TEXTO = ("VP", "Area", "Indicador", "Hito", "Tipo Indicador", "Estado", "Responsable", "Responsable de Carga")
+COLUMNAS_FECHA = ("Fecha de Inicio", "Fecha Finalizacion")
+COLUMNA_AVANCE = "Avance (%)"
+COLUMNAS = COLUMNAS_TEXTO + COLUMNAS_FECHA + (COLUMNA_AVANCE,)
+# Pocos valores distintos repetidos en miles de filas: como categoría ocupan
+# un entero por fila. "Indicador" y "Hito" quedan como texto (se agrupa por
+# Indicador y con categorías aparecerían grupos vacíos)
+COLUMNAS_CATEGORIA = ("VP", "Area", "Tipo Indicador", "Estado", "Responsable", "Responsable de Carga")
+
+# Una celda de fecha mal cargada en el Excel original aparece como
+# 1900-01-10 (el número 10 con formato de fecha): se corrige a fin de año
+FECHA_CORRECCION = "2025-12-31"
+# Fechas seriales de Excel: día 0 = 1899-12-30 (compensa el 29/02/1900 que Excel cree que existe)
+ORIGEN_EXCEL = "1899-12-30"
+# Cambia cuando cambia lo que devuelve leer_indicadores: invalida la caché en disco
+VERSION_FORMATO = 2
+
+def motores_disponibles() -> List[str]:
+    motores = []
+    try:
+        import python_calamine  # noqa: F401
+        motores.append("calamine")
+    except ImportError:
+        pass
+    return motores + ["openpyxl", "pandas"]
+
+def _elegir_motor(motor: Optional[str]) -> str:
+    motor = motor or EXCEL_MOTOR
+    if motor == "auto":
+        return motores_disponibles()[0]
+    if motor not in motores_disponibles():
+        raise ValueError(f"Motor de Excel no disponible: {motor} (disponibles: {', '.join(motores_disponibles())})")
+    return motor
+
+def _filas_calamine(ruta: str) -> Iterator[Sequence]:
+    from python_calamine import CalamineWorkbook
+
+    hoja = CalamineWorkbook.from_path(ruta).get_sheet_by_index(0)
+    return hoja.iter_rows()
+
+def _filas_openpyxl(ruta: str) -> Iterator[Sequence]:
+    from openpyxl import load_workbook
+
+    # read_only: las filas se leen del XML a medida que se recorren
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from libro.worksheets[0].iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+def _indices(cabecera: Sequence, ruta: str) -> List[int]:
+    nombres = [str(c).strip() if c is not None else "" for c in cabecera]
+    faltantes = [c for c in COLUMNAS if c not in nombres]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en {ruta}: {', '.join(faltantes)}")
+    return [nombres.index(c) for c in COLUMNAS]
+
+def _seleccionar(filas: Iterable[Sequence], ruta: str):
+    """Solo las columnas de COLUMNAS, sin filas vacías ("" y None son celda vacía)"""
+    import pandas as pd
+
+    filas = iter(filas)
+    indices = _indices(next(filas, ()), ruta)
+    # itemgetter arma la tupla en C; los valores repetidos (áreas, estados,
+    # responsables, fechas) se guardan una sola vez en vez de uno por celda
+    tomar = itemgetter(*indices)
+    ancho = max(indices) + 1
+    unicos = {}
+    unico = unicos.setdefault
+    datos = [
+        tuple(unico(v, v) for v in tomar(fila if len(fila) >= ancho else tuple(fila) + (None,) * ancho))
+        for fila in filas
+    ]
+    del unicos
+    df = pd.DataFrame.from_records(datos, columns=list(COLUMNAS))
+    del datos
+    df = df.mask(df == "")
+    return df.dropna(how="all").reset_index(drop=True)
+
+def _leer_pandas(ruta: str):
+    import pandas as pd
+
+    return pd.read_excel(ruta, usecols=list(COLUMNAS), dtype={c: object for c in COLUMNAS_TEXTO})
+
+def _fechas(serie):
+    """Fechas de cualquier motor (datetime, date, texto o serial de Excel) a datetime64 de una vez"""
+    import pandas as pd
+
+    serie = serie.astype(object).where(serie.notna(), None)
+    seriales = pd.to_numeric(serie, errors="coerce")
+    fechas = pd.to_datetime(serie.where(seriales.isna(), None), errors="coerce")
+    if seriales.notna().any():
+        fechas = fechas.fillna(pd.to_datetime(seriales, unit="D", origin=ORIGEN_EXCEL))
+    return fechas
+
+def normalizar(df):
+    """Tipos fijos: texto como object o category (None si está vacío), fechas datetime64, avance int64"""
+    import pandas as pd
+
+    df = df[list(COLUMNAS)].copy()
+    for columna in COLUMNAS_TEXTO:
+        df[columna] = df[columna].astype(object).where(df[columna].notna(), None)
+        if columna in COLUMNAS_CATEGORIA:
+            df[columna] = df[columna].astype("category")
+    for columna in COLUMNAS_FECHA:
+        df[columna] = _fechas(df[columna])
+    df[COLUMNA_AVANCE] = pd.to_numeric(df[COLUMNA_AVANCE], errors="coerce").fillna(0).round().astype("int64")
+
+    fecha_problema = df["Fecha Finalizacion"].dt.year == 1900
+    if fecha_problema.any():
+        print(f"🔧 Detectada fecha problemática 1900 en {int(fecha_problema.sum())} fila(s), corrigiendo a {FECHA_CORRECCION}...")
+        df.loc[fecha_problema, "Fecha Finalizacion"] = pd.Timestamp(FECHA_CORRECCION)
+    return df
+
+def hash_archivo(ruta: str) -> str:
+    digest = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+def _directorio_cache() -> Optional[str]:
+    """EXCEL_CACHE_DIR (lo crea con 0700) si es un directorio propio y privado; si no, None"""
+    try:
+        os.makedirs(EXCEL_CACHE_DIR, mode=0o700, exist_ok=True)
+        info = os.lstat(EXCEL_CACHE_DIR)
+    except OSError as e:
+        print(f"⚠️ No se pudo crear la caché del Excel: {e}")
+        return None
+    # lstat: un symlink no cuenta como directorio. En Windows no hay uid; el temp ya es por usuario
+    privado = stat.S_ISDIR(info.st_mode) and (
+        not hasattr(os, "getuid") or (info.st_uid == os.getuid() and not info.st_mode & 0o077)
+    )
+    if not privado:
+        print(f"⚠️ {EXCEL_CACHE_DIR} no es un directorio privado del usuario: caché del Excel desactivada")
+        return None
+    return EXCEL_CACHE_DIR
+
+def _ruta_cache(ruta: str) -> Optional[str]:
+    directorio = _directorio_cache()
+    if directorio is None:
+        return None
+    return os.path.join(directorio, f"{hash_archivo(ruta)}-v{VERSION_FORMATO}.pkl")
+
+def leer_indicadores(ruta: str, motor: Optional[str] = None, usar_cache: bool = EXCEL_CACHE):
+    """DataFrame con COLUMNAS normalizadas; reutiliza el resultado si el contenido no cambió"""
+    import pandas as pd
+
+    cache = _ruta_cache(ruta) if usar_cache else None
+    if cache and os.path.exists(cache):
+        try:
+            df = pd.read_pickle(cache)
+            print(f"📗 Excel sin cambios desde la última lectura: {len(df)} filas desde la caché")
+            return df
+        except Exception as e:
+            print(f"⚠️ Caché del Excel ilegible ({e}); se vuelve a leer")
+
+    motor = _elegir_motor(motor)
+    inicio = datetime.now()
+    if motor == "pandas":
+        df = _leer_pandas(ruta)
+    else:
+        filas = _filas_calamine(ruta) if motor == "calamine" else _filas_openpyxl(ruta)
+        df = _seleccionar(filas, ruta)
+    df = normalizar(df)
+    print(f"📗 Excel leído con {motor}: {len(df)} filas en {(datetime.now() - inicio).total_seconds():.2f}s")
+
+    if cache:
+        try:
+            temporal = f"{cache}.{os.getpid()}.tmp"
+            df.to_pickle(temporal)
+            os.replace(temporal, cache)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché del Excel: {e}")
+    return df
@@ -0,0 +1,366 @@
+"""
+🧊 Instantánea compartida del listado y las estadísticas (opcional)
+Con INSTANTANEA=true un solo proceso refrescador a la vez serializa el
+listado completo, la primera página y las estadísticas (también en gzip) en
+un archivo versionado; todos los workers lo mapean en memoria (mmap) y
+responden desde ahí sin copiar. Las páginas del archivo son caché del sistema operativo
+compartida entre procesos, así que la memoria de cada worker no crece con
+los datos y un worker recién levantado responde sin consultar la BD.
+
+Un archivo `control` de 16 bytes, también mapeado, guarda la generación de
+los datos (sube con cada escritura, en cualquier worker) y la versión de
+instantánea publicada. Una instantánea solo se sirve si fue armada con la
+generación actual; si no, el request sigue por la caché de respuestas.
+"""
+
+import fcntl
+import gzip
+import json
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from starlette.responses import Response
+
+from . import eventos
+
+INSTANTANEA_ACTIVA = os.getenv("INSTANTANEA", "false").lower() in ("1", "true", "yes")
+# gunicorn.conf.py fija la sesión al pid del master: los workers de un mismo
+# arranque comparten directorio y uno nuevo no sirve lo de una BD anterior
+INSTANTANEA_SESION = os.getenv("INSTANTANEA_SESION", str(os.getpid()))
+INSTANTANEA_RAIZ = os.getenv("INSTANTANEA_DIR", os.path.join(tempfile.gettempdir(), "indicadores-instantanea"))
+INSTANTANEA_DIR = os.path.join(INSTANTANEA_RAIZ, INSTANTANEA_SESION)
+# Escrituras que no pasan por esta API (scripts, otro host) se recogen como
+# mucho tras este tiempo: pasado, se sigue sirviendo mientras se rearma
+INSTANTANEA_MAX_SEGUNDOS = float(os.getenv("INSTANTANEA_MAX_SEGUNDOS", "300"))
+# Espera antes de armarla tras una escritura, para que una ráfaga de
+# escrituras se junte en una sola reconstrucción
+INSTANTANEA_DEMORA_SEGUNDOS = float(os.getenv("INSTANTANEA_DEMORA_SEGUNDOS", "0.2"))
+# Página que pide el frontend (GET /api/indicadores/ sin limit)
+INSTANTANEA_PAGINA = int(os.getenv("INSTANTANEA_PAGINA", "100"))
+
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAGIA = b"INS1"
+_CONTROL = struct.Struct("<QQ")  # generación de los datos, versión publicada
+_LARGO_CABECERA = struct.Struct("<I")
+# Tras un error al armarla no se reintenta enseguida (BD caída)
+REINTENTAR_CADA = 5.0
+# Los lectores que la encuentran vieja piden armarla a lo sumo una vez por intervalo
+PEDIR_CADA = 1.0
+
+class Instantanea:
+    """Un archivo mapeado en memoria; `partes` son vistas sobre el mmap (sin copias)"""
+
+    def __init__(self, version: int):
+        self.version = version
+        with open(_ruta(version), "rb") as archivo:
+            self._mm = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self._mm)
+        if vista[:4] != MAGIA:
+            raise ValueError(f"{_ruta(version)} no es una instantánea")
+        (largo,) = _LARGO_CABECERA.unpack_from(self._mm, 4)
+        inicio = 4 + _LARGO_CABECERA.size
+        cabecera = json.loads(bytes(vista[inicio:inicio + largo]))
+        self.generacion = cabecera["generacion"]
+        self.creada = cabecera["creada"]
+        self.total = cabecera["total"]
+        self.pagina = cabecera["pagina"]
+        self.duracion_ms = cabecera["duracion_ms"]
+        self.bytes = len(self._mm)
+        self.partes: Dict[str, memoryview] = {
+            nombre: vista[desde:desde + largo] for nombre, (desde, largo) in cabecera["partes"].items()
+        }
+        # El mmap no se cierra a mano: se libera solo cuando ya no quedan
+        # respuestas en curso que usen sus vistas
+
+class RespuestaInstantanea(Response):
+    """Response cuyo cuerpo es una vista sobre el mmap: no se copia a bytes"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> memoryview:
+        return content
+
+class _Estado:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.control: Optional[mmap.mmap] = None
+        self.actual: Optional[Instantanea] = None
+        self.refrescando = False
+        self.ultimo_pedido = 0.0
+        self.reintentar_desde = 0.0
+        self.contadores = {"servidas": 0, "servidas_gzip": 0, "desactualizadas": 0, "armadas": 0, "errores": 0}
+
+estado = _Estado()
+
+def _ruta(version: int) -> str:
+    return os.path.join(INSTANTANEA_DIR, f"instantanea-{version}.bin")
+
+@contextmanager
+def _bloqueo(nombre: str, esperar: bool = True):
+    """flock sobre un archivo del directorio; sin esperar entrega False si otro proceso lo tiene"""
+    fd = os.open(os.path.join(INSTANTANEA_DIR, nombre), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+def _abrir_control() -> mmap.mmap:
+    if estado.control is None:
+        os.makedirs(INSTANTANEA_DIR, exist_ok=True)
+        fd = os.open(os.path.join(INSTANTANEA_DIR, "control"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < _CONTROL.size:
+                os.ftruncate(fd, _CONTROL.size)  # ceros: generación 0, nada publicado
+            estado.control = mmap.mmap(fd, _CONTROL.size)
+        finally:
+            os.close(fd)
+    return estado.control
+
+def _leer_control():
+    return _CONTROL.unpack_from(_abrir_control(), 0)
+
+def nueva_generacion():
+    """Marca como viejas las instantáneas publicadas (en todos los workers)"""
+    with _bloqueo("control.lock"):
+        generacion, version = _leer_control()
+        _CONTROL.pack_into(estado.control, 0, generacion + 1, version)
+
+def _publicar(version: int):
+    with _bloqueo("control.lock"):
+        generacion, _ = _leer_control()
+        _CONTROL.pack_into(estado.control, 0, generacion, version)
+
+def construir(db, generacion: int) -> bytes:
+    """Contenido del archivo: cabecera JSON y las partes, con los mismos bytes que los endpoints"""
+    # Import diferido: el router importa este módulo
+    from fastapi.encoders import jsonable_encoder
+    from .crud.indicador import get_estadisticas
+    from .routers.indicadores import _json_utf8, _listar
+
+    inicio = time.perf_counter()
+    estadisticas = get_estadisticas(db)
+    total = estadisticas["totalIndicadores"]
+    partes = {
+        "listado": _json_utf8(_listar(db, 0, total, None)).body,
+        "estadisticas": _json_utf8(jsonable_encoder(estadisticas)).body,
+    }
+    if total > INSTANTANEA_PAGINA:
+        partes["pagina"] = _json_utf8(_listar(db, 0, INSTANTANEA_PAGINA, None)).body
+    for nombre in list(partes):
+        partes[f"{nombre}.gz"] = gzip.compress(partes[nombre], compresslevel=6, mtime=0)
+
+    # Los offsets dependen del largo de la cabecera, que depende de los offsets:
+    # se reserva un ancho fijo para cada número
+    creada = time.time()
+    duracion_ms = round((time.perf_counter() - inicio) * 1000, 1)
+
+    def cabecera(posiciones):
+        return json.dumps({
+            "generacion": generacion,
+            "creada": creada,
+            "total": total,
+            "pagina": INSTANTANEA_PAGINA,
+            "duracion_ms": duracion_ms,
+            "partes": posiciones,
+        }).encode()
+
+    ancho = {nombre: [10 ** 15, 10 ** 15] for nombre in partes}
+    desde = 4 + _LARGO_CABECERA.size + len(cabecera(ancho))
+    posiciones = {}
+    for nombre, cuerpo in partes.items():
+        posiciones[nombre] = [desde, len(cuerpo)]
+        desde += len(cuerpo)
+    texto = cabecera(posiciones).ljust(len(cabecera(ancho)))
+    return b"".join([MAGIA, _LARGO_CABECERA.pack(len(texto)), texto, *partes.values()])
+
+def _armar(generacion: int, version: int):
+    from .database import SessionLocal
+
+    # Del primario: la réplica puede no tener todavía la escritura que la invalidó
+    with SessionLocal() as db:
+        contenido = construir(db, generacion)
+    temporal = _ruta(version) + ".tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, _ruta(version))
+    _publicar(version)
+    # Los workers que todavía la tengan mapeada la siguen leyendo aunque se borre
+    for nombre in os.listdir(INSTANTANEA_DIR):
+        if nombre.startswith("instantanea-") and nombre != os.path.basename(_ruta(version)):
+            try:
+                os.unlink(os.path.join(INSTANTANEA_DIR, nombre))
+            except FileNotFoundError:
+                pass
+
+def armar_pendientes() -> int:
+    """Arma instantáneas hasta alcanzar la generación actual; 0 si otro proceso ya está en eso"""
+    with _bloqueo("refresco.lock", esperar=False) as mio:
+        if not mio:
+            return 0  # el que la está armando repite si hubo escrituras mientras tanto
+        armadas = 0
+        while True:
+            time.sleep(INSTANTANEA_DEMORA_SEGUNDOS)
+            generacion, version = _leer_control()
+            _armar(generacion, version + 1)
+            armadas += 1
+            if _leer_control()[0] == generacion:
+                return armadas
+
+def _refrescar():
+    # En un proceso aparte: serializar todo crea cientos de MB de objetos y
+    # el worker que lo hiciera quedaría con ese heap para siempre
+    entorno = {**os.environ, "INSTANTANEA_SESION": INSTANTANEA_SESION,
+               "PYTHONPATH": os.pathsep.join(filter(None, [_BACKEND, os.getenv("PYTHONPATH")]))}
+    try:
+        proceso = subprocess.run([sys.executable, "-m", "app.instantanea"], env=entorno,
+                                 capture_output=True, text=True)
+        if proceso.returncode != 0:
+            raise RuntimeError((proceso.stderr.strip().splitlines() or ["sin salida"])[-1])
+        if proceso.stdout.strip():
+            estado.contadores["armadas"] += int(proceso.stdout.split()[-1])
+    except Exception as e:
+        estado.contadores["errores"] += 1
+        estado.reintentar_desde = time.monotonic() + REINTENTAR_CADA
+        print(f"⚠️ No se pudo armar la instantánea: {e}")
+    finally:
+        with estado.lock:
+            estado.refrescando = False
+
+def programar_refresco(forzar: bool = False):
+    """Arma la instantánea en segundo plano (un proceso a la vez para todos los workers)"""
+    ahora = time.monotonic()
+    with estado.lock:
+        if estado.refrescando or ahora < estado.reintentar_desde:
+            return
+        if not forzar and ahora - estado.ultimo_pedido < PEDIR_CADA:
+            return
+        estado.refrescando = True
+        estado.ultimo_pedido = ahora
+    threading.Thread(target=_refrescar, name="instantanea", daemon=True).start()
+
+def vigente() -> Optional[Instantanea]:
+    """La instantánea publicada si está al día con la generación actual"""
+    generacion, version = _leer_control()
+    if version == 0:
+        programar_refresco()
+        return None
+    actual = estado.actual
+    if actual is None or actual.version != version:
+        try:
+            actual = estado.actual = Instantanea(version)
+        except (OSError, ValueError):
+            return None  # se reemplazó entre leer el control y abrirla: el próximo request la toma
+    if actual.generacion != generacion:
+        estado.contadores["desactualizadas"] += 1
+        programar_refresco()
+        return None
+    if time.time() - actual.creada > INSTANTANEA_MAX_SEGUNDOS:
+        programar_refresco()
+    return actual
+
+def _acepta_gzip(accept_encoding: str) -> bool:
+    for codificacion in accept_encoding.split(","):
+        nombre, _, parametros = codificacion.strip().partition(";")
+        if nombre.strip().lower() in ("gzip", "*"):
+            return parametros.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def _responder(instantanea: Instantanea, parte: str, accept_encoding: str) -> Response:
+    headers = {
+        "Content-Type": "application/json; charset=utf-8",
+        "Vary": "Accept-Encoding",
+        "X-Cache": "HIT",
+        "X-Instantanea": str(instantanea.version),
+    }
+    if _acepta_gzip(accept_encoding):
+        headers["Content-Encoding"] = "gzip"
+        parte += ".gz"
+        estado.contadores["servidas_gzip"] += 1
+    estado.contadores["servidas"] += 1
+    return RespuestaInstantanea(content=instantanea.partes[parte], headers=headers)
+
+def servir_listado(skip: int, limit: int, accept_encoding: str = "") -> Optional[Response]:
+    """GET /indicadores/ sin ?fields desde la instantánea, si la página está materializada"""
+    if not INSTANTANEA_ACTIVA or skip != 0:
+        return None
+    instantanea = vigente()
+    if instantanea is None:
+        return None
+    if limit >= instantanea.total:
+        return _responder(instantanea, "listado", accept_encoding)
+    if limit == instantanea.pagina and "pagina" in instantanea.partes:
+        return _responder(instantanea, "pagina", accept_encoding)
+    return None
+
+def servir_estadisticas(accept_encoding: str = "") -> Optional[Response]:
+    if not INSTANTANEA_ACTIVA:
+        return None
+    instantanea = vigente()
+    if instantanea is None:
+        return None
+    return _responder(instantanea, "estadisticas", accept_encoding)
+
+def _sesion_viva(nombre: str) -> bool:
+    try:
+        os.kill(int(nombre), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, PermissionError):
+        return True  # no es un pid o es de otro usuario: no tocarlo
+    return True
+
+def iniciar():
+    """Mapea la instantánea publicada (o pide armarla) y borra las de arranques anteriores"""
+    if not INSTANTANEA_ACTIVA:
+        return
+    _abrir_control()
+    for nombre in os.listdir(INSTANTANEA_RAIZ):
+        if nombre != INSTANTANEA_SESION and not _sesion_viva(nombre):
+            shutil.rmtree(os.path.join(INSTANTANEA_RAIZ, nombre), ignore_errors=True)
+    if vigente() is None:
+        programar_refresco(forzar=True)
+
+def resumen() -> dict:
+    if INSTANTANEA_ACTIVA:
+        vigente()  # mapea la publicada si cambió desde el último request
+    actual = estado.actual
+    return {
+        "activa": INSTANTANEA_ACTIVA,
+        "version": actual.version if actual else None,
+        "generacion": actual.generacion if actual else None,
+        "generacion_actual": _leer_control()[0] if INSTANTANEA_ACTIVA else None,
+        "indicadores": actual.total if actual else None,
+        "bytes": actual.bytes if actual else None,
+        "edad_segundos": round(time.time() - actual.creada, 1) if actual else None,
+        "duracion_armado_ms": actual.duracion_ms if actual else None,
+        **estado.contadores,
+    }
+
+@eventos.suscribir
+def _al_escribir(indicador_ids, areas):
+    """Cualquier escritura deja vieja la instantánea: el listado y los totales cambian"""
+    if not INSTANTANEA_ACTIVA:
+        return
+    nueva_generacion()
+    programar_refresco(forzar=True)
+
+if __name__ == "__main__":
+    # Lo lanza _refrescar; imprime cuántas armó
+    print(armar_pendientes())
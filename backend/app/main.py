@@ -1,28 +1,138 @@
-from fastapi import FastAPI, Response
+import time
+_inicio_import = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from .routers import indicadores
-from .database import engine
-from .models import indicador
+from sqlalchemy import text
+from starlette.datastructures import MutableHeaders
+from .routers import indicadores, admin, auth as auth_router
+from .auth import requerir_admin
+from .database import Base, SessionLocal, USANDO_SQLITE_LOCAL, get_engine
+from .models import indicador, usuario, archivo as modelos_archivo
+from .crud.indicador import get_dimensiones
+from .security import SecurityMiddleware, RateLimitMiddleware
+from . import busqueda, perfil_imports, replica, worker
+from .cache_respuestas import respuestas
+from . import archivo, coalescencia, consultas_lentas, instantanea
+from anyio import to_thread
 import os
 import json
+import threading
+
+_duracion_import = time.perf_counter() - _inicio_import
+
+# Conexiones que cada worker abre al arrancar, para no pagarlas en los primeros requests
+POOL_CALENTAR = int(os.getenv("POOL_CALENTAR", "2"))
+# Presupuesto de arranque (imports + calentamiento); si se supera se imprime
+# el detalle de imports para encontrar qué lo está haciendo lento
+ARRANQUE_PRESUPUESTO_MS = int(os.getenv("ARRANQUE_PRESUPUESTO_MS", "2500"))
+# Hilos para endpoints síncronos (gunicorn.conf.py lo ajusta al pool de
+# conexiones; sin valor queda el default de anyio, 40)
+HILOS_POR_WORKER = int(os.getenv("HILOS_POR_WORKER", "0"))
+
+def calentar_worker():
+    """Prepara el worker antes de recibir tráfico: pool de conexiones y cachés.
+
+    El esquema lo crea `alembic upgrade head` en el pre-deploy; solo con la
+    SQLite local de desarrollo se crean las tablas aquí.
+    """
+    engine = get_engine()
+    if USANDO_SQLITE_LOCAL:
+        Base.metadata.create_all(bind=engine)
+
+    conexiones = [engine.connect() for _ in range(POOL_CALENTAR)]
+    for conexion in conexiones:
+        conexion.execute(text("SELECT 1"))
+        conexion.close()
 
-# Crear las tablas en la base de datos
-indicador.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        indicadores.cache_dimensiones.obtener("todas", lambda: get_dimensiones(db))
+
+    # Con DATABASE_REPLICA_URL: primera medición y monitoreo de la réplica
+    replica.iniciar()
+    # Con INSTANTANEA=true: mapear la instantánea compartida (o armarla si no hay)
+    instantanea.iniciar()
+    # Con ARCHIVO_CADA_SEGUNDOS: mover en segundo plano los indicadores cerrados al archivo
+    archivo.iniciar()
+
+    def precalentar_busqueda():
+        try:
+            with SessionLocal() as db:
+                busqueda.precalentar(db)
+        except Exception as e:
+            print(f"⚠️ No se pudo precalentar la búsqueda: {e}")
+
+    # El índice de búsqueda puede tardar segundos: se arma sin demorar el arranque
+    threading.Thread(target=precalentar_busqueda, name="precalentar-busqueda", daemon=True).start()
+
+@asynccontextmanager
+async def lifespan(app):
+    inicio = time.perf_counter()
+    if HILOS_POR_WORKER:
+        to_thread.current_default_thread_limiter().total_tokens = HILOS_POR_WORKER
+    worker.iniciar()
+    try:
+        await run_in_threadpool(calentar_worker)
+    except Exception as e:
+        # Sin BD el worker igual arranca; pool_pre_ping reconecta cuando vuelva
+        print(f"⚠️ Calentamiento incompleto: {e}")
+    calentamiento = time.perf_counter() - inicio
+    print(
+        f"🚀 Worker {os.getpid()} listo: imports {_duracion_import * 1000:.0f}ms, "
+        f"calentamiento {calentamiento * 1000:.0f}ms"
+    )
+    if perfil_imports.por_paquete():
+        print(f"📦 {perfil_imports.reporte()}")
+        if (_duracion_import + calentamiento) * 1000 > ARRANQUE_PRESUPUESTO_MS:
+            print(
+                f"⚠️ Arranque sobre el presupuesto de {ARRANQUE_PRESUPUESTO_MS}ms: "
+                f"{perfil_imports.reporte(top=20)}"
+            )
+        # Lo que se importe de aquí en adelante (p. ej. pandas en la carga) no es arranque
+        perfil_imports.desactivar()
+    yield
+    worker.borrar(os.getpid())
+    replica.cerrar()
+    get_engine().dispose()
 
 app = FastAPI(
     title="Sistema de Indicadores API",
     description="API para el sistema de gestión de indicadores",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# Middleware personalizado para UTF-8
-@app.middleware("http")
-async def add_utf8_headers(request, call_next):
-    response = await call_next(request)
-    if "application/json" in response.headers.get("content-type", ""):
-        response.headers["content-type"] = "application/json; charset=utf-8"
-    return response
+# Middleware personalizado para UTF-8 (ASGI puro: solo reescribe el header
+# al iniciar la respuesta, sin envolver el body)
+class UTF8JSONMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_utf8(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if "application/json" in headers.get("content-type", ""):
+                    headers["content-type"] = "application/json; charset=utf-8"
+            await send(message)
+
+        await self.app(scope, receive, send_utf8)
+
+# La más interna: el scope ya trae la ruta resuelta cuando corren las consultas
+app.add_middleware(consultas_lentas.RutaConsultasMiddleware)
+app.add_middleware(UTF8JSONMiddleware)
+app.add_middleware(worker.ContadorRequestsMiddleware)
+# Seguridad y rate limiting dentro de CORS, para que los rechazos (413/429)
+# lleven headers CORS; el rate limit es lo primero que se evalúa
+app.add_middleware(SecurityMiddleware)
+app.add_middleware(RateLimitMiddleware)
 
 # Configuración CORS (modo producción por defecto)
 allowed_origins = [
@@ -44,6 +154,9 @@ app.add_middleware(
 
 # Incluir routers con prefijo /api
 app.include_router(indicadores.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+# Login en /token (tokenUrl del esquema OAuth2 de app.auth)
+app.include_router(auth_router.router)
 
 @app.get("/")
 def read_root():
@@ -57,13 +170,48 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    """Liveness pública (healthcheck de Railway); el detalle de /health/* es solo para ADMIN_USUARIOS"""
     return {
         "status": "healthy", 
         "message": "API funcionando correctamente",
-        "database": "connected",
         "version": "1.0.0"
     }
 
+@app.get("/health/replica", dependencies=[Depends(requerir_admin)])
+def health_replica():
+    """Retraso, uso y último error de la réplica de lectura vistos desde este worker"""
+    return {"pid": os.getpid(), **replica.resumen()}
+
+@app.get("/health/workers", dependencies=[Depends(requerir_admin)])
+def health_workers():
+    """Requests atendidos y memoria de cada worker vivo"""
+    workers = worker.leer_todos()
+    return {
+        "workers": workers,
+        "total_requests": sum(w["requests"] for w in workers),
+        "memoria_total_mb": round(sum(w["memoria_mb"] for w in workers), 1),
+    }
+
+@app.get("/health/cache", dependencies=[Depends(requerir_admin)])
+def health_cache():
+    """Hits, misses, desalojos e invalidaciones de la caché de respuestas de este worker"""
+    return {"pid": os.getpid(), **respuestas.estadisticas()}
+
+@app.get("/health/coalescencia", dependencies=[Depends(requerir_admin)])
+def health_coalescencia():
+    """Ejecuciones y requests coalescidos por familia de endpoints en este worker"""
+    return {"pid": os.getpid(), **coalescencia.estadisticas()}
+
+@app.get("/health/instantanea", dependencies=[Depends(requerir_admin)])
+def health_instantanea():
+    """Versión, edad y uso de la instantánea compartida vista desde este worker"""
+    return {"pid": os.getpid(), **instantanea.resumen()}
+
+@app.get("/health/archivo", dependencies=[Depends(requerir_admin)])
+def health_archivo():
+    """Configuración y última corrida del archivo de indicadores cerrados en este worker"""
+    return {"pid": os.getpid(), **archivo.resumen()}
+
 @app.get("/test-cors")
 def test_cors():
     """Endpoint específico para probar CORS desde Vercel"""
@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from ..database import Base
+from .dimensiones import (
+    SCHEMA_NORMALIZADO, DimVP, DimArea, DimResponsable, DimEstado, referencia_dimension,
+)
+
+# Mismas columnas que Indicador e Hito (app.archivo copia las filas columna a
+# columna), con los id originales y sin índices de texto: solo se leen por id
+
+class IndicadorArchivado(Base):
+    __tablename__ = "indicadores_archivo"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    if SCHEMA_NORMALIZADO:
+        vp_id, _vp, vp = referencia_dimension(DimVP, "_vp")
+        area_id, _area, area = referencia_dimension(DimArea, "_area")
+        responsable_general_id, _responsable_general, responsableGeneral = referencia_dimension(DimResponsable, "_responsable_general")
+        responsable_carga_id, _responsable_carga, responsableCargaGeneral = referencia_dimension(DimResponsable, "_responsable_carga")
+        __referencias_dimension__ = [
+            ("_vp", DimVP), ("_area", DimArea),
+            ("_responsable_general", DimResponsable), ("_responsable_carga", DimResponsable),
+        ]
+    else:
+        vp = Column(String)
+        area = Column(String)
+        responsableGeneral = Column(String)
+        responsableCargaGeneral = Column(String)
+    nombreIndicador = Column(String)
+    tipoIndicador = Column(String)
+    fechaInicioGeneral = Column(Date)
+    fechaFinalizacionGeneral = Column(Date)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archivado_at = Column(DateTime, nullable=False)
+
+    hitos = relationship("HitoArchivado", back_populates="indicador", order_by="HitoArchivado.id")
+
+class HitoArchivado(Base):
+    __tablename__ = "hitos_archivo"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    indicador_id = Column(Integer, ForeignKey("indicadores_archivo.id"), index=True)
+    nombreHito = Column(String)
+    fechaInicioHito = Column(Date)
+    fechaFinalizacionHito = Column(Date)
+    avanceHito = Column(Float)
+    if SCHEMA_NORMALIZADO:
+        estado_id, _estado, estadoHito = referencia_dimension(DimEstado, "_estado")
+        responsable_id, _responsable, responsableHito = referencia_dimension(DimResponsable, "_responsable")
+        __referencias_dimension__ = [("_estado", DimEstado), ("_responsable", DimResponsable)]
+    else:
+        estadoHito = Column(String)
+        responsableHito = Column(String)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+    indicador = relationship("IndicadorArchivado", back_populates="hitos")
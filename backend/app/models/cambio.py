@@ -0,0 +1,74 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, event, insert, text
+from sqlalchemy.orm import Session
+from datetime import datetime
+from ..database import Base
+
+class Cambio(Base):
+    """Registro de escrituras para la sincronización incremental (app.cambios).
+
+    El id es la secuencia monótona: un cliente guarda el último que vio como
+    token y pide solo lo posterior. sqlite_autoincrement evita que SQLite
+    reutilice ids después de una purga.
+    """
+    __tablename__ = "cambios"
+
+    id = Column(Integer, primary_key=True)
+    entidad = Column(String, nullable=False)    # "indicador", "hito" o "corte"
+    entidad_id = Column(Integer)
+    indicador_id = Column(Integer)              # el indicador afectado (el propio o el del hito)
+    borrado = Column(Boolean, nullable=False, default=False)
+    # Purga por antigüedad (CAMBIOS_RETENCION_DIAS)
+    momento = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        # Parcial: los cortes que invalidan tokens, consultados en cada sincronización
+        Index("ix_cambios_cortes", "id", postgresql_where=entidad == "corte", sqlite_where=entidad == "corte"),
+        {"sqlite_autoincrement": True},
+    )
+
+# Tablas cuyas escrituras por ORM se registran (por nombre: este módulo se
+# importa desde models.indicador)
+ENTIDADES = {"indicadores": "indicador", "hitos": "hito"}
+# Clave del pg_advisory_xact_lock que serializa a los escritores
+CLAVE_BLOQUEO = 4806
+
+def bloquear(session: Session):
+    """Serializa las transacciones que escriben indicadores o hitos (PostgreSQL).
+
+    Sin esto dos transacciones pueden tomar los id 10 y 11 de la secuencia y
+    confirmar en orden inverso: un cliente que sincronizó al ver el 11 se
+    saltaría el 10 para siempre. Con el lock, el orden de los id es el de
+    los commits. Se libera solo al terminar la transacción.
+    """
+    if session.info.get("cambios_bloqueo") is session.get_transaction():
+        return
+    if session.get_bind().dialect.name == "postgresql":
+        session.connection().execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": CLAVE_BLOQUEO})
+    session.info["cambios_bloqueo"] = session.get_transaction()
+
+def _registrables(objetos):
+    return [o for o in objetos if getattr(type(o), "__tablename__", None) in ENTIDADES]
+
+@event.listens_for(Session, "before_flush")
+def _bloquear_antes_de_escribir(session, flush_context, instances):
+    if _registrables(session.new) or _registrables(session.dirty) or _registrables(session.deleted):
+        bloquear(session)
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session, flush_context):
+    """Una fila en cambios por cada indicador o hito creado, modificado o borrado"""
+    filas = []
+    for objetos, borrado in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for obj in _registrables(objetos):
+            if not borrado and obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            entidad = ENTIDADES[type(obj).__tablename__]
+            filas.append({
+                "entidad": entidad,
+                "entidad_id": obj.id,
+                "indicador_id": obj.id if entidad == "indicador" else obj.indicador_id,
+                "borrado": borrado,
+                "momento": datetime.utcnow(),
+            })
+    if filas:
+        session.connection().execute(insert(Cambio.__table__), filas)
@@ -0,0 +1,119 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, event, select
+from sqlalchemy.ext.hybrid import hybrid_property, Comparator
+from sqlalchemy.orm import relationship, Session
+from sqlalchemy.sql import operators
+import os
+from ..database import Base
+
+# Esquema normalizado (opt-in): vp, área, responsables y estados pasan a tablas
+# de lookup con claves enteras. Requiere haber corrido migrar_dimensiones.py
+# (o la migración 0003 con la variable activa).
+SCHEMA_NORMALIZADO = os.getenv("SCHEMA_NORMALIZADO", "false").lower() in ("1", "true", "yes")
+
+class DimVP(Base):
+    __tablename__ = "dim_vp"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String, unique=True, nullable=False)
+
+class DimArea(Base):
+    __tablename__ = "dim_area"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String, unique=True, nullable=False)
+
+class DimResponsable(Base):
+    __tablename__ = "dim_responsable"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String, unique=True, nullable=False)
+
+class DimEstado(Base):
+    __tablename__ = "dim_estado"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String, unique=True, nullable=False)
+
+class ComparadorDimension(Comparator):
+    """Traduce comparaciones por nombre a comparaciones sobre la clave entera.
+
+    `Indicador.area == "Legal"` se compila como
+    `area_id = (SELECT id FROM dim_area WHERE nombre = 'Legal')`, que usa el
+    índice entero; en un SELECT el atributo devuelve el nombre.
+    """
+
+    def __init__(self, modelo_dim, columna_fk):
+        self.modelo_dim = modelo_dim
+        self.columna_fk = columna_fk
+        super().__init__(
+            select(modelo_dim.nombre)
+            .where(modelo_dim.id == columna_fk)
+            .correlate_except(modelo_dim)
+            .scalar_subquery()
+        )
+
+    def _id_de(self, nombre):
+        return select(self.modelo_dim.id).where(self.modelo_dim.nombre == nombre).scalar_subquery()
+
+    def operate(self, op, *other, **kwargs):
+        if op in (operators.eq, operators.ne) and other[0] is not None:
+            return op(self.columna_fk, self._id_de(other[0]))
+        if op in (operators.eq, operators.ne, operators.is_, operators.is_not):
+            return op(self.columna_fk, *other)
+        if op is operators.in_op:
+            return self.columna_fk.in_(
+                select(self.modelo_dim.id).where(self.modelo_dim.nombre.in_(other[0]))
+            )
+        return op(self.expression, *other, **kwargs)
+
+    def reverse_operate(self, op, other, **kwargs):
+        return op(other, self.expression, **kwargs)
+
+def referencia_dimension(modelo_dim, atributo_ref: str):
+    """Devuelve (columna_fk, relación, atributo_por_nombre) para declarar en el modelo.
+
+    El atributo por nombre conserva la forma de la API: se lee y asigna
+    como texto; el nombre se resuelve a su fila de lookup al hacer flush.
+    """
+    columna_fk = Column(Integer, ForeignKey(f"{modelo_dim.__tablename__}.id"), index=True)
+    relacion = relationship(modelo_dim, foreign_keys=[columna_fk], lazy="joined")
+
+    def leer(self):
+        dim = getattr(self, atributo_ref)
+        return dim.nombre if dim is not None else None
+
+    def asignar(self, valor):
+        actual = self.__dict__.get(atributo_ref)
+        if actual is not None and actual.nombre == valor:
+            return
+        setattr(self, atributo_ref, modelo_dim(nombre=valor) if valor is not None else None)
+
+    atributo = hybrid_property(leer, asignar)
+    atributo = atributo.comparator(lambda cls: ComparadorDimension(modelo_dim, columna_fk))
+    return columna_fk, relacion, atributo
+
+def buscar_dimension(session: Session, modelo_dim, nombre: str):
+    with session.no_autoflush:
+        return session.execute(
+            select(modelo_dim).where(modelo_dim.nombre == nombre)
+        ).scalar_one_or_none()
+
+@event.listens_for(Session, "before_flush")
+def _resolver_dimensiones(session, flush_context, instances):
+    """Reemplaza las filas de lookup recién asignadas por las existentes con el mismo nombre"""
+    if not SCHEMA_NORMALIZADO:
+        return
+    resueltas = {}
+    for obj in list(session.new) + list(session.dirty):
+        for atributo_ref, modelo_dim in getattr(type(obj), "__referencias_dimension__", ()):
+            dim = obj.__dict__.get(atributo_ref)
+            if dim is None or dim.id is not None:
+                continue
+            clave = (modelo_dim, dim.nombre)
+            if clave not in resueltas:
+                resueltas[clave] = buscar_dimension(session, modelo_dim, dim.nombre) or dim
+                session.add(resueltas[clave])
+            if resueltas[clave] is not dim:
+                setattr(obj, atributo_ref, resueltas[clave])
+                if dim in session:
+                    session.expunge(dim)
@@ -1,36 +1,76 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
+from .dimensiones import (
+    SCHEMA_NORMALIZADO, DimVP, DimArea, DimResponsable, DimEstado, referencia_dimension,
+)
+# Registra la tabla cambios y los listeners que la llenan en cada flush
+from . import cambio  # noqa: F401
 
 class Indicador(Base):
     __tablename__ = "indicadores"
 
-    id = Column(Integer, primary_key=True, index=True)
-    vp = Column(String, index=True)
-    area = Column(String, index=True)
-    nombreIndicador = Column(String, index=True)
+    # Índices según las consultas reales (migración 0007); verificar_planes.py
+    # comprueba que las rutas calientes no recorran la tabla
+    id = Column(Integer, primary_key=True)
+    if SCHEMA_NORMALIZADO:
+        vp_id, _vp, vp = referencia_dimension(DimVP, "_vp")
+        area_id, _area, area = referencia_dimension(DimArea, "_area")
+        responsable_general_id, _responsable_general, responsableGeneral = referencia_dimension(DimResponsable, "_responsable_general")
+        responsable_carga_id, _responsable_carga, responsableCargaGeneral = referencia_dimension(DimResponsable, "_responsable_carga")
+        __referencias_dimension__ = [
+            ("_vp", DimVP), ("_area", DimArea),
+            ("_responsable_general", DimResponsable), ("_responsable_carga", DimResponsable),
+        ]
+        # Conteos de áreas por vp en get_dimensiones sin leer la tabla
+        __table_args__ = (Index("ix_indicadores_vp_id_area_id", "vp_id", "area_id"),)
+    else:
+        vp = Column(String, index=True)
+        area = Column(String, index=True)
+        responsableGeneral = Column(String)
+        responsableCargaGeneral = Column(String)
+        __table_args__ = (Index("ix_indicadores_vp_area", "vp", "area"),)
+    # Sin índice propio: la búsqueda usa los índices trigram (PostgreSQL) o el de app.busqueda
+    nombreIndicador = Column(String)
     tipoIndicador = Column(String)
     fechaInicioGeneral = Column(Date)
-    fechaFinalizacionGeneral = Column(Date)
-    responsableGeneral = Column(String)
-    responsableCargaGeneral = Column(String)
+    # Candidatos a archivar (app.archivo)
+    fechaFinalizacionGeneral = Column(Date, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    hitos = relationship("Hito", back_populates="indicador", cascade="all, delete-orphan")
+    # La BD borra los hitos (ON DELETE CASCADE): borrar un indicador no los carga uno a uno
+    hitos = relationship("Hito", back_populates="indicador", cascade="all, delete-orphan", passive_deletes=True)
 
 class Hito(Base):
     __tablename__ = "hitos"
 
-    id = Column(Integer, primary_key=True, index=True)
-    indicador_id = Column(Integer, ForeignKey("indicadores.id"))
+    id = Column(Integer, primary_key=True)
+    # Carga de los hitos de un indicador y borrado en cascada
+    indicador_id = Column(Integer, ForeignKey("indicadores.id", ondelete="CASCADE"), index=True)
     nombreHito = Column(String)
     fechaInicioHito = Column(Date)
     fechaFinalizacionHito = Column(Date)
     avanceHito = Column(Float, default=0)
-    estadoHito = Column(String)
-    responsableHito = Column(String)
+    if SCHEMA_NORMALIZADO:
+        estado_id, _estado, estadoHito = referencia_dimension(DimEstado, "_estado")
+        responsable_id, _responsable, responsableHito = referencia_dimension(DimResponsable, "_responsable")
+        __referencias_dimension__ = [("_estado", DimEstado), ("_responsable", DimResponsable)]
+        # Cubre la agregación de get_estadisticas (GROUP BY estado con sum/count de avance)
+        __table_args__ = (Index("ix_hitos_estado_id_avanceHito", "estado_id", "avanceHito"),)
+    else:
+        estadoHito = Column(String)
+        responsableHito = Column(String, index=True)
+        __table_args__ = (
+            Index("ix_hitos_estadoHito_avanceHito", "estadoHito", "avanceHito"),
+            # Parcial: solo los hitos sin completar, lo que busca app.archivo.condicion_cerrado
+            Index(
+                "ix_hitos_pendientes", "indicador_id",
+                postgresql_where=(estadoHito == "Completado").is_not(True),
+                sqlite_where=(estadoHito == "Completado").is_not(True),
+            ),
+        )
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
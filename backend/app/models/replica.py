@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, Float
+from ..database import Base
+
+class ReplicaLatido(Base):
+    """Fila única que se escribe en el primario y se lee en la réplica para medir su retraso"""
+    __tablename__ = "replica_latido"
+
+    id = Column(Integer, primary_key=True)
+    momento = Column(Float, nullable=False, default=0)           # último latido escrito (epoch)
+    ultima_escritura = Column(Float, nullable=False, default=0)  # último commit de datos (epoch)
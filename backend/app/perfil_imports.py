@@ -0,0 +1,77 @@
+"""
+⏱️ Perfil de imports del arranque
+Mide cuánto tarda en importarse cada paquete (tiempo propio, sin contar sus
+dependencias) para reportarlo cuando el worker queda listo
+"""
+
+import sys
+import time
+from collections import defaultdict
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Tuple
+
+_tiempos_propios: Dict[str, float] = defaultdict(float)
+_pila: List[float] = []  # tiempo de hijos acumulado por cada import en curso
+_activo = False
+
+class _LoaderCronometrado:
+    """Envuelve el loader real y mide su exec_module"""
+
+    def __init__(self, loader, nombre):
+        self._loader = loader
+        self._nombre = nombre
+
+    def __getattr__(self, atributo):
+        return getattr(self._loader, atributo)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, modulo):
+        _pila.append(0.0)
+        inicio = time.perf_counter()
+        try:
+            self._loader.exec_module(modulo)
+        finally:
+            total = time.perf_counter() - inicio
+            hijos = _pila.pop()
+            _tiempos_propios[self._nombre] += total - hijos
+            if _pila:
+                _pila[-1] += total
+
+class _BuscadorCronometrado(MetaPathFinder):
+    def find_spec(self, nombre, path=None, target=None):
+        for buscador in sys.meta_path:
+            if buscador is self or not hasattr(buscador, "find_spec"):
+                continue
+            spec = buscador.find_spec(nombre, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _LoaderCronometrado(spec.loader, nombre)
+                return spec
+        return None
+
+def activar():
+    """Empieza a medir los imports siguientes (llamar lo antes posible)"""
+    global _activo
+    if not _activo:
+        sys.meta_path.insert(0, _BuscadorCronometrado())
+        _activo = True
+
+def desactivar():
+    global _activo
+    sys.meta_path[:] = [b for b in sys.meta_path if not isinstance(b, _BuscadorCronometrado)]
+    _activo = False
+
+def por_paquete() -> List[Tuple[str, float]]:
+    """(paquete de primer nivel, segundos) ordenado de mayor a menor"""
+    totales: Dict[str, float] = defaultdict(float)
+    for nombre, segundos in _tiempos_propios.items():
+        totales[nombre.split(".")[0]] += segundos
+    return sorted(totales.items(), key=lambda x: x[1], reverse=True)
+
+def reporte(top: int = 8) -> str:
+    paquetes = por_paquete()
+    total = sum(s for _, s in paquetes)
+    partes = ", ".join(f"{p} {s * 1000:.0f}ms" for p, s in paquetes[:top])
+    return f"imports medidos {total * 1000:.0f}ms ({len(_tiempos_propios)} módulos): {partes}"
@@ -0,0 +1,195 @@
+"""
+🪞 Réplica de lectura (opcional)
+Con DATABASE_REPLICA_URL los GET de indicadores leen de la réplica mientras
+esté sana, con retraso dentro de la tolerancia y al día con la última
+escritura conocida; en cualquier otro caso leen del primario
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, insert, select, update
+from .database import SessionLocal, _fabrica_sesiones, get_engine
+from .models.replica import ReplicaLatido
+from . import eventos
+from .consultas_lentas import instrumentar
+
+load_dotenv()
+
+REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+if REPLICA_URL and REPLICA_URL.startswith("postgres://"):
+    REPLICA_URL = REPLICA_URL.replace("postgres://", "postgresql://", 1)
+
+# Retraso máximo aceptado antes de volver al primario, y cada cuánto cada
+# worker escribe el latido y mide la réplica
+REPLICA_LAG_MAX_SEGUNDOS = float(os.getenv("REPLICA_LAG_MAX_SEGUNDOS", "5"))
+REPLICA_CHEQUEO_SEGUNDOS = float(os.getenv("REPLICA_CHEQUEO_SEGUNDOS", "1"))
+
+class EstadoReplica:
+    """Última medición de la réplica (la escribe solo el hilo de chequeo)"""
+
+    def __init__(self):
+        self.sana = False
+        self.lag: Optional[float] = None
+        self.latido_replica = 0.0          # latido más reciente visible en la réplica
+        self.escritura_primario = 0.0      # última escritura de cualquier worker, leída del primario
+        self.ultimo_chequeo = 0.0
+        self.error: Optional[str] = None
+        self.lecturas_replica = 0
+        self.lecturas_primario = 0
+
+estado = EstadoReplica()
+_ultima_escritura_local = 0.0
+_engine_replica = None
+_engine_lock = threading.Lock()
+_hilo: Optional[threading.Thread] = None
+
+def get_engine_replica():
+    """Engine de la réplica, creado en el primer uso (None si no hay réplica configurada)"""
+    global _engine_replica
+    if REPLICA_URL and _engine_replica is None:
+        with _engine_lock:
+            if _engine_replica is None:
+                _engine_replica = _crear_engine_replica()
+    return _engine_replica
+
+def _crear_engine_replica():
+    if REPLICA_URL.startswith("sqlite"):
+        engine = create_engine(REPLICA_URL, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _solo_lectura(conexion, _registro):
+            conexion.execute("PRAGMA query_only = ON")
+    else:
+        engine = create_engine(
+            REPLICA_URL,
+            pool_pre_ping=True,
+            pool_recycle=300,
+            connect_args={"connect_timeout": 2, "options": "-c default_transaction_read_only=on"},
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _desconexion(contexto):
+        # Si la réplica se cae entre chequeos, los siguientes requests ya van al primario
+        if contexto.is_disconnect:
+            estado.sana = False
+            estado.error = str(contexto.original_exception)
+
+    print(f"🪞 Réplica de lectura: {engine.url.render_as_string(hide_password=True)[:50]}...")
+    return instrumentar(engine)
+
+def chequear():
+    """Escribe el latido en el primario y mide retraso y salud de la réplica.
+
+    El retraso es una cota superior: la réplica se lee antes de escribir el
+    latido nuevo, así que incluye hasta un intervalo de chequeo.
+    """
+    ahora = time.time()
+    try:
+        with get_engine_replica().connect() as conexion:
+            fila = conexion.execute(
+                select(ReplicaLatido.momento).where(ReplicaLatido.id == 1)
+            ).first()
+        estado.latido_replica = fila.momento if fila else 0.0
+        estado.lag = max(0.0, ahora - estado.latido_replica)
+        estado.sana = True
+        estado.error = None
+    except Exception as e:
+        estado.sana = False
+        estado.error = str(e)
+
+    try:
+        with get_engine().begin() as conexion:
+            actualizado = conexion.execute(
+                update(ReplicaLatido).where(ReplicaLatido.id == 1).values(momento=ahora)
+            ).rowcount
+            if not actualizado:
+                conexion.execute(insert(ReplicaLatido).values(id=1, momento=ahora, ultima_escritura=0))
+            estado.escritura_primario = conexion.execute(
+                select(ReplicaLatido.ultima_escritura).where(ReplicaLatido.id == 1)
+            ).scalar_one()
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir el latido de la réplica: {e}")
+    estado.ultimo_chequeo = ahora
+
+def usar_replica() -> bool:
+    if not REPLICA_URL or not estado.sana or estado.lag is None:
+        return False
+    if estado.lag > REPLICA_LAG_MAX_SEGUNDOS:
+        return False
+    # Medición vieja (hilo de chequeo detenido): no confiar en ella
+    if time.time() - estado.ultimo_chequeo > REPLICA_LAG_MAX_SEGUNDOS + 2 * REPLICA_CHEQUEO_SEGUNDOS:
+        return False
+    # Leer lo propio: un latido escrito después de la última escritura ya
+    # llegó a la réplica, así que esa escritura también
+    return estado.latido_replica >= max(_ultima_escritura_local, estado.escritura_primario)
+
+@eventos.suscribir
+def _registrar_escritura(indicador_ids, areas):
+    """Tras un commit: este worker lee del primario hasta que la réplica lo alcance, y avisa a los demás vía primario"""
+    global _ultima_escritura_local
+    if not REPLICA_URL:
+        return
+    _ultima_escritura_local = time.time()
+    try:
+        with get_engine().begin() as conexion:
+            conexion.execute(
+                update(ReplicaLatido)
+                .where(ReplicaLatido.id == 1, ReplicaLatido.ultima_escritura < _ultima_escritura_local)
+                .values(ultima_escritura=_ultima_escritura_local)
+            )
+    except Exception as e:
+        print(f"⚠️ No se pudo registrar la escritura para la réplica: {e}")
+
+def _bucle_chequeo():
+    while True:
+        time.sleep(REPLICA_CHEQUEO_SEGUNDOS)
+        try:
+            chequear()
+        except Exception as e:
+            print(f"⚠️ Chequeo de réplica falló: {e}")
+
+def iniciar():
+    """Primer chequeo e hilo de monitoreo (una vez por worker, después del fork)"""
+    global _hilo
+    if not REPLICA_URL or _hilo is not None:
+        return
+    chequear()
+    _hilo = threading.Thread(target=_bucle_chequeo, name="chequeo-replica", daemon=True)
+    _hilo.start()
+
+def SessionLectura():
+    """Sesión para consultas de solo lectura: réplica si está disponible y al día, si no el primario"""
+    if usar_replica():
+        estado.lecturas_replica += 1
+        return _fabrica_sesiones(bind=get_engine_replica())
+    estado.lecturas_primario += 1
+    return SessionLocal()
+
+def get_db_lectura():
+    db = SessionLectura()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def resumen() -> dict:
+    """Estado de la réplica para /health/replica"""
+    if not REPLICA_URL:
+        return {"configurada": False}
+    return {
+        "configurada": True,
+        "sana": estado.sana,
+        "en_uso": usar_replica(),
+        "lag_segundos": round(estado.lag, 3) if estado.lag is not None else None,
+        "lag_max_segundos": REPLICA_LAG_MAX_SEGUNDOS,
+        "lecturas_replica": estado.lecturas_replica,
+        "lecturas_primario": estado.lecturas_primario,
+        "error": estado.error,
+    }
+
+def cerrar():
+    if _engine_replica is not None:
+        _engine_replica.dispose()
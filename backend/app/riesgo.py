@@ -0,0 +1,242 @@
+"""
+🚦 Riesgo de plazo de los hitos
+Trae fechas, avance y estado de todos los hitos en una sola consulta, como
+números, y calcula con NumPy, sin recorrer fila por fila:
+- avance esperado: la fracción transcurrida entre inicio y fin del hito
+- brecha: esperado menos real (lo que va atrasado aunque no haya vencido)
+- días vencido: desde la fecha de finalización, si sigue sin completar
+- puntaje de riesgo 0-100 y nivel, para ordenar y agregar por vp y área
+
+El análisis de la fecha actual se cachea hasta la próxima escritura (app.eventos)
+o RIESGO_TTL_SEGUNDOS; el de otras fechas se calcula en cada consulta.
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Integer, case, cast, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from .cache import CacheVersionado
+from .models.indicador import Indicador, Hito
+
+# ===================================================
+# 🔧 CONFIGURACIÓN
+# ===================================================
+
+# Puntos de avance por debajo de lo esperado a partir de los cuales un hito no vencido está en riesgo
+RIESGO_BRECHA_MINIMA = float(os.getenv("RIESGO_BRECHA_MINIMA", "20"))
+# Días de atraso con los que un hito vencido llega al máximo del puntaje
+RIESGO_DIAS_SATURACION = float(os.getenv("RIESGO_DIAS_SATURACION", "30"))
+RIESGO_LIMITE = int(os.getenv("RIESGO_LIMITE", "50"))
+# Antigüedad máxima del análisis; acota lo desactualizado frente a escrituras de otros workers
+RIESGO_TTL_SEGUNDOS = int(os.getenv("RIESGO_TTL_SEGUNDOS", "300"))
+
+ESTADO_COMPLETADO = "Completado"
+# Índice = código en AnalisisRiesgo.nivel
+NIVELES = ("completado", "al_dia", "en_riesgo", "vencido", "sin_fechas")
+COMPLETADO, AL_DIA, EN_RIESGO, VENCIDO, SIN_FECHAS = range(len(NIVELES))
+
+_EPOCA = date(1970, 1, 1)
+
+cache_riesgo = CacheVersionado(ttl=RIESGO_TTL_SEGUNDOS)
+
+# ===================================================
+# 📥 CARGA
+# ===================================================
+
+def _dias(columna, dialecto: str):
+    """Fecha como días desde 1970-01-01, calculada en la BD: no se arman objetos date por fila"""
+    if dialecto == "sqlite":
+        return func.julianday(columna) - 2440587.5
+    return cast(columna - literal_column("DATE '1970-01-01'"), Integer)
+
+def _cargar(db: Session):
+    """(matriz de hitos, vp y área por indicador): la de hitos en una sola consulta.
+
+    Columnas: id, indicador_id, inicio, fin (días), avanceHito, completado (0/1).
+    Los nulos quedan como NaN.
+    """
+    dialecto = db.get_bind().dialect.name
+    resultado = db.connection().execute(
+        select(
+            Hito.id, Hito.indicador_id,
+            _dias(Hito.fechaInicioHito, dialecto), _dias(Hito.fechaFinalizacionHito, dialecto),
+            Hito.avanceHito,
+            # Con el esquema normalizado el comparador lo resuelve contra estado_id
+            case((Hito.estadoHito == ESTADO_COMPLETADO, 1), else_=0),
+        )
+    )
+    # Tuplas crudas del cursor DBAPI: son todos números y armar un Row por
+    # fila (y que NumPy los recorra como secuencias) cuesta más que el cálculo
+    try:
+        filas = resultado.cursor.fetchall()
+    finally:
+        resultado.close()
+    hitos = np.array(filas, dtype=np.float64).reshape(len(filas), 6)
+    # Pocas filas al lado de los hitos: vp y área se cruzan por indicador_id en memoria
+    indicadores = db.execute(select(Indicador.id, Indicador.vp, Indicador.area)).all()
+    return hitos, indicadores
+
+# ===================================================
+# 🧮 CÁLCULO
+# ===================================================
+
+class AnalisisRiesgo:
+    """Métricas de riesgo de todos los hitos, como arreglos alineados por posición"""
+
+    def __init__(self, hitos: np.ndarray, indicadores: list, hoy: date):
+        self.hoy = hoy
+        ahora = float((hoy - _EPOCA).days)
+        self.hito_id = hitos[:, 0].astype(np.int64)
+        indicador_id = hitos[:, 1]
+        inicio, fin, avance = hitos[:, 2], hitos[:, 3], hitos[:, 4]
+
+        # vp/área de cada hito: código de grupo por indicador, buscado con searchsorted
+        grupos: Dict[tuple, int] = {}
+        ids = np.array([fila[0] for fila in indicadores], dtype=np.float64)
+        codigos = np.array([grupos.setdefault((fila[1], fila[2]), len(grupos)) for fila in indicadores], dtype=np.int64)
+        orden = np.argsort(ids)
+        ids, codigos = ids[orden], codigos[orden]
+        posicion = np.minimum(np.searchsorted(ids, indicador_id), max(len(ids) - 1, 0))
+        encontrado = (ids[posicion] == indicador_id) if len(ids) else np.zeros(len(indicador_id), dtype=bool)
+        sin_grupo = grupos.setdefault((None, None), len(grupos))
+        self.grupos: List[tuple] = list(grupos)
+        self.grupo = np.where(encontrado, codigos[posicion] if len(ids) else 0, sin_grupo)
+        self.indicador_id = np.nan_to_num(indicador_id, nan=0).astype(np.int64)
+
+        self.avance = np.clip(np.nan_to_num(avance, nan=0.0), 0, 100)
+        completado = (hitos[:, 5] == 1) | (self.avance >= 100)
+        sin_fechas = np.isnan(fin) & ~completado
+        pendiente = ~completado & ~sin_fechas
+        # Sin inicio se toma el fin: el avance esperado salta a 100 al vencer
+        inicio = np.where(np.isnan(inicio), fin, inicio)
+        duracion = np.maximum(fin - inicio, 1)
+        self.fin = fin
+        with np.errstate(invalid="ignore"):
+            self.esperado = np.where(pendiente, np.clip((ahora - inicio) / duracion, 0, 1) * 100, np.where(completado, 100.0, 0.0))
+            self.brecha = np.where(pendiente, np.maximum(self.esperado - self.avance, 0), 0.0)
+            self.dias_vencido = np.where(pendiente, np.maximum(ahora - fin, 0), 0.0)
+        # Hasta 50 por la brecha (un vencido ya tiene brecha = lo que falta) y
+        # hasta 50 más por los días de atraso, en proporción a lo que falta
+        self.puntaje = 0.5 * self.brecha + 50 * (1 - self.avance / 100) * np.minimum(self.dias_vencido / RIESGO_DIAS_SATURACION, 1)
+        self.nivel = np.select(
+            [completado, sin_fechas, self.dias_vencido > 0, self.brecha >= RIESGO_BRECHA_MINIMA],
+            [COMPLETADO, SIN_FECHAS, VENCIDO, EN_RIESGO],
+            AL_DIA,
+        )
+        self.resumen = self._agregar(np.zeros(len(self.nivel), dtype=np.int64), 1, vacios=True)[0][1]
+        nombres_vp = sorted({vp for vp, _ in self.grupos}, key=lambda v: (v is None, v or ""))
+        vp_de_grupo = np.array([nombres_vp.index(vp) for vp, _ in self.grupos], dtype=np.int64)
+        self.por_vp = [{"vp": nombres_vp[i], **fila} for i, fila in self._agregar(vp_de_grupo[self.grupo], len(nombres_vp))]
+        self.por_area = [{"vp": self.grupos[i][0], "area": self.grupos[i][1], **fila}
+                         for i, fila in self._agregar(self.grupo, len(self.grupos))]
+
+    def _agregar(self, codigo: np.ndarray, n: int, vacios: bool = False) -> List[tuple]:
+        """[(código, métricas)] con bincount, de mayor a menor riesgo total; sin `vacios`, omite los códigos sin hitos"""
+        contar = lambda nivel: np.bincount(codigo[self.nivel == nivel], minlength=n)
+        total = np.bincount(codigo, minlength=n)
+        completados, vencidos, en_riesgo = contar(COMPLETADO), contar(VENCIDO), contar(EN_RIESGO)
+        pendientes = total - completados
+        puntaje = np.bincount(codigo, weights=self.puntaje, minlength=n)
+        dias = np.bincount(codigo, weights=self.dias_vencido, minlength=n)
+        maximo = np.zeros(n)
+        np.maximum.at(maximo, codigo, self.puntaje)
+        return [
+            (int(i), {
+                "totalHitos": int(total[i]),
+                "hitosCompletados": int(completados[i]),
+                "hitosVencidos": int(vencidos[i]),
+                "hitosEnRiesgo": int(en_riesgo[i]),
+                "diasVencidoPromedio": round(float(dias[i] / vencidos[i]), 1) if vencidos[i] else 0,
+                "puntajePromedio": round(float(puntaje[i] / pendientes[i]), 1) if pendientes[i] else 0,
+                "puntajeMaximo": round(float(maximo[i]), 1),
+            })
+            for i in np.argsort(-puntaje, kind="stable") if total[i] or vacios
+        ]
+
+    def ranking(self, limite: int = RIESGO_LIMITE, vp: Optional[str] = None, area: Optional[str] = None,
+                nivel: Optional[str] = None) -> np.ndarray:
+        """Posiciones de los `limite` hitos con más riesgo (puntaje > 0), con filtros opcionales"""
+        mascara = self.puntaje > 0
+        if vp is not None or area is not None:
+            elegidos = [i for i, (g_vp, g_area) in enumerate(self.grupos)
+                        if (vp is None or g_vp == vp) and (area is None or g_area == area)]
+            mascara &= np.isin(self.grupo, elegidos)
+        if nivel is not None:
+            mascara &= self.nivel == NIVELES.index(nivel)
+        candidatos = np.flatnonzero(mascara)
+        if len(candidatos) > limite:
+            candidatos = candidatos[np.argpartition(-self.puntaje[candidatos], limite - 1)[:limite]]
+        # Mayor puntaje primero; a igual puntaje, más días vencido y luego el id
+        orden = np.lexsort((self.hito_id[candidatos], -self.dias_vencido[candidatos], -self.puntaje[candidatos]))
+        return candidatos[orden]
+
+def analizar(db: Session, hoy: Optional[date] = None) -> AnalisisRiesgo:
+    """Análisis sin caché (riesgo.py, benchmarks)"""
+    hitos, indicadores = _cargar(db)
+    return AnalisisRiesgo(hitos, indicadores, hoy or date.today())
+
+def obtener(db: Session, hoy: Optional[date] = None) -> AnalisisRiesgo:
+    """Análisis a `hoy`. Solo se cachea el de la fecha actual, con una clave fija:
+    otras fechas (?hoy=) se calculan cada vez y la caché nunca pasa de una entrada.
+    """
+    actual = date.today()
+    if hoy is not None and hoy != actual:
+        return analizar(db, hoy)
+    analisis = cache_riesgo.obtener("hoy", lambda: analizar(db, actual))
+    if analisis.hoy != actual:
+        # Cambió el día desde que se guardó: el de ayer ya no sirve
+        cache_riesgo.limpiar()
+        analisis = cache_riesgo.obtener("hoy", lambda: analizar(db, actual))
+    return analisis
+
+# ===================================================
+# 📋 REPORTE
+# ===================================================
+
+def _fecha(dias: float) -> Optional[str]:
+    return None if np.isnan(dias) else (_EPOCA + timedelta(days=int(dias))).isoformat()
+
+def reporte(db: Session, analisis: AnalisisRiesgo, limite: int = RIESGO_LIMITE, vp: Optional[str] = None,
+            area: Optional[str] = None, nivel: Optional[str] = None) -> dict:
+    """Hitos ordenados por riesgo (con sus nombres) y agregados por vp y área"""
+    posiciones = analisis.ranking(limite, vp=vp, area=area, nivel=nivel)
+    ids = [int(i) for i in analisis.hito_id[posiciones]]
+    # Los textos solo de los hitos que se devuelven, no de todos (en tandas: límite de parámetros de SQLite)
+    nombres = {}
+    for desde in range(0, len(ids), 5000):
+        nombres.update((fila[0], fila[1:]) for fila in db.execute(
+            select(Hito.id, Hito.nombreHito, Hito.responsableHito, Hito.estadoHito, Indicador.nombreIndicador)
+            .join(Indicador, Indicador.id == Hito.indicador_id)
+            .where(Hito.id.in_(ids[desde:desde + 5000]))
+        ).all())
+    hitos = []
+    for posicion, hito_id in zip(posiciones, ids):
+        nombre, responsable, estado, indicador = nombres.get(hito_id, (None, None, None, None))
+        g_vp, g_area = analisis.grupos[analisis.grupo[posicion]]
+        hitos.append({
+            "id": hito_id,
+            "indicador_id": int(analisis.indicador_id[posicion]),
+            "nombreIndicador": indicador,
+            "nombreHito": nombre,
+            "vp": g_vp, "area": g_area,
+            "responsableHito": responsable,
+            "estadoHito": estado,
+            "fechaFinalizacionHito": _fecha(analisis.fin[posicion]),
+            "avanceHito": round(float(analisis.avance[posicion]), 1),
+            "avanceEsperado": round(float(analisis.esperado[posicion]), 1),
+            "brecha": round(float(analisis.brecha[posicion]), 1),
+            "diasVencido": int(analisis.dias_vencido[posicion]),
+            "puntajeRiesgo": round(float(analisis.puntaje[posicion]), 1),
+            "nivelRiesgo": NIVELES[analisis.nivel[posicion]],
+        })
+    return {
+        "hoy": analisis.hoy.isoformat(),
+        "resumen": analisis.resumen,
+        "porVp": analisis.por_vp,
+        "porArea": analisis.por_area,
+        "hitos": hitos,
+    }
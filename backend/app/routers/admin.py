@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from app.auth import requerir_admin
+from app import consultas_lentas
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(requerir_admin)])
+
+def _json_utf8(content):
+    return JSONResponse(
+        content=content,
+        headers={"Content-Type": "application/json; charset=utf-8"}
+    )
+
+@router.get("/consultas-lentas")
+async def read_consultas_lentas(
+    orden: str = Query("total", pattern="^(total|cantidad|max|promedio)$"),
+    limit: int = Query(20, ge=1, le=500),
+):
+    """Sentencias más costosas de todos los workers, con su plan y las rutas que las ejecutan"""
+    consultas, workers = await run_in_threadpool(consultas_lentas.top, orden, limit)
+    return _json_utf8({
+        "activo": consultas_lentas.CONSULTAS_LENTAS_ACTIVO,
+        "umbral_ms": consultas_lentas.CONSULTAS_LENTAS_MS,
+        "orden": orden,
+        "workers": workers,
+        "consultas": consultas,
+    })
+
+@router.delete("/consultas-lentas")
+async def delete_consultas_lentas():
+    """Vacía el registro de consultas lentas en todos los workers"""
+    await run_in_threadpool(consultas_lentas.limpiar)
+    return _json_utf8({"message": "Registro de consultas lentas vaciado"})
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from app.auth import (
+    Token, User, LoginSaturado, authenticate_user_async, create_access_token, get_current_active_user,
+)
+from app.almacen import sin_bloquear
+from app.security import security_monitor, get_client_ip
+
+router = APIRouter(tags=["auth"])
+
+@router.post("/token", response_model=Token)
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    """Entrega un JWT a cambio de usuario y contraseña (bcrypt corre fuera del event loop)"""
+    ip = get_client_ip(request)
+    if await sin_bloquear(security_monitor.almacen, security_monitor.is_blocked, ip):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="IP temporarily blocked due to suspicious activity",
+        )
+    try:
+        user = await authenticate_user_async(form_data.username, form_data.password)
+    except LoginSaturado:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiados inicios de sesión en curso, reintente en unos segundos",
+            headers={"Retry-After": "1"},
+        )
+    if not user:
+        await sin_bloquear(security_monitor.almacen, security_monitor.log_failed_attempt, ip, "/token", "Credenciales inválidas")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario o contraseña incorrectos",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if user.disabled:
+        raise HTTPException(status_code=400, detail="Usuario inactivo")
+    return {"access_token": create_access_token({"sub": user.username}), "token_type": "bearer"}
+
+@router.get("/users/me", response_model=User)
+async def read_users_me(current_user: User = Depends(get_current_active_user)):
+    return current_user
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
+from app.auth import requerir_admin
 from app.database import get_db
-from app.crud.indicador import get_indicadores, get_indicador, create_indicador, update_indicador, delete_indicador, get_indicadores_by_area, get_estadisticas
+from app.replica import get_db_lectura
+from app.crud.indicador import get_indicadores, get_indicador, create_indicador, update_indicador, delete_indicador, borrar_indicadores, get_indicadores_by_area, get_estadisticas, get_indicadores_proyectados, parsear_campos, get_dimensiones, contar_indicadores
 from app.schemas.indicador import Indicador, IndicadorCreate, IndicadorUpdate
+from app.archivo import get_archivados, get_archivado
+from app.busqueda import FTSNoDisponible, buscar
+from app.cache import CacheVersionado
+from app.cache_respuestas import respuestas
+from app.coalescencia import vuelo
+from app import cambios, instantanea
+import os
 import json
 
 router = APIRouter(
@@ -12,67 +23,230 @@ router = APIRouter(
     tags=["indicadores"]
 )
 
+# Valores de los filtros (vps, áreas, responsables, estados); se invalida con cada escritura
+cache_dimensiones = CacheVersionado(ttl=int(os.getenv("DIMENSIONES_TTL_SEGUNDOS", "300")))
+DIMENSIONES = ("vps", "areas", "responsables", "estados")
+
 @router.post("/", response_model=Indicador)
 def create_indicador_endpoint(indicador: IndicadorCreate, db: Session = Depends(get_db)):
     return create_indicador(db, indicador)
 
-@router.get("/", response_model=List[Indicador])
-def read_indicadores_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    indicadores = get_indicadores(db, skip=skip, limit=limit)
-    
-    # Convertir a dict para serialización manual
-    data = []
-    for indicador in indicadores:
-        indicador_dict = {
-            "id": indicador.id,
-            "vp": indicador.vp,
-            "area": indicador.area,
-            "nombreIndicador": indicador.nombreIndicador,
-            "tipoIndicador": indicador.tipoIndicador,
-            "fechaInicioGeneral": indicador.fechaInicioGeneral.isoformat() if indicador.fechaInicioGeneral else None,
-            "fechaFinalizacionGeneral": indicador.fechaFinalizacionGeneral.isoformat() if indicador.fechaFinalizacionGeneral else None,
-            "responsableGeneral": indicador.responsableGeneral,
-            "responsableCargaGeneral": indicador.responsableCargaGeneral,
-            "created_at": indicador.created_at.isoformat() if indicador.created_at else None,
-            "updated_at": indicador.updated_at.isoformat() if indicador.updated_at else None,
-            "hitos": []
-        }
-        
-        # Agregar hitos
-        for hito in indicador.hitos:
-            hito_dict = {
-                "id": hito.id,
-                "idHito": hito.id,  # Compatibilidad con frontend
-                "indicador_id": hito.indicador_id,
-                "nombreHito": hito.nombreHito,
-                "fechaInicioHito": hito.fechaInicioHito.isoformat() if hito.fechaInicioHito else None,
-                "fechaFinalizacionHito": hito.fechaFinalizacionHito.isoformat() if hito.fechaFinalizacionHito else None,
-                "avanceHito": hito.avanceHito,
-                "estadoHito": hito.estadoHito,
-                "responsableHito": hito.responsableHito,
-                "created_at": hito.created_at.isoformat() if hito.created_at else None,
-                "updated_at": hito.updated_at.isoformat() if hito.updated_at else None,
-            }
-            indicador_dict["hitos"].append(hito_dict)
-        
-        data.append(indicador_dict)
-    
-    # Devolver respuesta JSON con UTF-8 explícito
+def _campos_o_400(fields: str):
+    try:
+        return parsear_campos(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _json_utf8(content):
     return JSONResponse(
-        content=data,
+        content=content,
         headers={"Content-Type": "application/json; charset=utf-8"}
     )
 
+def _clave_campos(fields: Optional[str]) -> str:
+    """?fields normalizado para la clave de caché (valida y ordena)"""
+    if not fields:
+        return ""
+    campos_indicador, campos_hito = _campos_o_400(fields)
+    return ",".join(sorted(campos_indicador) + [f"hitos.{c}" for c in sorted(campos_hito)])
+
+async def _cacheada(clave: str, etiquetas, calcular):
+    """Respuesta JSON desde la caché de respuestas; `calcular` devuelve el contenido a codificar.
+
+    Un hit local se responde sin salir del event loop. En un miss, los
+    requests concurrentes con la misma clave comparten un solo cálculo.
+    """
+    cuerpo = respuestas.obtener_local(clave)
+    origen = "local"
+    if cuerpo is None:
+        cuerpo, origen = await vuelo("respuestas").ejecutar(
+            clave, lambda: respuestas.obtener_o_calcular(clave, etiquetas, lambda: _json_utf8(calcular()).body)
+        )
+    return Response(
+        content=cuerpo,
+        headers={
+            "Content-Type": "application/json; charset=utf-8",
+            "X-Cache": "MISS" if origen == "calculado" else "HIT",
+        },
+    )
+
+@router.get("/", response_model=List[Indicador])
+async def read_indicadores_endpoint(request: Request, skip: int = 0, limit: int = 100, fields: Optional[str] = None, include_archived: bool = False, db: Session = Depends(get_db_lectura)):
+    """Lista indicadores; `fields=vp,area,hitos.nombreHito` limita las columnas leídas.
+
+    Con `include_archived=true` siguen los archivados después de los activos.
+    """
+    if include_archived:
+        if fields:
+            raise HTTPException(status_code=400, detail="fields no se puede combinar con include_archived")
+        clave = f"lista-archivados:{skip}:{limit}"
+        return await _cacheada(clave, ["listado"], lambda: _listar_con_archivados(db, skip, limit))
+    if not fields:
+        servida = instantanea.servir_listado(skip, limit, request.headers.get("accept-encoding", ""))
+        if servida is not None:
+            return servida
+    clave = f"lista:{skip}:{limit}:{_clave_campos(fields)}"
+    return await _cacheada(clave, ["listado"], lambda: _listar(db, skip, limit, fields))
+
+def _listar(db: Session, skip: int, limit: int, fields: Optional[str]):
+    if fields:
+        campos_indicador, campos_hito = _campos_o_400(fields)
+        return get_indicadores_proyectados(db, campos_indicador, campos_hito, skip=skip, limit=limit)
+
+    return [_indicador_dict(indicador) for indicador in get_indicadores(db, skip=skip, limit=limit)]
+
+def _indicador_dict(indicador):
+    """Serialización manual de un indicador con sus hitos (activo o archivado)"""
+    indicador_dict = {
+        "id": indicador.id,
+        "vp": indicador.vp,
+        "area": indicador.area,
+        "nombreIndicador": indicador.nombreIndicador,
+        "tipoIndicador": indicador.tipoIndicador,
+        "fechaInicioGeneral": indicador.fechaInicioGeneral.isoformat() if indicador.fechaInicioGeneral else None,
+        "fechaFinalizacionGeneral": indicador.fechaFinalizacionGeneral.isoformat() if indicador.fechaFinalizacionGeneral else None,
+        "responsableGeneral": indicador.responsableGeneral,
+        "responsableCargaGeneral": indicador.responsableCargaGeneral,
+        "created_at": indicador.created_at.isoformat() if indicador.created_at else None,
+        "updated_at": indicador.updated_at.isoformat() if indicador.updated_at else None,
+        "hitos": []
+    }
+    archivado_at = getattr(indicador, "archivado_at", None)
+    if archivado_at is not None:
+        indicador_dict["archivado_at"] = archivado_at.isoformat()
+
+    # Agregar hitos
+    for hito in indicador.hitos:
+        hito_dict = {
+            "id": hito.id,
+            "idHito": hito.id,  # Compatibilidad con frontend
+            "indicador_id": hito.indicador_id,
+            "nombreHito": hito.nombreHito,
+            "fechaInicioHito": hito.fechaInicioHito.isoformat() if hito.fechaInicioHito else None,
+            "fechaFinalizacionHito": hito.fechaFinalizacionHito.isoformat() if hito.fechaFinalizacionHito else None,
+            "avanceHito": hito.avanceHito,
+            "estadoHito": hito.estadoHito,
+            "responsableHito": hito.responsableHito,
+            "created_at": hito.created_at.isoformat() if hito.created_at else None,
+            "updated_at": hito.updated_at.isoformat() if hito.updated_at else None,
+        }
+        indicador_dict["hitos"].append(hito_dict)
+    return indicador_dict
+
+def _listar_con_archivados(db: Session, skip: int, limit: int):
+    """Primero los activos y, al agotarse, los archivados (ambos por id)"""
+    data = _listar(db, skip, limit, None)
+    if len(data) < limit:
+        archivados = get_archivados(db, skip=max(0, skip - contar_indicadores(db)), limit=limit - len(data))
+        data += [_indicador_dict(indicador) for indicador in archivados]
+    return data
+
 @router.get("/area/{area}", response_model=List[Indicador])
-def read_indicadores_by_area(area: str, db: Session = Depends(get_db)):
-    return get_indicadores_by_area(db, area=area)
+async def read_indicadores_by_area(area: str, fields: Optional[str] = None, db: Session = Depends(get_db_lectura)):
+    def calcular():
+        if fields:
+            campos_indicador, campos_hito = _campos_o_400(fields)
+            return get_indicadores_proyectados(db, campos_indicador, campos_hito, area=area)
+        # Misma serialización que haría response_model
+        return jsonable_encoder([Indicador.model_validate(i) for i in get_indicadores_by_area(db, area=area)])
+
+    return await _cacheada(f"area:{area}:{_clave_campos(fields)}", [f"area:{area}"], calcular)
+
+@router.get("/buscar")
+async def buscar_endpoint(
+    q: str = Query(..., min_length=2, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db_lectura),
+):
+    """Búsqueda sin acentos y tolerante a errores en indicadores, hitos, áreas y responsables"""
+    try:
+        resultado = await vuelo("buscar").ejecutar((q, skip, limit), lambda: buscar(db, q, skip=skip, limit=limit))
+    except FTSNoDisponible as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return _json_utf8(resultado)
+
+@router.get("/dimensiones")
+def dimensiones_endpoint(db: Session = Depends(get_db_lectura)):
+    """Todas las listas de filtros con sus conteos en una sola respuesta"""
+    return _json_utf8(cache_dimensiones.obtener("todas", lambda: get_dimensiones(db)))
+
+@router.get("/dimensiones/{dimension}")
+def dimension_endpoint(dimension: str, vp: Optional[str] = None, db: Session = Depends(get_db_lectura)):
+    """Una sola lista de filtro (vps, areas, responsables, estados); `areas?vp=VPD` filtra por VP"""
+    if dimension not in DIMENSIONES:
+        raise HTTPException(status_code=404, detail=f"Dimensión desconocida: {dimension}")
+    valores = cache_dimensiones.obtener("todas", lambda: get_dimensiones(db))[dimension]
+    if dimension == "areas" and vp is not None:
+        valores = valores.get(vp, [])
+    return _json_utf8(valores)
+
+@router.get("/archivados")
+def archivados_endpoint(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), db: Session = Depends(get_db_lectura)):
+    """Indicadores cerrados movidos al archivo, con sus hitos y `archivado_at`"""
+    return _json_utf8([_indicador_dict(indicador) for indicador in get_archivados(db, skip=skip, limit=limit)])
+
+@router.get("/archivados/{indicador_id}")
+def archivado_endpoint(indicador_id: int, db: Session = Depends(get_db_lectura)):
+    archivado = get_archivado(db, indicador_id)
+    if archivado is None:
+        raise HTTPException(status_code=404, detail="Indicador archivado not found")
+    return _json_utf8(_indicador_dict(archivado))
+
+@router.get("/cambios")
+def cambios_endpoint(token: Optional[str] = None, limit: int = Query(cambios.CAMBIOS_LIMITE, ge=1, le=5000), db: Session = Depends(get_db_lectura)):
+    """Indicadores creados o modificados y id borrados desde `token` (ver app/cambios.py).
+
+    Sin token, o si ya no se puede responder desde él, `completo: true`: recargar
+    todo y seguir con el token devuelto. Con `hay_mas: true`, volver a pedir.
+    """
+    try:
+        resultado = cambios.desde(db, cambios.leer_token(token), limite=limit)
+    except cambios.TokenInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    resultado["indicadores"] = [_indicador_dict(indicador) for indicador in resultado["indicadores"]]
+    return _json_utf8(resultado)
+
+@router.get("/riesgo")
+async def riesgo_endpoint(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    vp: Optional[str] = None,
+    area: Optional[str] = None,
+    nivel: Optional[str] = None,
+    hoy: Optional[date] = None,
+    db: Session = Depends(get_db_lectura),
+):
+    """Hitos vencidos o atrasados respecto de lo esperado, del más al menos riesgoso, y agregados por vp y área.
+
+    `nivel` filtra por en_riesgo o vencido; `hoy` calcula a otra fecha (ver app/riesgo.py).
+    """
+    # Import diferido: NumPy se carga con el primer análisis, no al arrancar el worker
+    from app import riesgo
+
+    limit = limit or riesgo.RIESGO_LIMITE
+    if nivel is not None and nivel not in riesgo.NIVELES:
+        raise HTTPException(status_code=400, detail=f"Nivel desconocido: {nivel}")
+    resultado = await vuelo("riesgo").ejecutar(
+        (limit, vp, area, nivel, hoy),
+        lambda: riesgo.reporte(db, riesgo.obtener(db, hoy), limite=limit, vp=vp, area=area, nivel=nivel),
+    )
+    return _json_utf8(resultado)
 
 @router.get("/{indicador_id}", response_model=Indicador)
-def read_indicador_endpoint(indicador_id: int, db: Session = Depends(get_db)):
-    db_indicador = get_indicador(db, indicador_id=indicador_id)
-    if db_indicador is None:
-        raise HTTPException(status_code=404, detail="Indicador not found")
-    return db_indicador
+async def read_indicador_endpoint(indicador_id: int, fields: Optional[str] = None, db: Session = Depends(get_db_lectura)):
+    def calcular():
+        if fields:
+            campos_indicador, campos_hito = _campos_o_400(fields)
+            data = get_indicadores_proyectados(db, campos_indicador, campos_hito, indicador_id=indicador_id)
+            if not data:
+                raise HTTPException(status_code=404, detail="Indicador not found")
+            return data[0]
+        db_indicador = get_indicador(db, indicador_id=indicador_id)
+        if db_indicador is None:
+            raise HTTPException(status_code=404, detail="Indicador not found")
+        return jsonable_encoder(Indicador.model_validate(db_indicador))
+
+    return await _cacheada(f"indicador:{indicador_id}:{_clave_campos(fields)}", [f"indicador:{indicador_id}"], calcular)
 
 @router.put("/{indicador_id}", response_model=Indicador)
 def update_indicador_endpoint(indicador_id: int, indicador: IndicadorUpdate, db: Session = Depends(get_db)):
@@ -88,9 +262,28 @@ def delete_indicador_endpoint(indicador_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Indicador not found")
     return {"ok": True}
 
+@router.delete("/", dependencies=[Depends(requerir_admin)])
+def delete_indicadores_endpoint(vp: Optional[str] = None, area: Optional[str] = None, ids: Optional[str] = None, db: Session = Depends(get_db)):
+    """Borra en lotes los indicadores que cumplen todos los filtros (`?vp=VPD&area=Legal`, `?ids=1,2,3`).
+
+    Puede vaciar una VP entera y no se deshace: solo ADMIN_USUARIOS.
+    """
+    # Sin filtros sería borrar todo: eso queda para cargar_datos.py
+    if vp is None and area is None and ids is None:
+        raise HTTPException(status_code=400, detail="Indicar al menos un filtro: vp, area o ids")
+    try:
+        lista_ids = [int(i) for i in ids.split(",") if i.strip()] if ids is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"ids inválidos: {ids}")
+    return {"ok": True, "borrados": borrar_indicadores(db, vp=vp, area=area, ids=lista_ids)}
+
 @router.get("/estadisticas/dashboard")
-def get_estadisticas_endpoint(db: Session = Depends(get_db)):
-    return get_estadisticas(db)
+async def get_estadisticas_endpoint(request: Request, db: Session = Depends(get_db_lectura)):
+    servida = instantanea.servir_estadisticas(request.headers.get("accept-encoding", ""))
+    if servida is not None:
+        return servida
+    # Tras cada escritura todos los dashboards piden esto a la vez: un solo cálculo por worker
+    return await vuelo("estadisticas").ejecutar("dashboard", lambda: get_estadisticas(db))
 
 @router.post("/cargar-datos")
 def cargar_datos_endpoint(db: Session = Depends(get_db)):
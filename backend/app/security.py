@@ -3,25 +3,79 @@
 Implementa rate limiting, validaciones y protecciones adicionales
 """
 
+import atexit
+import math
 import os
-import time
-from typing import Dict, Optional
+import queue
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 from fastapi import Request, HTTPException, status
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from jose import JWTError
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from starlette.responses import JSONResponse
+from .almacen import crear_almacen, sin_bloquear
+from .auth import verificar_token
 
 # ===================================================
 # 🚦 CONFIGURACIÓN RATE LIMITING
 # ===================================================
 
-# Configuración desde variables de entorno
+# Configuración desde variables de entorno: límite por defecto por usuario
+# (sub del JWT) o, sin token válido, por IP del cliente
 RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
 
-# Inicializar rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Límites por ruta: "[MÉTODO ]/prefijo=requests/segundos" separados por ";"
+RATE_LIMIT_RUTAS = os.getenv("RATE_LIMIT_RUTAS", "POST /token=10/60")
+RATE_LIMIT_EXENTAS = ("/health",)
+# Health checks de Railway y monitoreo: sin bloqueos por IP ni log de acceso (también /health/...)
+SECURITY_EXENTAS = ("/health",)
+
+class ReglaLimite(NamedTuple):
+    nombre: str
+    metodo: Optional[str]
+    prefijo: str
+    requests: int
+    ventana: float
+
+    @property
+    def intervalo(self) -> float:
+        return self.ventana / self.requests
+
+    @property
+    def tolerancia(self) -> float:
+        # Permite gastar todo el cupo de la ventana en una ráfaga
+        return self.ventana - self.intervalo
+
+def parsear_reglas(texto: str) -> List[ReglaLimite]:
+    """Convierte RATE_LIMIT_RUTAS en reglas, de la más específica a la más general"""
+    reglas = []
+    for parte in filter(None, (p.strip() for p in texto.split(";"))):
+        ruta, _, limite = parte.rpartition("=")
+        requests, _, segundos = limite.partition("/")
+        metodo, _, prefijo = ruta.strip().rpartition(" ")
+        if not prefijo.startswith("/") or not requests.isdigit() or not segundos.isdigit():
+            raise ValueError(f"Regla de rate limit inválida: {parte!r}")
+        reglas.append(ReglaLimite(parte, metodo.upper() or None, prefijo, int(requests), float(segundos)))
+    return sorted(reglas, key=lambda r: (len(r.prefijo), r.metodo is not None), reverse=True)
+
+# Intentos fallidos: más de SECURITY_MAX_INTENTOS en la ventana bloquean la IP.
+# Con REDIS_URL el conteo y los bloqueos se comparten entre workers.
+SECURITY_MAX_INTENTOS = int(os.getenv("SECURITY_MAX_INTENTOS", "10"))
+SECURITY_VENTANA_SEGUNDOS = int(os.getenv("SECURITY_VENTANA_SEGUNDOS", "3600"))
+SECURITY_BUCKETS = int(os.getenv("SECURITY_BUCKETS", "12"))
+SECURITY_BLOQUEO_SEGUNDOS = int(os.getenv("SECURITY_BLOQUEO_SEGUNDOS", "900"))
+SECURITY_MAX_MEMORIA_MB = int(os.getenv("SECURITY_MAX_MEMORIA_MB", "16"))
+REDIS_URL = os.getenv("REDIS_URL")
+# Proxies delante de la app que agregan su salto a X-Forwarded-For (Railway: 1).
+# Con 0 se usa la IP de la conexión y el header se ignora: lo puede escribir cualquiera
+SECURITY_PROXIES_CONFIABLES = int(os.getenv("SECURITY_PROXIES_CONFIABLES", "0"))
+
+# Patrones adicionales separados por coma (se comparan como palabra completa)
+SECURITY_PATRONES_EXTRA = [
+    p.strip().lower() for p in os.getenv("SECURITY_PATRONES_EXTRA", "").split(",") if p.strip()
+]
 
 # ===================================================
 # 📊 LOGGING DE SEGURIDAD
@@ -31,72 +85,140 @@ limiter = Limiter(key_func=get_remote_address)
 security_logger = logging.getLogger("security")
 security_logger.setLevel(logging.INFO)
 
-# Handler para logs de seguridad
-if not security_logger.handlers:
+# Handler para logs de seguridad: el request solo encola el registro y un
+# hilo aparte lo escribe, para no bloquear el event loop con I/O
+_cola_logs: "queue.SimpleQueue" = queue.SimpleQueue()
+_listener_logs: Optional[QueueListener] = None
+
+def _iniciar_listener_logs():
+    global _listener_logs
     handler = logging.StreamHandler()
     formatter = logging.Formatter(
         '%(asctime)s - SECURITY - %(levelname)s - %(message)s'
     )
     handler.setFormatter(formatter)
-    security_logger.addHandler(handler)
+    _listener_logs = QueueListener(_cola_logs, handler)
+    _listener_logs.start()
+
+def _detener_listener_logs():
+    if _listener_logs is not None and _listener_logs._thread is not None:
+        _listener_logs.stop()
+
+if not security_logger.handlers:
+    security_logger.addHandler(QueueHandler(_cola_logs))
+    _iniciar_listener_logs()
+    atexit.register(_detener_listener_logs)
+    # Los hilos no sobreviven al fork (gunicorn --preload): cada worker arranca el suyo
+    os.register_at_fork(after_in_child=_iniciar_listener_logs)
 
 # ===================================================
 # 🔍 DETECCIÓN DE ATAQUES
 # ===================================================
 
+# (patrón, palabra_completa). Palabra completa exige que no haya letras
+# pegadas en los bordes: "script" no debe marcar "descripción" ni "suscripción".
+DEFAULT_SUSPICIOUS_PATTERNS: Tuple[Tuple[str, bool], ...] = (
+    ("script", True),
+    ("javascript:", False),
+    ("onclick", False),
+    ("onerror", False),
+    ("onload", False),
+    ("<script", False),
+    ("</script>", False),
+    ("eval(", False),
+    ("document.cookie", False),
+    ("union select", False),
+    ("drop table", False),
+    ("insert into", False),
+    ("delete from", False),
+    ("../", False),
+    ("..\\", False),
+    ("cmd.exe", False),
+    ("/bin/bash", False),
+    ("nc -l", False),
+    ("wget", True),
+    ("curl", True),
+)
+
+Patron = Union[str, Tuple[str, bool]]
+
+class DetectorPatrones:
+    """Busca todos los patrones en una sola pasada sobre el texto.
+
+    Los patrones se compilan en un único regex con forma de trie (los
+    prefijos comunes se comparten), así que el costo por carácter no crece
+    con la cantidad de patrones como lo hacían N búsquedas `in` seguidas.
+    """
+
+    def __init__(self, patrones: Iterable[Patron]):
+        self.patrones = [(p, False) if isinstance(p, str) else (p[0], p[1]) for p in patrones]
+        self._regex = re.compile(self._trie_regex(self.patrones)) if self.patrones else None
+
+    @staticmethod
+    def _trie_regex(patrones) -> str:
+        trie: Dict = {}
+        for texto, palabra in patrones:
+            fichas = [re.escape(c) for c in texto.lower()]
+            if palabra and re.match(r"\w", texto[0]):
+                fichas.insert(0, r"\b")
+            if palabra and re.match(r"\w", texto[-1]):
+                fichas.append(r"\b")
+            nodo = trie
+            for ficha in fichas:
+                if nodo.get("") is not None:
+                    break  # un prefijo ya es patrón completo: basta con él
+                nodo = nodo.setdefault(ficha, {})
+            else:
+                nodo.clear()
+                nodo[""] = True
+
+        def armar(nodo) -> str:
+            if "" in nodo:
+                return ""
+            ramas = [ficha + armar(hijo) for ficha, hijo in nodo.items()]
+            return ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+
+        return armar(trie)
+
+    def buscar(self, texto: str) -> Optional[str]:
+        """Devuelve el primer fragmento sospechoso encontrado, o None"""
+        if self._regex is None:
+            return None
+        coincidencia = self._regex.search(texto.lower())
+        return coincidencia.group(0) if coincidencia else None
+
 class SecurityMonitor:
     """Monitor de seguridad para detectar patrones de ataque"""
     
-    def __init__(self):
-        self.failed_attempts: Dict[str, list] = {}
-        self.suspicious_patterns = [
-            "script",
-            "javascript:",
-            "onclick",
-            "onerror",
-            "onload",
-            "<script",
-            "</script>",
-            "eval(",
-            "document.cookie",
-            "union select",
-            "drop table",
-            "insert into",
-            "delete from",
-            "../",
-            "..\\",
-            "cmd.exe",
-            "/bin/bash",
-            "nc -l",
-            "wget",
-            "curl",
-        ]
+    def __init__(self, almacen=None, patterns: Optional[Iterable[Patron]] = None):
+        max_memoria = SECURITY_MAX_MEMORIA_MB * 1024 * 1024
+        self.almacen = almacen or crear_almacen(REDIS_URL, max_memoria_bytes=max_memoria)
+        if patterns is None:
+            patterns = list(DEFAULT_SUSPICIOUS_PATTERNS) + [(p, True) for p in SECURITY_PATRONES_EXTRA]
+        self.set_patterns(patterns)
+
+    def set_patterns(self, patterns: Iterable[Patron]):
+        """Reemplaza los patrones sospechosos y recompila el detector"""
+        self.detector = DetectorPatrones(patterns)
+        self.suspicious_patterns = [texto for texto, _ in self.detector.patrones]
     
+    def is_blocked(self, ip_address: str) -> bool:
+        """Indica si la IP está bloqueada por exceso de intentos fallidos"""
+        return self.almacen.bloqueado(ip_address)
+
     def log_failed_attempt(self, ip_address: str, endpoint: str, reason: str):
         """Registra intento fallido de acceso"""
-        current_time = time.time()
-        
-        if ip_address not in self.failed_attempts:
-            self.failed_attempts[ip_address] = []
-        
-        self.failed_attempts[ip_address].append({
-            "timestamp": current_time,
-            "endpoint": endpoint,
-            "reason": reason
-        })
-        
-        # Limpiar intentos antiguos (más de 1 hora)
-        self.failed_attempts[ip_address] = [
-            attempt for attempt in self.failed_attempts[ip_address]
-            if current_time - attempt["timestamp"] < 3600
-        ]
+        intentos = self.almacen.sumar_ventana(
+            f"fallos:{ip_address}", SECURITY_VENTANA_SEGUNDOS, SECURITY_BUCKETS
+        )
         
         security_logger.warning(
             f"Failed attempt from {ip_address} on {endpoint}: {reason}"
         )
         
         # Bloquear IP si hay muchos intentos fallidos
-        if len(self.failed_attempts[ip_address]) > 10:
+        if intentos > SECURITY_MAX_INTENTOS:
+            self.almacen.bloquear(ip_address, SECURITY_BLOQUEO_SEGUNDOS)
             security_logger.error(
                 f"IP {ip_address} blocked due to excessive failed attempts"
             )
@@ -107,14 +229,12 @@ class SecurityMonitor:
     
     def check_malicious_input(self, input_data: str) -> bool:
         """Verifica si el input contiene patrones maliciosos"""
-        input_lower = input_data.lower()
-        
-        for pattern in self.suspicious_patterns:
-            if pattern in input_lower:
-                security_logger.warning(
-                    f"Malicious pattern detected: {pattern} in input: {input_data[:100]}"
-                )
-                return True
+        pattern = self.detector.buscar(input_data)
+        if pattern is not None:
+            security_logger.warning(
+                f"Malicious pattern detected: {pattern} in input: {input_data[:100]}"
+            )
+            return True
         
         return False
     
@@ -137,41 +257,141 @@ security_monitor = SecurityMonitor()
 # 🔒 MIDDLEWARE DE SEGURIDAD
 # ===================================================
 
-async def security_middleware(request: Request, call_next):
-    """Middleware de seguridad para todas las requests"""
-    
-    # Obtener IP del cliente
-    client_ip = get_remote_address(request)
-    
-    # Validar tamaño de request
-    try:
-        security_monitor.validate_request_size(request)
-    except HTTPException as e:
-        security_monitor.log_failed_attempt(
-            client_ip, 
-            str(request.url), 
-            "Request too large"
-        )
-        raise e
-    
-    # Verificar headers sospechosos
-    user_agent = request.headers.get("user-agent", "")
-    if not user_agent or len(user_agent) < 10:
-        security_monitor.log_failed_attempt(
-            client_ip,
-            str(request.url),
-            "Suspicious or missing User-Agent"
-        )
-    
-    # Procesar request
-    response = await call_next(request)
-    
-    # Log de acceso exitoso
-    security_logger.info(
-        f"Access from {client_ip} to {request.url.path} - Status: {response.status_code}"
-    )
-    
-    return response
+def _exenta(ruta: str, prefijos: Tuple[str, ...]) -> bool:
+    """La ruta es uno de los prefijos o está debajo de uno ("/health" y "/health/cache")"""
+    return any(ruta == prefijo or ruta.startswith(prefijo + "/") for prefijo in prefijos)
+
+class SecurityMiddleware:
+    """Middleware ASGI de seguridad para todas las requests salvo SECURITY_EXENTAS.
+
+    Rechaza IPs bloqueadas y bodies demasiado grandes antes de llegar a la
+    app (con Redis, la consulta corre en el threadpool), registra User-Agents
+    sospechosos y deja un log de acceso. Es ASGI
+    puro: no envuelve el body, así que las respuestas en streaming pasan
+    tal cual.
+    """
+
+    def __init__(self, app, monitor: Optional["SecurityMonitor"] = None, max_size_mb: int = 10):
+        self.app = app
+        self.monitor = monitor or security_monitor
+        self.max_size_mb = max_size_mb
+
+    async def _revisar(self, request: Request, client_ip: str):
+        almacen = self.monitor.almacen
+        if await sin_bloquear(almacen, self.monitor.is_blocked, client_ip):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="IP temporarily blocked due to suspicious activity"
+            )
+
+        # Validar tamaño de request
+        try:
+            self.monitor.validate_request_size(request, self.max_size_mb)
+        except HTTPException:
+            await sin_bloquear(almacen, self.monitor.log_failed_attempt, client_ip, str(request.url), "Request too large")
+            raise
+
+        # User-Agent sospechoso: solo se registra. No suma al bloqueo, porque
+        # cualquier cliente legítimo sin navegador (curl, health checks) lo dispara
+        user_agent = request.headers.get("user-agent", "")
+        if not user_agent or len(user_agent) < 10:
+            security_logger.warning(f"Suspicious or missing User-Agent from {client_ip} on {request.url.path}")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exenta(scope["path"], SECURITY_EXENTAS):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        client_ip = get_client_ip(request)
+        estado = {"status": 500}
+
+        async def send_con_estado(message):
+            if message["type"] == "http.response.start":
+                estado["status"] = message["status"]
+            await send(message)
+
+        try:
+            try:
+                await self._revisar(request, client_ip)
+            except HTTPException as e:
+                respuesta = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+                await respuesta(scope, receive, send_con_estado)
+                return
+            await self.app(scope, receive, send_con_estado)
+        finally:
+            # Log de acceso (se encola; lo escribe el hilo de logs)
+            security_logger.info(
+                f"Access from {client_ip} to {scope['path']} - Status: {estado['status']}"
+            )
+
+class RateLimitMiddleware:
+    """Rate limiting GCRA como middleware ASGI.
+
+    Corre antes del routing, así que un request rechazado no abre sesión
+    de BD. El estado por clave es un solo timestamp (O(1)) y vive en el
+    almacén del monitor: con REDIS_URL el límite es global entre workers y
+    la consulta a Redis corre en el threadpool, fuera del event loop.
+    """
+
+    def __init__(self, app, almacen=None, reglas: Optional[List[ReglaLimite]] = None,
+                 por_defecto: Optional[ReglaLimite] = None):
+        self.app = app
+        self.almacen = almacen or security_monitor.almacen
+        self.reglas = parsear_reglas(RATE_LIMIT_RUTAS) if reglas is None else reglas
+        self.por_defecto = por_defecto or ReglaLimite("default", None, "/", RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
+
+    def _regla(self, metodo: str, ruta: str) -> ReglaLimite:
+        for regla in self.reglas:
+            if ruta.startswith(regla.prefijo) and regla.metodo in (None, metodo):
+                return regla
+        return self.por_defecto
+
+    @staticmethod
+    def _identidad(request: Request) -> str:
+        autorizacion = request.headers.get("authorization", "")
+        if autorizacion[:7].lower() == "bearer ":
+            try:
+                return "u:" + verificar_token(autorizacion[7:])
+            except JWTError:
+                pass  # la ruta responderá 401; aquí cuenta por IP
+        return "ip:" + get_client_ip(request)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in RATE_LIMIT_EXENTAS:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        regla = self._regla(scope["method"], scope["path"])
+        clave = f"rl:{regla.nombre}:{self._identidad(request)}"
+        permitido, segundos = await sin_bloquear(self.almacen, self.almacen.gcra, clave, regla.intervalo, regla.tolerancia)
+
+        if not permitido:
+            respuesta = JSONResponse(
+                {"detail": "Demasiadas solicitudes, intente nuevamente en unos segundos"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={
+                    "Retry-After": str(math.ceil(segundos)),
+                    "X-RateLimit-Limit": str(regla.requests),
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+            await respuesta(scope, receive, send)
+            return
+
+        restantes = str(max(0, int((regla.ventana - segundos) / regla.intervalo)))
+
+        async def send_con_limites(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-ratelimit-limit", str(regla.requests).encode()),
+                    (b"x-ratelimit-remaining", restantes.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_con_limites)
 
 # ===================================================
 # 🛠️ DECORADORES DE SEGURIDAD
@@ -209,16 +429,24 @@ def validate_input_security(func):
 # ===================================================
 
 def get_client_ip(request: Request) -> str:
-    """Obtiene la IP real del cliente considerando proxies"""
-    forwarded_for = request.headers.get("x-forwarded-for")
-    if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
-    
-    real_ip = request.headers.get("x-real-ip")
-    if real_ip:
-        return real_ip
-    
-    return get_remote_address(request)
+    """IP del cliente: la que agregó en X-Forwarded-For el último proxy de confianza.
+
+    Cada proxy agrega al final la IP de quien le habló; lo que queda más a la
+    izquierda lo escribe el cliente y no sirve para identificarlo. Con
+    SECURITY_PROXIES_CONFIABLES = N se toma la N-ésima entrada desde la
+    derecha; con 0, o si el header trae menos entradas, la IP de la conexión.
+    """
+    directa = request.client.host if request.client else "127.0.0.1"
+    if SECURITY_PROXIES_CONFIABLES <= 0:
+        return directa
+    saltos = [
+        salto.strip()
+        for valor in request.headers.getlist("x-forwarded-for")
+        for salto in valor.split(",") if salto.strip()
+    ]
+    if len(saltos) < SECURITY_PROXIES_CONFIABLES:
+        return directa
+    return saltos[-SECURITY_PROXIES_CONFIABLES]
 
 def is_internal_ip(ip: str) -> bool:
     """Verifica si la IP es interna/privada"""
@@ -0,0 +1,104 @@
+"""
+📈 Estado por worker
+Cada worker cuenta sus requests y publica su memoria en un archivo por pid,
+para que cualquier worker pueda responder el estado de todos en /health/workers
+"""
+
+import json
+import os
+import resource
+import tempfile
+import time
+from typing import List
+
+WORKER_STATS_DIR = os.getenv("WORKER_STATS_DIR", os.path.join(tempfile.gettempdir(), "indicadores-workers"))
+# Cada cuánto un worker reescribe su archivo (se hace al pasar un request, no con un hilo)
+WORKER_STATS_CADA_SEGUNDOS = float(os.getenv("WORKER_STATS_CADA_SEGUNDOS", "5"))
+
+_inicio = time.time()
+_requests = 0
+_ultimo_publicado = 0.0
+
+def memoria_rss_mb() -> float:
+    """RSS actual del proceso (/proc), o el pico si no hay /proc"""
+    try:
+        with open("/proc/self/statm") as archivo:
+            paginas = int(archivo.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def estado() -> dict:
+    return {
+        "pid": os.getpid(),
+        "requests": _requests,
+        "memoria_mb": round(memoria_rss_mb(), 1),
+        "activo_segundos": round(time.time() - _inicio),
+        "actualizado": time.time(),
+    }
+
+def publicar():
+    """Escribe el estado de este worker (reemplazo atómico del archivo)"""
+    global _ultimo_publicado
+    _ultimo_publicado = time.monotonic()
+    try:
+        os.makedirs(WORKER_STATS_DIR, exist_ok=True)
+        ruta = os.path.join(WORKER_STATS_DIR, f"{os.getpid()}.json")
+        with open(ruta + ".tmp", "w") as archivo:
+            json.dump(estado(), archivo)
+        os.replace(ruta + ".tmp", ruta)
+    except OSError:
+        pass
+
+def iniciar():
+    """Al arrancar el worker (después del fork: con preload el módulo se importó en el master)"""
+    global _inicio, _requests
+    _inicio = time.time()
+    _requests = 0
+    publicar()
+
+def leer_todos() -> List[dict]:
+    """Estado publicado por los workers vivos (el propio, siempre al día)"""
+    publicar()
+    workers = []
+    try:
+        nombres = os.listdir(WORKER_STATS_DIR)
+    except OSError:
+        return [estado()]
+    for nombre in nombres:
+        if not nombre.endswith(".json"):
+            continue
+        pid = int(nombre[:-5])
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            borrar(pid)
+            continue
+        except PermissionError:
+            pass
+        try:
+            with open(os.path.join(WORKER_STATS_DIR, nombre)) as archivo:
+                workers.append(json.load(archivo))
+        except (OSError, ValueError):
+            continue
+    return sorted(workers, key=lambda w: w["pid"])
+
+def borrar(pid: int):
+    try:
+        os.remove(os.path.join(WORKER_STATS_DIR, f"{pid}.json"))
+    except OSError:
+        pass
+
+class ContadorRequestsMiddleware:
+    """Cuenta los requests HTTP del worker y publica su estado cada pocos segundos"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _requests
+        if scope["type"] == "http":
+            _requests += 1
+            if time.monotonic() - _ultimo_publicado > WORKER_STATS_CADA_SEGUNDOS:
+                publicar()
+        await self.app(scope, receive, send)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+🗄️ Archivo de indicadores cerrados
+Mueve a indicadores_archivo / hitos_archivo los indicadores con la fecha de
+finalización vencida y todos sus hitos completados (ver app/archivo.py).
+Pensado para un cron; la API también puede hacerlo sola con ARCHIVO_CADA_SEGUNDOS.
+De paso purga los cambios de sincronización más viejos que CAMBIOS_RETENCION_DIAS.
+
+Uso (desde backend/):
+    python archivar.py                       # archiva todo lo cerrado, en lotes
+    python archivar.py --simular             # solo cuenta cuántos se archivarían
+    python archivar.py desarchivar 42        # devuelve el indicador 42 a las tablas activas
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import func, select
+
+from app.database import Base, SessionLocal, USANDO_SQLITE_LOCAL, get_engine
+from app.models import indicador, usuario, archivo as modelos_archivo  # noqa: F401 (registran las tablas en Base)
+from app.models.indicador import Indicador
+from app import archivo, cambios
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo de indicadores cerrados")
+    parser.add_argument("accion", nargs="?", default="archivar", choices=["archivar", "desarchivar"])
+    parser.add_argument("indicador_id", nargs="?", type=int)
+    parser.add_argument("--simular", action="store_true", help="contar sin mover nada")
+    args = parser.parse_args()
+
+    if USANDO_SQLITE_LOCAL:
+        Base.metadata.create_all(bind=get_engine())
+    with SessionLocal() as db:
+        if args.accion == "desarchivar":
+            if args.indicador_id is None:
+                parser.error("desarchivar necesita el id del indicador")
+            if not archivo.desarchivar(db, args.indicador_id):
+                print(f"❌ El indicador {args.indicador_id} no está en el archivo")
+                sys.exit(1)
+            print(f"✅ Indicador {args.indicador_id} devuelto a las tablas activas")
+            return
+
+        if args.simular:
+            cerrados = db.execute(select(func.count(Indicador.id)).where(*archivo.condicion_cerrado())).scalar()
+            print(f"🔎 {cerrados} indicadores cerrados para archivar")
+            return
+        total = archivo.archivar(db)
+        print(f"✅ {total} indicadores archivados (lotes de {archivo.ARCHIVO_LOTE})")
+        purgados = cambios.purgar(db)
+        if purgados:
+            print(f"🔄 {purgados} cambios de más de {cambios.CAMBIOS_RETENCION_DIAS} días purgados")
+
+if __name__ == "__main__":
+    main()
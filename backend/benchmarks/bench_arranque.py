@@ -0,0 +1,112 @@
+"""
+⏱️ Benchmark de arranque de un worker
+
+Uso (desde backend/):
+    python -m benchmarks.bench_arranque --veces 5
+    python -m benchmarks.bench_arranque --workers 4
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_arranque
+
+Lanza `uvicorn app.main:app` en un puerto libre y mide el tiempo hasta el
+primer 200 de GET /health, y aparte el tiempo de `import app.main`. Cada
+corrida es un proceso nuevo (arranque en frío del intérprete).
+
+Con --workers N además arranca gunicorn con gunicorn.conf.py, con y sin
+preload, y mide el tiempo hasta que los N workers imprimen que están listos
+(lo que tarda un restart o un scale-up en Railway en tener toda su capacidad).
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def hasta_listo(cwd, timeout=60) -> float:
+    puerto = puerto_libre()
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=cwd, env={**os.environ, "PYTHONPATH": BACKEND},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - inicio < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/health", timeout=1) as r:
+                    if r.status == 200:
+                        return (time.perf_counter() - inicio) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("el worker no respondió")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+def importar(cwd) -> float:
+    codigo = "import time; t = time.perf_counter(); import app.main; print((time.perf_counter() - t) * 1000)"
+    salida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=cwd, env={**os.environ, "PYTHONPATH": BACKEND},
+        capture_output=True, text=True, check=True,
+    )
+    return float(salida.stdout.strip().splitlines()[-1])
+
+def gunicorn_listo(cwd, workers: int, preload: bool, timeout=120) -> float:
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", os.path.join(BACKEND, "gunicorn.conf.py")],
+        cwd=cwd,
+        env={
+            **os.environ, "PYTHONPATH": BACKEND, "PYTHONUNBUFFERED": "1", "PORT": str(puerto_libre()),
+            "WEB_CONCURRENCY": str(workers), "GUNICORN_PRELOAD": "true" if preload else "false",
+        },
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    inicio = time.perf_counter()
+    listos = 0
+    try:
+        for linea in proceso.stdout:
+            if "listo:" in linea:
+                listos += 1
+                if listos == workers:
+                    return (time.perf_counter() - inicio) * 1000
+            if time.perf_counter() - inicio > timeout:
+                break
+        raise TimeoutError(f"solo {listos} de {workers} workers quedaron listos")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--veces", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=0, help="medir también gunicorn con N workers")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        # Con SQLite la base queda en el directorio temporal
+        hasta_listo(cwd)
+        imports = [importar(cwd) for _ in range(args.veces)]
+        listos = [hasta_listo(cwd) for _ in range(args.veces)]
+        if args.workers:
+            sin_preload = [gunicorn_listo(cwd, args.workers, False) for _ in range(args.veces)]
+            con_preload = [gunicorn_listo(cwd, args.workers, True) for _ in range(args.veces)]
+    print(f"🚀 Arranque de un worker ({'PostgreSQL' if os.getenv('DATABASE_URL') else 'SQLite'}), {args.veces} corridas")
+    print(f"  import app.main     p50={statistics.median(imports):7.0f}ms  max={max(imports):7.0f}ms")
+    print(f"  hasta /health 200   p50={statistics.median(listos):7.0f}ms  max={max(listos):7.0f}ms")
+    if args.workers:
+        print(f"🦄 gunicorn, {args.workers} workers listos")
+        print(f"  sin preload         p50={statistics.median(sin_preload):7.0f}ms  max={max(sin_preload):7.0f}ms")
+        print(f"  con preload         p50={statistics.median(con_preload):7.0f}ms  max={max(con_preload):7.0f}ms")
+
+if __name__ == "__main__":
+    main()
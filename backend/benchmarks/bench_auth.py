@@ -0,0 +1,62 @@
+"""
+⏱️ Benchmark del costo de autenticación por request
+
+Uso (desde backend/):
+    python -m benchmarks.bench_auth --requests 5000
+
+Compara get_current_user con las cachés vacías en cada request (decodificar
+y verificar el JWT + leer el usuario de la BD) contra el camino cacheado.
+La dependencia es síncrona (FastAPI la corre en el threadpool), así que se
+llama directamente.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app import auth
+from app.crud import usuario as crud_usuario
+from benchmarks.bench_busqueda import percentil
+
+def medir(token, n, limpiar):
+    tiempos = []
+    for _ in range(n):
+        if limpiar:
+            auth.tokens_verificados.limpiar()
+            auth.usuarios_cache.limpiar()
+        inicio = time.perf_counter()
+        auth.get_current_user(token)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return tiempos
+
+def reportar(nombre, tiempos):
+    print(f"  {nombre:10s} p50={statistics.median(tiempos):9.1f}µs  "
+          f"p95={percentil(tiempos, 95):9.1f}µs  max={max(tiempos):9.1f}µs")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        auth.SessionLocal = sessionmaker(bind=engine)
+        with auth.SessionLocal() as db:
+            # Hash precalculado: el benchmark no mide bcrypt
+            crud_usuario.create_usuario(db, "bench", "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW")
+        token = auth.create_access_token({"sub": "bench"})
+
+        print(f"🔐 get_current_user, {args.requests} requests")
+        reportar("sin caché", medir(token, args.requests, limpiar=True))
+        reportar("con caché", medir(token, args.requests, limpiar=False))
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
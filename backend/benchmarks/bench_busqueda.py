@@ -0,0 +1,74 @@
+"""
+⏱️ Benchmark de búsqueda (índice en memoria y FTS5 sobre SQLite)
+
+Uso (desde backend/):
+    python -m benchmarks.bench_busqueda --indicadores 10000 --hitos 10
+
+Crea una base SQLite temporal con N indicadores × M hitos, construye el
+índice y mide latencias de consultas con y sin errores de tipeo.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app import busqueda
+from benchmarks.datos_sinteticos import poblar
+
+CONSULTAS = [
+    "estrategia", "estrategica", "acreditacion gestion", "Acreditación", "diagnostco",
+    "nunez", "José Pérez", "auditoria interna", "migracion sistemas digital", "capacitacon",
+    "alianza estrat", "riesgos financiera", "planificacion anual", "comunicacion", "presupuesto",
+]
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def medir(session, backend, repeticiones):
+    busqueda.BUSQUEDA_BACKEND = backend
+    busqueda.buscar(session, "calentamiento")
+    tiempos = []
+    for _ in range(repeticiones):
+        for consulta in CONSULTAS:
+            inicio = time.perf_counter()
+            busqueda.buscar(session, consulta, limit=20)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"  {backend:8s} n={len(tiempos)}  p50={statistics.median(tiempos):.2f}ms  "
+          f"p95={percentil(tiempos, 95):.2f}ms  max={max(tiempos):.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--indicadores", type=int, default=10000)
+    parser.add_argument("--hitos", type=int, default=10)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        n_ind, n_hitos = poblar(session, args.indicadores, args.hitos)
+        print(f"📊 {n_ind} indicadores, {n_hitos} hitos")
+
+        inicio = time.perf_counter()
+        busqueda._indice_actualizado(session)
+        print(f"🧠 Construcción del índice en memoria: {(time.perf_counter() - inicio) * 1000:.0f}ms "
+              f"({len(busqueda._indice.vocabulario)} palabras)")
+
+        inicio = time.perf_counter()
+        busqueda.actualizar_fts(session)
+        print(f"🗃️ Construcción de la tabla FTS5: {(time.perf_counter() - inicio) * 1000:.0f}ms")
+
+        medir(session, "memoria", args.repeticiones)
+        medir(session, "fts", args.repeticiones)
+        session.close()
+
+if __name__ == "__main__":
+    main()
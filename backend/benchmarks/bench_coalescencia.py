@@ -0,0 +1,79 @@
+"""
+⏱️ Benchmark de coalescencia (estampida después de una escritura)
+
+Uso (desde backend/):
+    python -m benchmarks.bench_coalescencia --indicadores 300 --clientes 40
+
+Simula el momento después de guardar un cambio: N dashboards piden a la
+vez el listado y las estadísticas con la caché recién invalidada. Compara
+con y sin coalescencia el tiempo hasta que responde el último y cuántas
+consultas SQL llegan a la BD.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+async def estampida(cliente, clientes):
+    rutas = ["/api/indicadores/", "/api/indicadores/estadisticas/dashboard"]
+    tiempos = []
+
+    async def pedir(ruta):
+        inicio = time.perf_counter()
+        respuesta = await cliente.get(ruta)
+        assert respuesta.status_code == 200, respuesta.text
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[pedir(ruta) for ruta in rutas for _ in range(clientes)])
+    return (time.perf_counter() - inicio) * 1000, tiempos
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--indicadores", type=int, default=300)
+    parser.add_argument("--clientes", type=int, default=40)
+    parser.add_argument("--rondas", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # La app usa ./indicadores.db: importarla desde el directorio temporal
+        os.chdir(tmp)
+        os.environ["RATE_LIMIT_REQUESTS"] = "100000000"
+        import httpx
+        from sqlalchemy import event
+        from app.main import app
+        from app.database import Base, SessionLocal, get_engine
+        from app import coalescencia, eventos
+        from benchmarks.datos_sinteticos import poblar
+
+        Base.metadata.create_all(bind=get_engine())
+        with SessionLocal() as db:
+            poblar(db, args.indicadores, 8)
+        consultas = [0]
+        event.listen(get_engine(), "before_cursor_execute", lambda *a: consultas.__setitem__(0, consultas[0] + 1))
+
+        async def correr():
+            async with httpx.AsyncClient(app=app, base_url="http://bench",
+                                         headers={"User-Agent": "bench-coalescencia/1.0 (benchmark)"}) as cliente:
+                print(f"🛬 Estampida: {args.clientes} clientes × 2 rutas, {args.indicadores} indicadores, {args.rondas} rondas")
+                for activa in (False, True):
+                    coalescencia.COALESCENCIA_ACTIVA = activa
+                    totales, latencias, sql = [], [], []
+                    for _ in range(args.rondas):
+                        eventos.notificar_escritura()  # como después de guardar: caché invalidada
+                        consultas[0] = 0
+                        total, tiempos = await estampida(cliente, args.clientes)
+                        totales.append(total)
+                        latencias.extend(tiempos)
+                        sql.append(consultas[0])
+                    print(f"  {'con' if activa else 'sin'} coalescencia: último en {statistics.median(totales):7.0f}ms  "
+                          f"p50={statistics.median(latencias):7.0f}ms  consultas SQL por estampida={statistics.median(sql):.0f}")
+                print(f"  {coalescencia.estadisticas()}")
+
+        asyncio.run(correr())
+
+if __name__ == "__main__":
+    main()
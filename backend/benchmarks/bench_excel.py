@@ -0,0 +1,113 @@
+"""
+⏱️ Benchmark de la lectura del Excel de indicadores
+
+Uso (desde backend/):
+    python -m benchmarks.bench_excel --filas 100000
+
+Genera un libro sintético con las mismas columnas que "Base de datos.xlsx"
+y lo lee con cada motor de app.excel, cada uno en un proceso nuevo para que
+el pico de memoria sea solo suyo:
+- pandas (antes): `pd.read_excel(ruta)` con todas las columnas, como antes
+- pandas, openpyxl (streaming) y calamine (si está instalado) vía app.excel
+- caché: segunda lectura del mismo archivo (hash del contenido)
+
+Pico = memoria máxima del proceso durante la lectura menos la que tenía antes
+de empezar (con pandas, openpyxl y calamine ya importados en todos los casos).
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CABECERA = ["VP", "Area", "Indicador", "Hito", "Orden Hito", "Tipo Indicador", "Fecha de Inicio",
+            "Fecha Finalizacion", "Fecha de Carga", "Avance (%)", "Estado", "Responsable", "Responsable de Carga"]
+
+def generar(ruta: str, filas: int):
+    from openpyxl import Workbook
+
+    random.seed(42)
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("Hoja1")
+    hoja.append(CABECERA)
+    inicio = date(2025, 1, 1)
+    for i in range(filas):
+        indicador = i // 8
+        fin = inicio + timedelta(days=random.randint(30, 500))
+        hoja.append([
+            random.choice(["VPD", "VPF", "VPO", "VPC"]),
+            random.choice(["Alianza Estratégica", "Legal", "Finanzas", "Operaciones"]),
+            f"Indicador {indicador} gestión",
+            f"Hito {i % 8} de revisión y aprobación",
+            i % 8 + 1,
+            random.choice(["Gestion", "Resultado"]),
+            inicio,
+            date(1900, 1, 10) if i == 17 else fin,
+            date(2025, 3, 31),
+            random.choice([0, 10, 25, 50, 75, 100]),
+            random.choice(["Completado", "En Progreso", "Por Comenzar"]),
+            f"Responsable {indicador % 50}",
+            f"Carga {indicador % 20}",
+        ])
+    libro.save(ruta)
+
+def rss_kb() -> int:
+    with open("/proc/self/statm") as archivo:
+        return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+def medir(motor: str, ruta: str):
+    """Corre en un proceso aparte: imprime JSON con segundos, pico de memoria y filas"""
+    import pandas as pd
+    import openpyxl  # noqa: F401
+    from app import excel
+
+    if "calamine" in excel.motores_disponibles():
+        import python_calamine  # noqa: F401
+    if motor == "caché":
+        excel.leer_indicadores(ruta, usar_cache=True)  # deja el resultado guardado
+    antes = rss_kb()
+    inicio = time.perf_counter()
+    if motor == "pandas (antes)":
+        df = pd.read_excel(ruta)
+    else:
+        df = excel.leer_indicadores(ruta, motor=None if motor == "caché" else motor, usar_cache=motor == "caché")
+    segundos = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - antes
+    print(json.dumps({"segundos": segundos, "pico_mb": max(0, pico) / 1024, "filas": len(df)}))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100000)
+    parser.add_argument("--medir", nargs=2, metavar=("MOTOR", "RUTA"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.medir:
+        medir(*args.medir)
+        return
+
+    sys.path.insert(0, BACKEND)
+    from app import excel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "sintetico.xlsx")
+        inicio = time.perf_counter()
+        generar(ruta, args.filas)
+        print(f"📗 Excel sintético: {args.filas} filas, {os.path.getsize(ruta) / 1024 / 1024:.1f}MB "
+              f"(generado en {time.perf_counter() - inicio:.0f}s)")
+        env = {**os.environ, "PYTHONPATH": BACKEND, "EXCEL_CACHE_DIR": os.path.join(tmp, "cache")}
+        motores = ["pandas (antes)"] + excel.motores_disponibles()[::-1] + ["caché"]
+        for motor in motores:
+            salida = subprocess.run([sys.executable, "-m", "benchmarks.bench_excel", "--medir", motor, ruta],
+                                    cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+            resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+            print(f"  {motor:16s} {resultado['segundos']:7.2f}s  pico +{resultado['pico_mb']:6.0f}MB  "
+                  f"{resultado['filas']} filas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+⏱️ Benchmark de la configuración de gunicorn: defaults nuevos vs los anteriores
+
+Uso (desde backend/):
+    python -m benchmarks.bench_gunicorn --segundos 15 --clientes 16
+    python -m benchmarks.bench_gunicorn --indicadores 300 --pausa 4
+
+Levanta gunicorn con gunicorn.conf.py sobre una SQLite sintética dos veces:
+- "anterior": lo que tenían Procfile/railway.json (4 workers, keep-alive 2s,
+  sin reciclaje)
+- "nuevo": los valores automáticos del config (workers por CPU/memoria,
+  keep-alive 75s, max_requests con jitter, hilos acotados al pool)
+
+y corre dos cargas con conexiones persistentes, como el proxy de Railway:
+- ráfaga: N clientes pidiendo /api/indicadores/ sin pausa (throughput y latencia)
+- pausas: N clientes con `--pausa` segundos entre requests (cuántos requests
+  encuentran la conexión cerrada por el servidor y deben reconectar)
+
+Al final lee /health/workers: requests y memoria de cada worker.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADERS = {"User-Agent": "bench-gunicorn/1.0 (benchmark)"}
+# Usuario de ADMIN_USUARIOS que crea crear_base, para leer los /health/* detallados
+ADMIN = "admin"
+
+CONFIGURACIONES = {
+    "anterior": {"WEB_CONCURRENCY": "4", "GUNICORN_KEEPALIVE": "2", "GUNICORN_MAX_REQUESTS": "0",
+                 "HILOS_POR_WORKER": "40"},
+    "nuevo": {},
+}
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def crear_base(cwd, n_indicadores):
+    codigo = (
+        "from app.database import Base, SessionLocal, get_engine\n"
+        "from app import main\n"
+        "from app.crud.usuario import create_usuario\n"
+        "from benchmarks.datos_sinteticos import poblar\n"
+        "Base.metadata.create_all(bind=get_engine())\n"
+        f"poblar(SessionLocal(), {n_indicadores}, 8)\n"
+        f"create_usuario(SessionLocal(), {ADMIN!r}, '!')\n"  # sin contraseña válida: el JWT se firma aquí
+    )
+    subprocess.run([sys.executable, "-c", codigo], cwd=cwd, env={**os.environ, "PYTHONPATH": BACKEND},
+                   check=True, capture_output=True)
+
+def levantar(cwd, extra):
+    puerto = puerto_libre()
+    env = {**os.environ, "PYTHONPATH": BACKEND, "PORT": str(puerto), "RATE_LIMIT_REQUESTS": "100000000",
+           "WORKER_STATS_DIR": os.path.join(cwd, "workers"), **extra}
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", os.path.join(BACKEND, "gunicorn.conf.py"),
+         "--access-logfile", "/dev/null"],
+        cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    # Drenar la salida para que gunicorn no se bloquee escribiendo, guardando el resumen de workers
+    resumen = []
+
+    def leer_salida():
+        for linea in proceso.stdout:
+            if "Workers:" in linea:
+                resumen.append(linea.split("[INFO]")[-1].strip())
+
+    threading.Thread(target=leer_salida, daemon=True).start()
+    inicio = time.time()
+    while time.time() - inicio < 120:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/health", timeout=1):
+                break
+        except OSError:
+            time.sleep(0.1)
+    time.sleep(2)  # que todos los workers terminen su calentamiento
+    return proceso, puerto, resumen[0] if resumen else ""
+
+def cliente(puerto, ruta, hasta, pausa, resultados):
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=30)
+    if pausa:
+        time.sleep(random.uniform(0, pausa))  # que los clientes no lleguen sincronizados
+    while time.time() < hasta:
+        inicio = time.perf_counter()
+        for intento in range(2):
+            try:
+                conexion.request("GET", ruta, headers=HEADERS)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                resultados["latencias"].append((time.perf_counter() - inicio) * 1000)
+                if respuesta.status != 200:
+                    resultados["errores"] += 1
+                if respuesta.getheader("connection", "").lower() == "close":
+                    conexion.close()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # El servidor cerró la conexión ociosa: reconectar y reintentar
+                resultados["reconexiones"] += 1
+                conexion.close()
+                conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=30)
+        if pausa:
+            time.sleep(pausa)
+    conexion.close()
+
+def leer_salud(puerto, ruta):
+    """JSON de un /health/* detallado, con un JWT de ADMIN (mismo SECRET_KEY que el servidor)"""
+    from app.auth import create_access_token
+
+    token = create_access_token({"sub": ADMIN})
+    peticion = urllib.request.Request(
+        f"http://127.0.0.1:{puerto}{ruta}", headers={**HEADERS, "Authorization": f"Bearer {token}"}
+    )
+    with urllib.request.urlopen(peticion) as r:
+        return json.load(r)
+
+def carga(puerto, clientes, segundos, pausa, ruta="/api/indicadores/?limit=50"):
+    resultados = {"latencias": [], "errores": 0, "reconexiones": 0}
+    hasta = time.time() + segundos
+    hilos = [threading.Thread(target=cliente, args=(puerto, ruta, hasta, pausa, resultados)) for _ in range(clientes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segundos", type=float, default=15)
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--pausa", type=float, default=4, help="segundos entre requests en la carga con pausas")
+    parser.add_argument("--indicadores", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        crear_base(cwd, args.indicadores)
+        for nombre, extra in CONFIGURACIONES.items():
+            proceso, puerto, resumen = levantar(cwd, extra)
+            try:
+                rafaga = carga(puerto, args.clientes, args.segundos, 0)
+                pausas = carga(puerto, args.clientes, max(args.segundos, 3 * args.pausa), args.pausa)
+                workers = leer_salud(puerto, "/health/workers")
+            finally:
+                proceso.terminate()
+                proceso.wait()
+
+            lat = rafaga["latencias"]
+            print(f"🦄 {nombre}: {resumen}")
+            print(f"  ráfaga   {len(lat) / args.segundos:7.1f} req/s  p50={statistics.median(lat):6.1f}ms  "
+                  f"p95={percentil(lat, 95):6.1f}ms  p99={percentil(lat, 99):6.1f}ms  errores={rafaga['errores']}")
+            n = len(pausas["latencias"])
+            print(f"  pausas   {n} requests, {pausas['reconexiones']} encontraron la conexión cerrada "
+                  f"({100 * pausas['reconexiones'] / max(1, n):.0f}%)  p50={statistics.median(pausas['latencias']):6.1f}ms")
+            detalle = ", ".join(f"{w['pid']}: {w['requests']} req {w['memoria_mb']:.0f}MB" for w in workers["workers"])
+            print(f"  workers  {detalle}  (total {workers['memoria_total_mb']:.0f}MB)")
+
+if __name__ == "__main__":
+    main()
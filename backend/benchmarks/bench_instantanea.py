@@ -0,0 +1,139 @@
+"""
+⏱️ Benchmark de la instantánea compartida: memoria por worker y worker en frío
+
+Uso (desde backend/):
+    python -m benchmarks.bench_instantanea --indicadores 500 2000 5000 --workers 4
+
+Para cada tamaño de datos levanta gunicorn con N workers sobre una SQLite
+sintética, con INSTANTANEA desactivada y activada, pide el listado completo,
+la página del frontend y las estadísticas (con y sin gzip) hasta que todos
+los workers los sirvieron, y lee de /proc/<pid>/smaps_rollup:
+- privada: memoria que es solo de ese worker (lo que crece con los datos)
+- PSS: la memoria compartida repartida entre quienes la usan
+
+Después arranca un proceso nuevo sobre la misma BD (y la misma sesión de
+instantánea) y mide su primer request a cada ruta: sin instantánea consulta
+la BD y serializa, con instantánea responde desde el archivo ya armado.
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from benchmarks.bench_gunicorn import BACKEND, HEADERS, crear_base, leer_salud, levantar, puerto_libre
+
+RUTAS = [
+    ("listado", "/api/indicadores/?limit=100000", "identity"),
+    ("listado gzip", "/api/indicadores/?limit=100000", "gzip"),
+    ("página", "/api/indicadores/", "identity"),
+    ("estadísticas", "/api/indicadores/estadisticas/dashboard", "identity"),
+]
+
+def memoria_kb(pid) -> dict:
+    """Privada y PSS del proceso en KB"""
+    valores = {}
+    with open(f"/proc/{pid}/smaps_rollup") as archivo:
+        for linea in archivo:
+            partes = linea.split()
+            if len(partes) >= 2 and partes[1].isdigit():
+                valores[partes[0].rstrip(":")] = int(partes[1])
+    return {"privada": valores["Private_Clean"] + valores["Private_Dirty"], "pss": valores["Pss"]}
+
+def pedir(puerto, ruta, codificacion, conexion=None):
+    conexion = conexion or http.client.HTTPConnection("127.0.0.1", puerto, timeout=300)
+    conexion.request("GET", ruta, headers={**HEADERS, "Accept-Encoding": codificacion})
+    respuesta = conexion.getresponse()
+    cuerpo = respuesta.read()
+    assert respuesta.status == 200, cuerpo[:200]
+    return respuesta, cuerpo
+
+def esperar_instantanea(puerto):
+    """Hasta que el refrescador publique la primera (los requests previos irían a la BD)"""
+    while True:
+        if leer_salud(puerto, "/health/instantanea")["version"] is not None:
+            return
+        time.sleep(0.2)
+
+def calentar_todos(puerto, clientes=8, rondas=400):
+    """Pide las rutas desde varias conexiones nuevas, para que las sirvan todos los workers"""
+
+    def cliente():
+        conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=300)
+        for _ in range(rondas // clientes):
+            for _, ruta, codificacion in RUTAS:
+                pedir(puerto, ruta, codificacion, conexion)
+            conexion.close()  # conexión nueva: otro worker puede aceptarla
+            conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=300)
+
+    hilos = [threading.Thread(target=cliente) for _ in range(clientes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return {w["pid"]: w["requests"] for w in leer_salud(puerto, "/health/workers")["workers"]}
+
+def primer_request(cwd, env_extra):
+    """Tiempo del primer request a cada ruta en un proceso recién levantado"""
+    puerto = puerto_libre()
+    env = {**os.environ, "PYTHONPATH": BACKEND, "RATE_LIMIT_REQUESTS": "100000000",
+           "WORKER_STATS_DIR": os.path.join(cwd, "workers"), **env_extra}
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/health", timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.05)
+        tiempos = {}
+        for nombre, ruta, codificacion in RUTAS:
+            inicio = time.perf_counter()
+            pedir(puerto, ruta, codificacion)
+            tiempos.setdefault(nombre, (time.perf_counter() - inicio) * 1000)
+        return tiempos
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--indicadores", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"🧊 Instantánea compartida, {args.workers} workers (memoria del worker más cargado: privada / PSS)")
+    for n in args.indicadores:
+        with tempfile.TemporaryDirectory() as cwd:
+            crear_base(cwd, n)
+            for nombre, activa in (("sin instantánea", "false"), ("con instantánea", "true")):
+                extra = {"WEB_CONCURRENCY": str(args.workers), "INSTANTANEA": activa,
+                         "INSTANTANEA_DIR": os.path.join(cwd, "instantanea"), "INSTANTANEA_SESION": "bench"}
+                proceso, puerto, _ = levantar(cwd, extra)
+                try:
+                    if activa == "true":
+                        esperar_instantanea(puerto)
+                    requests = calentar_todos(puerto)
+                    memorias = [memoria_kb(pid) for pid in sorted(requests)]
+                    _, cuerpo = pedir(puerto, RUTAS[0][1], "identity")
+                    frio = primer_request(cwd, extra)
+                finally:
+                    proceso.terminate()
+                    proceso.wait()
+
+                privada = max(m["privada"] for m in memorias) / 1024
+                pss = max(m["pss"] for m in memorias) / 1024
+                print(f"  {n:5d} indicadores ({len(cuerpo) / 1024 / 1024:5.1f}MB de JSON)  {nombre:16s} "
+                      f"máx {privada:6.1f}MB / {pss:6.1f}MB  requests por worker {sorted(requests.values())}")
+                print(f"        worker en frío: " + "  ".join(f"{ruta} {ms:7.1f}ms" for ruta, ms in frio.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+⏱️ Prueba de carga: latencia de la API durante una ráfaga de logins
+
+Uso (desde backend/):
+    python -m benchmarks.bench_login --logins 40
+
+Mide la latencia de GET /health mientras llegan N logins simultáneos a
+/token, con bcrypt en el event loop (comportamiento anterior) y en el
+pool de login. Usa una base SQLite temporal y desactiva el límite de
+RATE_LIMIT_RUTAS sobre /token, para medir logins y no respuestas 429.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+async def sondear(cliente, fin, tiempos):
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        await cliente.get("/health")
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        await asyncio.sleep(0.02)
+
+async def rafaga(cliente, n, duracion):
+    tiempos = []
+    fin = time.perf_counter() + duracion
+    sonda = asyncio.create_task(sondear(cliente, fin, tiempos))
+    respuestas = []
+    if n:
+        respuestas = await asyncio.gather(*[
+            cliente.post("/token", data={"username": "bench", "password": "Bench12345"})
+            for _ in range(n)
+        ])
+    await sonda
+    return tiempos, Counter(r.status_code for r in respuestas)
+
+def reportar(nombre, tiempos, estados):
+    from benchmarks.bench_busqueda import percentil  # importa app.database: después de fijar DATABASE_URL
+    print(f"  {nombre:14s} /health p50={statistics.median(tiempos):7.1f}ms  "
+          f"p95={percentil(tiempos, 95):7.1f}ms  max={max(tiempos):7.1f}ms  logins={dict(estados)}")
+
+async def correr(args):
+    import httpx
+    from app import auth
+    from app.main import app
+    from app.database import Base, SessionLocal, get_engine
+    from app.crud import usuario as crud_usuario
+    from app.routers import auth as auth_router
+
+    Base.metadata.create_all(bind=get_engine())
+    with SessionLocal() as db:
+        if crud_usuario.get_usuario(db, "bench") is None:
+            crud_usuario.create_usuario(db, "bench", auth.get_password_hash("Bench12345"))
+
+    async def en_el_loop(username, password):
+        return auth.authenticate_user(username, password)
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        print(f"🔐 {args.logins} logins simultáneos, bcrypt rounds={auth.BCRYPT_ROUNDS}, "
+              f"pool={auth.LOGIN_WORKERS}+{auth.LOGIN_COLA_MAX} en cola")
+        reportar("sin logins", *await rafaga(cliente, 0, args.duracion))
+
+        original = auth_router.authenticate_user_async
+        auth_router.authenticate_user_async = en_el_loop
+        reportar("bcrypt en loop", *await rafaga(cliente, args.logins, args.duracion))
+        auth_router.authenticate_user_async = original
+
+        reportar("pool de login", *await rafaga(cliente, args.logins, args.duracion))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--duracion", type=float, default=3.0, help="segundos de sondeo por escenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["RATE_LIMIT_RUTAS"] = "POST /token=1000000/60"
+        asyncio.run(correr(args))
+
+if __name__ == "__main__":
+    main()
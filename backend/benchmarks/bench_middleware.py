@@ -0,0 +1,128 @@
+"""
+⏱️ Benchmark del costo por request del stack de middleware
+
+Uso (desde backend/):
+    python -m benchmarks.bench_middleware --requests 5000
+
+Llama directo a la app ASGI (sin cliente HTTP) con un endpoint trivial y
+compara: sin middleware, el stack anterior (@app.middleware("http") +
+StreamHandler síncrono) y el stack actual (ASGI puro + logs en cola).
+Ambos stacks escriben sus logs al mismo archivo temporal.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi import FastAPI
+
+from app import security
+from app.main import UTF8JSONMiddleware
+from app.security import SecurityMiddleware, security_monitor, get_client_ip
+from benchmarks.bench_busqueda import percentil
+
+SCOPE = {
+    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+    "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+    "headers": [(b"host", b"bench"), (b"user-agent", b"bench-client/1.0"), (b"accept", b"application/json")],
+    "client": ("10.0.0.1", 40000), "server": ("bench", 80),
+}
+
+def app_base():
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    return app
+
+def stack_anterior(log_sincrono):
+    """Réplica del stack previo: dos BaseHTTPMiddleware y log síncrono"""
+    app = app_base()
+
+    @app.middleware("http")
+    async def add_utf8_headers(request, call_next):
+        response = await call_next(request)
+        if "application/json" in response.headers.get("content-type", ""):
+            response.headers["content-type"] = "application/json; charset=utf-8"
+        return response
+
+    @app.middleware("http")
+    async def security_middleware(request, call_next):
+        client_ip = get_client_ip(request)
+        security_monitor.validate_request_size(request)
+        user_agent = request.headers.get("user-agent", "")
+        if not user_agent or len(user_agent) < 10:
+            security_monitor.log_failed_attempt(client_ip, str(request.url), "Suspicious or missing User-Agent")
+        response = await call_next(request)
+        log_sincrono.info(f"Access from {client_ip} to {request.url.path} - Status: {response.status_code}")
+        return response
+    return app
+
+def stack_actual():
+    app = app_base()
+    app.add_middleware(UTF8JSONMiddleware)
+    app.add_middleware(SecurityMiddleware)
+    return app
+
+async def llamar(app):
+    # Como un servidor real: entrega el body una vez y después espera
+    # (BaseHTTPMiddleware queda escuchando un http.disconnect)
+    entregado = False
+
+    async def receive():
+        nonlocal entregado
+        if not entregado:
+            entregado = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    await app(dict(SCOPE), receive, send)
+
+async def medir(app, n):
+    for _ in range(200):
+        await llamar(app)
+    tiempos = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        await llamar(app)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archivo = open(os.path.join(tmp, "security.log"), "a")
+        formato = logging.Formatter('%(asctime)s - SECURITY - %(levelname)s - %(message)s')
+        handler = logging.StreamHandler(archivo)
+        handler.setFormatter(formato)
+        log_sincrono = logging.getLogger("bench.security")
+        log_sincrono.addHandler(handler)
+        log_sincrono.setLevel(logging.INFO)
+        log_sincrono.propagate = False
+        security._listener_logs.handlers[0].setStream(archivo)
+
+        base = asyncio.run(medir(app_base(), args.requests))
+        print(f"🧅 {args.requests} requests GET /ping")
+        for nombre, app in (("sin middleware", app_base()),
+                            ("antes", stack_anterior(log_sincrono)),
+                            ("ASGI puro", stack_actual())):
+            tiempos = asyncio.run(medir(app, args.requests))
+            extra = statistics.median(tiempos) - statistics.median(base)
+            print(f"  {nombre:15s} p50={statistics.median(tiempos):7.1f}µs  p95={percentil(tiempos, 95):7.1f}µs  "
+                  f"costo del stack≈{extra:6.1f}µs")
+        security._detener_listener_logs()
+        archivo.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+⏱️ Microbenchmark de la inspección de inputs (SecurityMonitor.check_malicious_input)
+
+Uso (desde backend/):
+    python -m benchmarks.bench_patrones
+
+Compara el recorrido anterior (una búsqueda `in` por patrón) con el
+DetectorPatrones de una sola pasada, sobre campos realistas del sistema
+(nombres de indicadores e hitos, responsables, descripciones largas) y con
+listas de patrones de distinto tamaño.
+"""
+
+import argparse
+import random
+import string
+import time
+
+from app.security import DEFAULT_SUSPICIOUS_PATTERNS, DetectorPatrones
+from benchmarks.datos_sinteticos import _nombre, _persona
+
+def payloads(n, rnd):
+    campos = []
+    for _ in range(n):
+        tipo = rnd.random()
+        if tipo < 0.4:
+            campos.append(_nombre(rnd))
+        elif tipo < 0.6:
+            campos.append(_persona(rnd))
+        elif tipo < 0.95:
+            campos.append(" ".join(_nombre(rnd) for _ in range(rnd.randint(3, 12))))
+        else:
+            campos.append(rnd.choice(["<script>alert(1)</script>", "1' union select password", "../../etc/passwd"]))
+    return campos
+
+def patrones_extra(k, rnd):
+    letras = string.ascii_lowercase + "(<:/"
+    return [("".join(rnd.choice(letras) for _ in range(rnd.randint(5, 12))), False) for _ in range(k)]
+
+def recorrido_anterior(patrones):
+    textos = [p for p, _ in patrones]
+
+    def buscar(texto):
+        texto = texto.lower()
+        for patron in textos:
+            if patron in texto:
+                return patron
+        return None
+    return buscar
+
+def medir(buscar, campos, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for campo in campos:
+            buscar(campo)
+    return (time.perf_counter() - inicio) / (repeticiones * len(campos)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campos", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    campos = payloads(args.campos, rnd)
+    largo = sum(map(len, campos)) / len(campos)
+    print(f"🔍 {len(campos)} campos, largo medio {largo:.0f} caracteres")
+    for extra in (0, 80, 480, 1980):
+        patrones = list(DEFAULT_SUSPICIOUS_PATTERNS) + patrones_extra(extra, rnd)
+        antes = medir(recorrido_anterior(patrones), campos, args.repeticiones)
+        despues = medir(DetectorPatrones(patrones).buscar, campos, args.repeticiones)
+        print(f"  {len(patrones):5d} patrones  `in` x N={antes:8.2f}µs  una pasada={despues:6.2f}µs  por campo")
+
+if __name__ == "__main__":
+    main()
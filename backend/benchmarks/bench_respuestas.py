@@ -0,0 +1,67 @@
+"""
+⏱️ Benchmark de la caché de respuestas
+
+Uso (desde backend/):
+    python -m benchmarks.bench_respuestas --indicadores 300 --requests 200
+
+Crea una SQLite temporal con N indicadores y pide los GET cacheados a
+través de la app completa (TestClient), con la caché desactivada y
+activada. Con caché, cada request después del primero sirve los bytes ya
+codificados sin consultar la BD.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+RUTAS = [
+    "/api/indicadores/?limit=100",
+    "/api/indicadores/?fields=vp,area,nombreIndicador,hitos.avanceHito",
+    "/api/indicadores/area/Legal",
+    "/api/indicadores/7",
+]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--indicadores", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # La app usa ./indicadores.db: importarla desde el directorio temporal
+        os.chdir(tmp)
+        os.environ["RATE_LIMIT_REQUESTS"] = "100000000"
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.database import Base, SessionLocal, get_engine
+        from app.cache_respuestas import respuestas
+        from benchmarks.datos_sinteticos import poblar
+        from benchmarks.bench_busqueda import percentil
+
+        Base.metadata.create_all(bind=get_engine())
+        with SessionLocal() as db:
+            poblar(db, args.indicadores, 8)
+        cliente = TestClient(app, headers={"User-Agent": "bench-respuestas/1.0 (benchmark)"})
+
+        print(f"📦 Caché de respuestas, {args.indicadores} indicadores, {args.requests} requests por ruta")
+        max_bytes = respuestas.max_bytes
+        for ruta in RUTAS:
+            fila = []
+            for nombre, tope in (("sin caché", 0), ("con caché", max_bytes)):
+                respuestas.max_bytes = tope
+                respuestas.limpiar()
+                tiempos = []
+                for _ in range(args.requests):
+                    inicio = time.perf_counter()
+                    respuesta = cliente.get(ruta)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                    assert respuesta.status_code == 200, respuesta.text
+                fila.append(f"{nombre} p50={statistics.median(tiempos):7.2f}ms p95={percentil(tiempos, 95):7.2f}ms")
+            print(f"  {ruta:70s} {len(respuesta.content) / 1024:7.1f}KB")
+            print(f"    {'   '.join(fila)}")
+        print(f"  {respuestas.estadisticas()}")
+
+if __name__ == "__main__":
+    main()
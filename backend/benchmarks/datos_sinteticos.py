@@ -0,0 +1,90 @@
+"""
+🧪 Datos sintéticos para benchmarks
+Genera indicadores e hitos con nombres en español (con acentos) e inserta en bloque
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app.crud.indicador import _clave_dimension
+from app.models.indicador import Indicador, Hito
+
+VPS = {
+    "VPD": ["Alianza Estratégica", "Análisis y Estudios Ecónomicos", "Efectividad y Desarrollo"],
+    "VPE": ["TEI", "Talento Humano"],
+    "PRE": ["Auditoria", "Comunicación", "Gestión de Riesgos", "Legal"],
+}
+VERBOS = ["Implementación", "Acreditación", "Diagnóstico", "Evaluación", "Diseño", "Actualización",
+          "Capacitación", "Migración", "Revisión", "Consolidación", "Planificación", "Seguimiento"]
+OBJETOS = ["estrategia", "gestión de recursos", "políticas", "procesos", "indicadores", "riesgos",
+           "sistemas", "presupuesto", "contratos", "alianzas", "auditoría interna", "comunicación"]
+CALIFICATIVOS = ["institucional", "regional", "digital", "operativa", "financiera", "estratégica",
+                 "anual", "integral", "corporativa", "técnica"]
+NOMBRES = ["Ana", "José", "María", "Luis", "Sofía", "Andrés", "Lucía", "Martín", "Camila", "Tomás"]
+APELLIDOS = ["Pérez", "Núñez", "González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz",
+             "Martínez", "Sánchez", "Ramírez", "Torres"]
+ESTADOS = ["Completado", "En Progreso", "Por Comenzar"]
+
+def _persona(rnd):
+    return f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}"
+
+def _nombre(rnd):
+    return f"{rnd.choice(VERBOS)} de {rnd.choice(OBJETOS)} {rnd.choice(CALIFICATIVOS)}"
+
+def filas_sinteticas(n_indicadores: int, hitos_por_indicador: int, semilla: int = 42):
+    """Devuelve (indicadores, hitos) como listas de dicts listos para insert()"""
+    rnd = random.Random(semilla)
+    ahora = datetime.utcnow()
+    base = date(2024, 1, 1)
+    indicadores, hitos = [], []
+    for i in range(1, n_indicadores + 1):
+        vp = rnd.choice(list(VPS))
+        inicio = base + timedelta(days=rnd.randint(0, 365))
+        fin = inicio + timedelta(days=rnd.randint(90, 540))
+        indicadores.append({
+            "id": i, "vp": vp, "area": rnd.choice(VPS[vp]), "nombreIndicador": f"{_nombre(rnd)} {i}",
+            "tipoIndicador": rnd.choice(["Estratégico", "Gestion"]),
+            "fechaInicioGeneral": inicio, "fechaFinalizacionGeneral": fin,
+            "responsableGeneral": _persona(rnd), "responsableCargaGeneral": _persona(rnd),
+            "created_at": ahora, "updated_at": ahora,
+        })
+        for _ in range(hitos_por_indicador):
+            h_inicio = inicio + timedelta(days=rnd.randint(0, 60))
+            h_fin = h_inicio + timedelta(days=rnd.randint(15, 180))
+            estado = rnd.choice(ESTADOS)
+            avance = 100.0 if estado == "Completado" else (0.0 if estado == "Por Comenzar" else float(rnd.randint(5, 95)))
+            hitos.append({
+                "indicador_id": i, "nombreHito": _nombre(rnd),
+                "fechaInicioHito": h_inicio, "fechaFinalizacionHito": h_fin,
+                "avanceHito": avance, "estadoHito": estado, "responsableHito": _persona(rnd),
+                "created_at": ahora, "updated_at": ahora,
+            })
+    return indicadores, hitos
+
+def _a_claves(session, modelo, filas):
+    """Con SCHEMA_NORMALIZADO, cambia los nombres de dimensión por sus claves enteras"""
+    for atributo in list(filas[0]) if filas else []:
+        dimension = _clave_dimension(getattr(modelo, atributo))
+        if not dimension:
+            continue
+        columna_fk, modelo_dim = dimension
+        nombres = {fila[atributo] for fila in filas if fila[atributo] is not None}
+        existentes = set(session.execute(select(modelo_dim.nombre)).scalars())
+        if nombres - existentes:
+            session.execute(insert(modelo_dim), [{"nombre": n} for n in sorted(nombres - existentes)])
+        ids = dict(session.execute(select(modelo_dim.nombre, modelo_dim.id)).all())
+        for fila in filas:
+            fila[columna_fk.name] = ids.get(fila.pop(atributo))
+
+def poblar(session, n_indicadores: int, hitos_por_indicador: int, semilla: int = 42):
+    """Inserta el dataset sintético con inserciones en bloque (sin hidratar ORM)"""
+    indicadores, hitos = filas_sinteticas(n_indicadores, hitos_por_indicador, semilla)
+    _a_claves(session, Indicador, indicadores)
+    _a_claves(session, Hito, hitos)
+    session.execute(insert(Indicador), indicadores)
+    for i in range(0, len(hitos), 10000):
+        session.execute(insert(Hito), hitos[i:i + 10000])
+    session.commit()
+    return len(indicadores), len(hitos)
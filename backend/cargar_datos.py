@@ -6,7 +6,6 @@ Lee fechas individuales del Excel para cada hito
 
 import sys
 import os
-import pandas as pd
 from datetime import datetime, date
 
 # Agregar el directorio padre al path
@@ -15,7 +14,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.models.indicador import Indicador, Hito
-from app.database import Base
+from app.crud.indicador import borrar_indicadores
+from app.database import Base, activar_claves_foraneas
+from app import cambios, eventos
 
 def get_database_url():
     """Obtener URL de base de datos de variable de entorno o usar SQLite local"""
@@ -33,7 +34,7 @@ def crear_session():
     database_url = get_database_url()
     print(f"🔗 Conectando a base de datos...")
     
-    engine = create_engine(database_url)
+    engine = activar_claves_foraneas(create_engine(database_url))
     
     # Crear tablas si no existen
     Base.metadata.create_all(bind=engine)
@@ -43,6 +44,8 @@ def crear_session():
 
 def convertir_fecha(fecha_valor):
     """Convertir fecha de Excel a datetime"""
+    import pandas as pd
+
     if pd.isna(fecha_valor):
         return None
     
@@ -113,22 +116,21 @@ def cargar_datos_desde_excel(excel_file='Base de datos.xlsx', session=None, limp
             session, engine = crear_session()
             print("✅ Conectado a Railway!")
         
-        # Leer Excel
+        # Leer Excel (pandas y el motor de Excel se importan solo aquí: son lo
+        # más pesado del proyecto y ningún request fuera de la carga los usa).
+        # app.excel ya trae las fechas convertidas y la fecha 1900 corregida
+        from app.excel import leer_indicadores
+
         print(f"📊 Leyendo archivo Excel: {excel_file}")
-        df = pd.read_excel(excel_file)
+        df = leer_indicadores(excel_file)
         print(f"📋 Datos leídos: {len(df)} filas")
         
-        # Corrección específica para fecha problemática
-        fecha_problema = df['Fecha Finalizacion'].astype(str).str.contains('1900', na=False)
-        if fecha_problema.any():
-            print("🔧 Detectada fecha problemática 1900-01-10, corrigiendo a 2025-12-31...")
-            df.loc[fecha_problema, 'Fecha Finalizacion'] = '2025-12-31'
-            print("✅ Fecha corregida automáticamente")
-        
         if limpiar_existentes:
             print("🗑️  Limpiando datos existentes...")
-            session.query(Hito).delete()
-            session.query(Indicador).delete()
+            # En lotes cortos: la API puede seguir atendiendo mientras se limpia
+            borrar_indicadores(session)
+            # Recarga completa: los clientes sincronizados vuelven a pedir todo
+            cambios.cortar(session)
             session.commit()
             print("✅ Datos limpiados")
         
@@ -192,6 +194,7 @@ def cargar_datos_desde_excel(excel_file='Base de datos.xlsx', session=None, limp
             total_indicadores += 1
         
         session.commit()
+        eventos.notificar_escritura()
         
         print(f"\n🎉 ¡DATOS CARGADOS EN RAILWAY!")
         print(f"📊 Total indicadores: {total_indicadores}")
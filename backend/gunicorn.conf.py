@@ -0,0 +1,121 @@
+"""
+🦄 Configuración de gunicorn (Procfile y railway.json la usan con -c)
+
+Con preload_app la app se importa una sola vez en el master y los workers
+nacen por fork con todo ya cargado: cada worker se ahorra el segundo de
+imports y comparte esas páginas de memoria con el master.
+
+Workers e hilos se dimensionan con la CPU y la memoria del contenedor
+(límites de cgroup si los hay); cualquier valor se puede fijar por
+variable de entorno. Benchmark: python -m benchmarks.bench_gunicorn
+"""
+
+import math
+import os
+
+def _leer(ruta):
+    try:
+        with open(ruta) as archivo:
+            return archivo.read().strip()
+    except OSError:
+        return None
+
+def cpus_disponibles() -> int:
+    """CPUs usables: afinidad del proceso acotada por la cuota de CPU del cgroup (v2 o v1)"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    cuota = periodo = None
+    cpu_max = _leer("/sys/fs/cgroup/cpu.max")
+    if cpu_max:
+        valor, periodo_txt = cpu_max.split()
+        if valor != "max":
+            cuota, periodo = int(valor), int(periodo_txt)
+    else:
+        valor = _leer("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        if valor and int(valor) > 0:
+            cuota, periodo = int(valor), int(_leer("/sys/fs/cgroup/cpu/cpu.cfs_period_us") or 100000)
+    if cuota:
+        cpus = min(cpus, math.ceil(cuota / periodo))
+    return max(1, cpus)
+
+def memoria_disponible_mb() -> int:
+    """Límite de memoria del cgroup, o la memoria total de la máquina si no hay límite"""
+    for ruta in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        valor = _leer(ruta)
+        if valor and valor != "max" and int(valor) < 1 << 60:
+            return int(valor) // (1024 * 1024)
+    for linea in (_leer("/proc/meminfo") or "").splitlines():
+        if linea.startswith("MemTotal:"):
+            return int(linea.split()[1]) // 1024
+    return 1024
+
+# Memoria que ocupa cada worker con tráfico (RSS medido ~90MB con preload)
+# más margen; el master y el SO se quedan con MEMORIA_RESERVADA_MB
+MEMORIA_POR_WORKER_MB = int(os.getenv("MEMORIA_POR_WORKER_MB", "160"))
+MEMORIA_RESERVADA_MB = int(os.getenv("MEMORIA_RESERVADA_MB", "256"))
+# Conexiones por worker del pool de SQLAlchemy (pool_size 5 + max_overflow 10)
+# y tope de conexiones del PostgreSQL (100 por defecto)
+CONEXIONES_POR_WORKER = 15
+MAX_CONEXIONES_BD = int(os.getenv("MAX_CONEXIONES_BD", "100"))
+
+def workers_automaticos() -> int:
+    """2 por CPU (los endpoints son síncronos y esperan a la BD), sin pasarse de memoria ni de conexiones"""
+    por_cpu = 2 * cpus_disponibles()
+    por_memoria = (memoria_disponible_mb() - MEMORIA_RESERVADA_MB) // MEMORIA_POR_WORKER_MB
+    por_conexiones = MAX_CONEXIONES_BD // CONEXIONES_POR_WORKER
+    return max(1, min(por_cpu, por_memoria, por_conexiones))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY") or workers_automaticos())
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Hilos por worker para los endpoints síncronos: más que las conexiones del
+# pool solo deja hilos esperando una conexión. Lo aplica el lifespan de la app.
+os.environ.setdefault("HILOS_POR_WORKER", str(CONEXIONES_POR_WORKER))
+
+# Los workers de este master comparten la instantánea (app.instantanea); los
+# reciclados la mapean ya armada y un arranque nuevo no usa la del anterior
+os.environ.setdefault("INSTANTANEA_SESION", str(os.getpid()))
+
+# Reciclar cada worker tras N requests (con jitter para que no se reinicien
+# todos a la vez) acota el crecimiento de memoria por fragmentación y cachés
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+# El frontend (Vercel) llama a la API a través del proxy de Railway, que
+# reutiliza conexiones: el keep-alive del worker debe durar más que el idle
+# del proxy (60s) para que nunca cierre una conexión que el proxy va a reusar
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+accesslog = "-"
+errorlog = "-"
+
+# GUNICORN_PRELOAD=false vuelve al comportamiento anterior (cada worker importa la app)
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+def when_ready(server):
+    server.log.info(
+        f"Workers: {workers} (CPUs {cpus_disponibles()}, memoria {memoria_disponible_mb()}MB), "
+        f"hilos/worker {os.environ['HILOS_POR_WORKER']}, max_requests {max_requests}±{max_requests_jitter}, "
+        f"keepalive {keepalive}s"
+    )
+
+def post_fork(server, worker):
+    """Las conexiones no se comparten entre procesos.
+
+    El engine se crea en el primer uso (normalmente en el lifespan del
+    worker), así que el master no debería tener uno; si algo lo creó antes
+    del fork, el worker descarta el pool heredado sin cerrar los sockets
+    del padre y abre los suyos.
+    """
+    from app import database, replica
+
+    for engine in (database._engine, replica._engine_replica):
+        if engine is not None:
+            engine.dispose(close=False)
+
+def child_exit(server, worker):
+    """Un worker reciclado o caído deja de aparecer en /health/workers"""
+    from app import worker as estado_worker
+
+    estado_worker.borrar(worker.pid)
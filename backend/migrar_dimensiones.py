@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Migración opt-in al esquema normalizado de dimensiones (y su reversa)
+
+Mueve vp, área, responsables y estados a tablas de lookup con claves
+enteras. La app usa este esquema cuando SCHEMA_NORMALIZADO=true; la forma
+de la API no cambia.
+
+Uso:
+    python migrar_dimensiones.py aplicar     # texto -> claves enteras
+    python migrar_dimensiones.py revertir    # claves enteras -> texto
+"""
+
+import sys
+import os
+
+import sqlalchemy as sa
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# (tabla, columna de texto, columna fk, tabla de lookup, índice original de la columna de texto)
+REFERENCIAS = [
+    ("indicadores", "vp", "vp_id", "dim_vp", "ix_indicadores_vp"),
+    ("indicadores", "area", "area_id", "dim_area", "ix_indicadores_area"),
+    ("indicadores", "responsableGeneral", "responsable_general_id", "dim_responsable", None),
+    ("indicadores", "responsableCargaGeneral", "responsable_carga_id", "dim_responsable", None),
+    ("hitos", "estadoHito", "estado_id", "dim_estado", None),
+    ("hitos", "responsableHito", "responsable_id", "dim_responsable", None),
+    ("indicadores_archivo", "vp", "vp_id", "dim_vp", None),
+    ("indicadores_archivo", "area", "area_id", "dim_area", None),
+    ("indicadores_archivo", "responsableGeneral", "responsable_general_id", "dim_responsable", None),
+    ("indicadores_archivo", "responsableCargaGeneral", "responsable_carga_id", "dim_responsable", None),
+    ("hitos_archivo", "estadoHito", "estado_id", "dim_estado", None),
+    ("hitos_archivo", "responsableHito", "responsable_id", "dim_responsable", None),
+]
+
+TABLAS_DIMENSION = ["dim_vp", "dim_area", "dim_responsable", "dim_estado"]
+
+# Índices de la migración 0007 que dependen de las columnas de dimensión, en
+# cada esquema: (tabla, nombre, columnas, condición del índice parcial).
+# Tienen que coincidir con los que declaran los modelos en app/models/indicador.py
+_PENDIENTE = (sa.column("estadoHito") == "Completado").is_not(True)
+INDICES_TEXTO = [
+    ("indicadores", "ix_indicadores_vp_area", ["vp", "area"], None),
+    ("hitos", "ix_hitos_estadoHito_avanceHito", ["estadoHito", "avanceHito"], None),
+    ("hitos", "ix_hitos_responsableHito", ["responsableHito"], None),
+    ("hitos", "ix_hitos_pendientes", ["indicador_id"], _PENDIENTE),
+]
+INDICES_NORMALIZADOS = [
+    ("indicadores", "ix_indicadores_vp_id_area_id", ["vp_id", "area_id"], None),
+    ("hitos", "ix_hitos_estado_id_avanceHito", ["estado_id", "avanceHito"], None),
+]
+
+def esta_normalizado(bind) -> bool:
+    columnas = {c["name"] for c in sa.inspect(bind).get_columns("indicadores")}
+    return "vp_id" in columnas
+
+def crear_tablas_dimension(op):
+    existentes = set(sa.inspect(op.get_bind()).get_table_names())
+    for tabla in TABLAS_DIMENSION:
+        if tabla not in existentes:
+            op.create_table(
+                tabla,
+                sa.Column("id", sa.Integer, primary_key=True),
+                sa.Column("nombre", sa.String, nullable=False, unique=True),
+            )
+
+def _referencias(op, tablas=None):
+    """REFERENCIAS de las tablas pedidas (todas si None) que existen en la BD.
+
+    Las tablas de archivo no existen en bases anteriores a la migración 0006.
+    """
+    existentes = set(sa.inspect(op.get_bind()).get_table_names())
+    return [r for r in REFERENCIAS if r[0] in existentes and (tablas is None or r[0] in tablas)]
+
+def _indices(op, normalizado: bool, tablas):
+    """(índice, existe) de INDICES_* del esquema pedido, en las tablas dadas"""
+    inspector = sa.inspect(op.get_bind())
+    existentes = set(inspector.get_table_names())
+    for tabla, nombre, columnas, condicion in INDICES_NORMALIZADOS if normalizado else INDICES_TEXTO:
+        if tabla in existentes and tabla in tablas:
+            yield (tabla, nombre, columnas, condicion), nombre in {i["name"] for i in inspector.get_indexes(tabla)}
+
+def crear_indices(op, normalizado: bool, tablas=("indicadores", "hitos")):
+    for (tabla, nombre, columnas, condicion), existe in list(_indices(op, normalizado, tablas)):
+        if not existe:
+            op.create_index(nombre, tabla, columnas, postgresql_where=condicion, sqlite_where=condicion)
+
+def borrar_indices(op, normalizado: bool, tablas=("indicadores", "hitos")) -> bool:
+    """Borra los que existan; True si había alguno (la base ya pasó por la migración 0007)"""
+    borrados = False
+    for (tabla, nombre, _, _), existe in list(_indices(op, normalizado, tablas)):
+        if existe:
+            op.drop_index(nombre, table_name=tabla)
+            borrados = True
+    return borrados
+
+def _por_tabla(referencias):
+    tablas = {}
+    for referencia in referencias:
+        tablas.setdefault(referencia[0], []).append(referencia)
+    return tablas.items()
+
+def aplicar(op, tablas=None):
+    """Texto repetido por fila -> tablas de lookup + claves enteras indexadas"""
+    crear_tablas_dimension(op)
+    referencias = _referencias(op, tablas)
+    tablas_afectadas = {r[0] for r in referencias}
+    # Los índices sobre columnas de texto se van con ellas (en SQLite el batch
+    # no puede recrear la tabla con un índice sobre una columna borrada)
+    con_indices = borrar_indices(op, False, tablas_afectadas)
+
+    for tabla, texto, _, dim, _ in referencias:
+        op.execute(
+            f'INSERT INTO {dim} (nombre) SELECT DISTINCT "{texto}" FROM {tabla} '
+            f'WHERE "{texto}" IS NOT NULL AND "{texto}" NOT IN (SELECT nombre FROM {dim})'
+        )
+
+    for tabla, referencias in _por_tabla(referencias):
+        with op.batch_alter_table(tabla) as batch:
+            for _, _, fk, dim, _ in referencias:
+                batch.add_column(sa.Column(fk, sa.Integer))
+                batch.create_foreign_key(f"fk_{tabla}_{fk}", dim, [fk], ["id"])
+        for _, texto, fk, dim, _ in referencias:
+            op.execute(
+                f'UPDATE {tabla} SET {fk} = (SELECT id FROM {dim} WHERE nombre = {tabla}."{texto}")'
+            )
+        with op.batch_alter_table(tabla) as batch:
+            for _, texto, fk, _, indice in referencias:
+                if indice:
+                    batch.drop_index(indice)
+                batch.drop_column(texto)
+                batch.create_index(f"ix_{tabla}_{fk}", [fk])
+    if con_indices:
+        crear_indices(op, True, tablas_afectadas)
+
+def revertir(op, tablas=None):
+    """Claves enteras -> columnas de texto originales (las tablas de lookup se conservan)"""
+    referencias = _referencias(op, tablas)
+    tablas_afectadas = {r[0] for r in referencias}
+    con_indices = borrar_indices(op, True, tablas_afectadas)
+    for tabla, referencias in _por_tabla(referencias):
+        with op.batch_alter_table(tabla) as batch:
+            for _, texto, _, _, _ in referencias:
+                batch.add_column(sa.Column(texto, sa.String))
+        for _, texto, fk, dim, _ in referencias:
+            op.execute(
+                f'UPDATE {tabla} SET "{texto}" = (SELECT nombre FROM {dim} WHERE id = {tabla}.{fk})'
+            )
+        with op.batch_alter_table(tabla) as batch:
+            for _, texto, fk, _, indice in referencias:
+                batch.drop_index(f"ix_{tabla}_{fk}")
+                batch.drop_constraint(f"fk_{tabla}_{fk}", type_="foreignkey")
+                batch.drop_column(fk)
+                if indice:
+                    batch.create_index(indice, [texto])
+    if con_indices:
+        crear_indices(op, False, tablas_afectadas)
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in ("aplicar", "revertir"):
+        print(__doc__)
+        sys.exit(1)
+
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from app.database import get_engine
+
+    with get_engine().connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # Igual que en alembic/env.py: el batch recrea indicadores y no debe borrar los hitos
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            conn.commit()
+        with conn.begin():
+            normalizado = esta_normalizado(conn)
+            if sys.argv[1] == "aplicar" and normalizado:
+                print("✅ El esquema ya está normalizado")
+                return
+            if sys.argv[1] == "revertir" and not normalizado:
+                print("✅ El esquema ya usa columnas de texto")
+                return
+            op = Operations(MigrationContext.configure(conn))
+            aplicar(op) if sys.argv[1] == "aplicar" else revertir(op)
+
+    print(f"🎉 Migración '{sys.argv[1]}' completada")
+    if sys.argv[1] == "aplicar":
+        print("💡 Activa SCHEMA_NORMALIZADO=true en la app")
+    else:
+        print("💡 Desactiva SCHEMA_NORMALIZADO en la app")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+🪞 Réplica local de prueba (SQLite)
+Copia periódicamente la base SQLite de desarrollo a otro archivo, con un
+retraso configurable, para probar DATABASE_REPLICA_URL sin PostgreSQL
+
+Uso (desde backend/, con la API usando ./indicadores.db):
+    python replica_local.py --cada 1 --retraso 3
+    DATABASE_REPLICA_URL=sqlite:///./indicadores_replica.db uvicorn app.main:app --reload
+
+Detener el script simula una réplica que deja de replicar (el lag crece y
+la API vuelve al primario); borrar el archivo simula una réplica caída.
+"""
+
+import argparse
+import sqlite3
+import time
+from collections import deque
+
+def main():
+    parser = argparse.ArgumentParser(description="Réplica SQLite con retraso")
+    parser.add_argument("--primario", default="indicadores.db")
+    parser.add_argument("--replica", default="indicadores_replica.db")
+    parser.add_argument("--cada", type=float, default=1.0, help="segundos entre copias")
+    parser.add_argument("--retraso", type=float, default=0.0, help="segundos que tarda una copia en aplicarse")
+    args = parser.parse_args()
+
+    pendientes = deque()
+    print(f"🪞 {args.primario} -> {args.replica} cada {args.cada}s con {args.retraso}s de retraso (Ctrl+C para detener)")
+    while True:
+        # Foto consistente del primario en memoria, aplicada cuando cumple el retraso
+        foto = sqlite3.connect(":memory:")
+        with sqlite3.connect(args.primario) as origen:
+            origen.backup(foto)
+        pendientes.append((time.time(), foto))
+
+        while pendientes and time.time() - pendientes[0][0] >= args.retraso:
+            _, lista = pendientes.popleft()
+            with sqlite3.connect(args.replica) as destino:
+                lista.backup(destino)
+            lista.close()
+        time.sleep(args.cada)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n🛑 Réplica detenida")
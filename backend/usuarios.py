@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+👤 Gestión de usuarios de la API
+Crea, deshabilita y cambia contraseñas de los usuarios guardados en la BD
+
+Uso (desde backend/):
+    python usuarios.py crear admin --email admin@indicadores.com --nombre "Administrador"
+    python usuarios.py password admin
+    python usuarios.py deshabilitar user
+    python usuarios.py habilitar user
+    python usuarios.py listar
+"""
+
+import argparse
+import getpass
+import sys
+
+from app.database import Base, SessionLocal, get_engine
+from app.models.usuario import Usuario
+from app.crud import usuario as crud_usuario
+from app.auth import get_password_hash, validate_password_strength
+
+def pedir_password() -> str:
+    password = getpass.getpass("Contraseña: ")
+    if password != getpass.getpass("Repetir contraseña: "):
+        print("❌ Las contraseñas no coinciden")
+        sys.exit(1)
+    if not validate_password_strength(password):
+        print("❌ La contraseña debe tener 8+ caracteres, mayúsculas, minúsculas y dígitos")
+        sys.exit(1)
+    return password
+
+def main():
+    parser = argparse.ArgumentParser(description="Gestión de usuarios")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    crear = sub.add_parser("crear")
+    crear.add_argument("username")
+    crear.add_argument("--email")
+    crear.add_argument("--nombre")
+    for accion in ("password", "deshabilitar", "habilitar"):
+        sub.add_parser(accion).add_argument("username")
+    sub.add_parser("listar")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=get_engine(), tables=[Usuario.__table__])
+    with SessionLocal() as db:
+        if args.accion == "listar":
+            for u in crud_usuario.get_usuarios(db):
+                print(f"{'🚫' if u.disabled else '✅'} {u.username:20s} {u.email or ''}")
+            return
+
+        if args.accion == "crear":
+            if crud_usuario.get_usuario(db, args.username):
+                print(f"❌ El usuario {args.username} ya existe")
+                sys.exit(1)
+            crud_usuario.create_usuario(
+                db, args.username, get_password_hash(pedir_password()),
+                email=args.email, full_name=args.nombre,
+            )
+        elif args.accion == "password":
+            cambios = {"hashed_password": get_password_hash(pedir_password())}
+        elif args.accion in ("deshabilitar", "habilitar"):
+            cambios = {"disabled": args.accion == "deshabilitar"}
+
+        if args.accion != "crear" and crud_usuario.update_usuario(db, args.username, **cambios) is None:
+            print(f"❌ No existe el usuario {args.username}")
+            sys.exit(1)
+        print(f"✅ Usuario {args.username}: {args.accion} listo")
+
+if __name__ == "__main__":
+    main()
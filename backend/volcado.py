@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+💾 Volcado y restauración de indicadores e hitos
+Guarda las tablas en un archivo binario columnar y comprimido (.indvol), con
+versión de formato y checksums. Lo restaura con COPY en PostgreSQL o con
+executemany en SQLite, sin pandas ni el Excel: sirve para levantar entornos
+de prueba y benchmarks con datos reales en segundos.
+
+Uso (desde backend/, contra la BD de DATABASE_URL o ./indicadores.db):
+    python volcado.py volcar datos.indvol
+    python volcado.py restaurar datos.indvol               # las tablas deben estar vacías
+    python volcado.py restaurar datos.indvol --reemplazar  # borra lo que haya antes
+    python volcado.py verificar datos.indvol
+
+Formato: MAGIA, versión, cabecera JSON (tablas, columnas, tipos, offsets,
+sha256 de cada bloque) y su sha256, y un bloque zlib por columna:
+- enteros, reales, fechas (días) y fecha-hora (microsegundos) como arrays fijos
+- texto como diccionario (valores distintos una vez y un código por fila)
+- si la columna tiene nulos, antes va un byte por fila con 1 donde es nulo
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import struct
+import sys
+import os
+import time
+import zlib
+from array import array
+from datetime import date, datetime, timedelta
+
+import sqlalchemy as sa
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base, USANDO_SQLITE_LOCAL, get_engine
+from app.models import indicador, usuario, archivo  # noqa: F401 (registran las tablas en Base)
+from app import cambios
+from migrar_dimensiones import TABLAS_DIMENSION, esta_normalizado
+
+MAGIA = b"INDVOL"
+VERSION_FORMATO = 1
+_PRELUDIO = struct.Struct("<HI")  # versión, largo de la cabecera
+# Las dimensiones (esquema normalizado) antes que las tablas que las referencian
+TABLAS = ["indicadores", "hitos"]
+# Desde la migración 0006; se vuelcan si existen en el origen
+TABLAS_ARCHIVO = ["indicadores_archivo", "hitos_archivo"]
+FILAS_POR_COPY = 100_000
+EPOCA = datetime(1970, 1, 1)
+EPOCA_DIAS = date(1970, 1, 1).toordinal()
+NULO_TEXTO = 0xFFFFFFFF
+_TIPOS_ARRAY = {"int": "q", "bool": "q", "float": "d", "date": "i", "datetime": "q"}
+
+class VolcadoInvalido(Exception):
+    pass
+
+def _tipo(columna) -> str:
+    try:
+        python = columna.type.python_type
+    except NotImplementedError:
+        return "str"
+    for tipo, nombre in ((bool, "bool"), (int, "int"), (float, "float"), (datetime, "datetime"), (date, "date")):
+        if python is tipo:
+            return nombre
+    return "float" if python.__name__ == "Decimal" else "str"
+
+def _a_bytes(valores: array) -> bytes:
+    if sys.byteorder == "big":
+        valores = array(valores.typecode, valores)
+        valores.byteswap()
+    return valores.tobytes()
+
+def _de_bytes(typecode: str, datos: bytes) -> array:
+    valores = array(typecode)
+    valores.frombytes(datos)
+    if sys.byteorder == "big":
+        valores.byteswap()
+    return valores
+
+def codificar(tipo: str, valores: list) -> bytes:
+    nulos = bytes(v is None for v in valores)
+    partes = [nulos] if any(nulos) else []
+    if tipo == "str":
+        diccionario = {}
+        codigos = array("I", (NULO_TEXTO if v is None else diccionario.setdefault(v, len(diccionario)) for v in valores))
+        textos = [v.encode("utf-8") for v in diccionario]
+        largos = array("I", map(len, textos))
+        blob = b"".join(textos)
+        partes += [struct.pack("<II", len(textos), len(blob)), _a_bytes(largos), blob, _a_bytes(codigos)]
+    else:
+        if tipo == "date":
+            numeros = (0 if v is None else v.toordinal() - EPOCA_DIAS for v in valores)
+        elif tipo == "datetime":
+            numeros = (0 if v is None else (v - EPOCA) // timedelta(microseconds=1) for v in valores)
+        else:
+            numeros = (0 if v is None else v for v in valores)
+        partes.append(_a_bytes(array(_TIPOS_ARRAY[tipo], numeros)))
+    return zlib.compress(b"".join(partes), 6)
+
+def decodificar(tipo: str, filas: int, hay_nulos: bool, bloque: bytes) -> list:
+    datos = memoryview(zlib.decompress(bloque))
+    nulos = bytes(datos[:filas]) if hay_nulos else None
+    if hay_nulos:
+        datos = datos[filas:]
+    if tipo == "str":
+        cantidad, largo_blob = struct.unpack_from("<II", datos)
+        largos = _de_bytes("I", datos[8:8 + 4 * cantidad])
+        inicio = 8 + 4 * cantidad
+        blob = bytes(datos[inicio:inicio + largo_blob])
+        textos, desde = [], 0
+        for largo in largos:
+            textos.append(blob[desde:desde + largo].decode("utf-8"))
+            desde += largo
+        codigos = _de_bytes("I", datos[inicio + largo_blob:])
+        return [None if c == NULO_TEXTO else textos[c] for c in codigos]
+
+    numeros = _de_bytes(_TIPOS_ARRAY[tipo], datos)
+    if tipo == "date":
+        valores = [date.fromordinal(n + EPOCA_DIAS) for n in numeros]
+    elif tipo == "datetime":
+        valores = [EPOCA + timedelta(microseconds=n) for n in numeros]
+    elif tipo == "bool":
+        valores = [bool(n) for n in numeros]
+    else:
+        valores = numeros.tolist()
+    if nulos is not None:
+        valores = [None if nulo else v for v, nulo in zip(valores, nulos)]
+    return valores
+
+def _tablas_a_volcar(bind):
+    normalizado = esta_normalizado(bind)
+    existentes = set(sa.inspect(bind).get_table_names())
+    archivo = [t for t in TABLAS_ARCHIVO if t in existentes]
+    return (TABLAS_DIMENSION if normalizado else []) + TABLAS + archivo, normalizado
+
+def volcar(ruta: str) -> dict:
+    engine = get_engine()
+    nombres, normalizado = _tablas_a_volcar(engine)
+    metadata = sa.MetaData()
+    cabecera = {
+        "version": VERSION_FORMATO,
+        "creado": datetime.utcnow().isoformat(),
+        "origen": engine.dialect.name,
+        "normalizado": normalizado,
+        "tablas": [],
+    }
+    bloques, desde = [], 0
+    with engine.connect() as conn:
+        for nombre in nombres:
+            tabla = sa.Table(nombre, metadata, autoload_with=conn)
+            orden = list(tabla.primary_key.columns) or list(tabla.columns)[:1]
+            filas = conn.execute(sa.select(tabla).order_by(*orden)).all()
+            columnas = []
+            for i, columna in enumerate(tabla.columns):
+                tipo = _tipo(columna)
+                valores = [fila[i] for fila in filas]
+                bloque = codificar(tipo, valores)
+                columnas.append({
+                    "nombre": columna.name, "tipo": tipo, "nulos": any(v is None for v in valores),
+                    "offset": desde, "largo": len(bloque), "sha256": hashlib.sha256(bloque).hexdigest(),
+                })
+                bloques.append(bloque)
+                desde += len(bloque)
+            cabecera["tablas"].append({"nombre": nombre, "filas": len(filas), "columnas": columnas})
+
+    texto = json.dumps(cabecera, ensure_ascii=False).encode("utf-8")
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(MAGIA + _PRELUDIO.pack(VERSION_FORMATO, len(texto)) + texto + hashlib.sha256(texto).digest())
+        for bloque in bloques:
+            archivo.write(bloque)
+    os.replace(temporal, ruta)
+    return cabecera
+
+def leer(ruta: str):
+    """(cabecera, {tabla: (nombres de columna, lista de columnas)}) verificando cada checksum"""
+    with open(ruta, "rb") as archivo:
+        contenido = archivo.read()
+    if not contenido.startswith(MAGIA):
+        raise VolcadoInvalido(f"{ruta} no es un volcado de indicadores")
+    version, largo = _PRELUDIO.unpack_from(contenido, len(MAGIA))
+    if version > VERSION_FORMATO:
+        raise VolcadoInvalido(f"Formato v{version} más nuevo que el soportado (v{VERSION_FORMATO}): actualizar el backend")
+    inicio = len(MAGIA) + _PRELUDIO.size
+    texto = contenido[inicio:inicio + largo]
+    if hashlib.sha256(texto).digest() != contenido[inicio + largo:inicio + largo + 32]:
+        raise VolcadoInvalido("La cabecera no coincide con su checksum: archivo dañado")
+    cabecera = json.loads(texto)
+    datos = memoryview(contenido)[inicio + largo + 32:]
+
+    tablas = {}
+    for tabla in cabecera["tablas"]:
+        nombres, columnas = [], []
+        for columna in tabla["columnas"]:
+            bloque = bytes(datos[columna["offset"]:columna["offset"] + columna["largo"]])
+            if hashlib.sha256(bloque).hexdigest() != columna["sha256"]:
+                raise VolcadoInvalido(f"{tabla['nombre']}.{columna['nombre']}: checksum distinto, archivo dañado")
+            nombres.append(columna["nombre"])
+            columnas.append(decodificar(columna["tipo"], tabla["filas"], columna["nulos"], bloque))
+        tablas[tabla["nombre"]] = (nombres, columnas)
+    return cabecera, tablas
+
+def _texto_copy(valor) -> str:
+    """Un valor en el formato text de COPY"""
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, str):
+        return valor.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=" ")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+def _insertar(conn, tabla: sa.Table, nombres: list, filas: list):
+    dbapi = conn.connection.dbapi_connection
+    columnas = ", ".join(f'"{n}"' for n in nombres)
+    if conn.dialect.name == "postgresql":
+        with dbapi.cursor() as cursor:
+            for desde in range(0, len(filas), FILAS_POR_COPY):
+                buffer = io.StringIO()
+                for fila in filas[desde:desde + FILAS_POR_COPY]:
+                    buffer.write("\t".join(map(_texto_copy, fila)))
+                    buffer.write("\n")
+                buffer.seek(0)
+                cursor.copy_expert(f'COPY "{tabla.name}" ({columnas}) FROM STDIN', buffer)
+        return
+    if conn.dialect.name == "sqlite":
+        # Mismo formato que escribe SQLAlchemy (fechas como texto ISO)
+        procesadores = [tabla.columns[n].type.bind_processor(conn.dialect) for n in nombres]
+        if any(procesadores):
+            filas = [
+                tuple(p(v) if p else v for p, v in zip(procesadores, fila))
+                for fila in filas
+            ]
+        marcas = ", ".join("?" for _ in nombres)
+        dbapi.cursor().executemany(f'INSERT INTO "{tabla.name}" ({columnas}) VALUES ({marcas})', filas)
+        return
+    conn.execute(sa.insert(tabla), [dict(zip(nombres, fila)) for fila in filas])
+
+def restaurar(ruta: str, reemplazar: bool = False) -> dict:
+    cabecera, tablas = leer(ruta)
+    engine = get_engine()
+    if USANDO_SQLITE_LOCAL:
+        Base.metadata.create_all(bind=engine)
+    if esta_normalizado(engine) != cabecera["normalizado"]:
+        esquema, accion = ("normalizado", "aplicar") if cabecera["normalizado"] else ("de texto", "revertir")
+        raise VolcadoInvalido(f"El volcado es del esquema {esquema}: correr antes `python migrar_dimensiones.py {accion}` en la BD destino")
+
+    metadata = sa.MetaData()
+    with engine.begin() as conn:
+        faltantes = set(tablas) - set(sa.inspect(conn).get_table_names())
+        if faltantes:
+            raise VolcadoInvalido(f"La BD destino no tiene las tablas {sorted(faltantes)} (¿faltan migraciones?)")
+        destino = {nombre: sa.Table(nombre, metadata, autoload_with=conn) for nombre in tablas}
+        for nombre, (nombres, _) in tablas.items():
+            faltantes = set(nombres) - set(destino[nombre].columns.keys())
+            if faltantes:
+                raise VolcadoInvalido(f"{nombre} no tiene las columnas {sorted(faltantes)} (¿faltan migraciones?)")
+        existentes = {n: conn.execute(sa.select(sa.func.count()).select_from(t)).scalar() for n, t in destino.items()}
+        if any(existentes.values()):
+            if not reemplazar:
+                raise VolcadoInvalido(f"La BD ya tiene datos ({existentes}); usar --reemplazar para borrarlos")
+            for nombre in reversed(list(tablas)):
+                conn.execute(sa.delete(destino[nombre]))
+
+        for nombre, (nombres, columnas) in tablas.items():
+            _insertar(conn, destino[nombre], nombres, list(zip(*columnas)))
+            # Las secuencias de los id siguen después del máximo restaurado
+            if conn.dialect.name == "postgresql" and "id" in nombres:
+                conn.execute(sa.text(
+                    f"SELECT setval(pg_get_serial_sequence('{nombre}', 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM \"{nombre}\""
+                ))
+        # Los tokens de sincronización anteriores ya no describen estos datos
+        if "cambios" in sa.inspect(conn).get_table_names():
+            cambios.cortar(conn)
+    return cabecera
+
+def _resumen(cabecera: dict) -> str:
+    return ", ".join(f"{t['nombre']}: {t['filas']}" for t in cabecera["tablas"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Volcado y restauración de indicadores e hitos")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    sub.add_parser("volcar").add_argument("archivo")
+    restaurar_parser = sub.add_parser("restaurar")
+    restaurar_parser.add_argument("archivo")
+    restaurar_parser.add_argument("--reemplazar", action="store_true", help="borrar los datos existentes antes")
+    sub.add_parser("verificar").add_argument("archivo")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    try:
+        if args.accion == "volcar":
+            cabecera = volcar(args.archivo)
+            detalle = f"{os.path.getsize(args.archivo) / 1024:.0f}KB"
+        elif args.accion == "restaurar":
+            cabecera = restaurar(args.archivo, reemplazar=args.reemplazar)
+            detalle = f"desde {cabecera['origen']} ({cabecera['creado'][:19]})"
+        else:
+            cabecera, _ = leer(args.archivo)
+            detalle = f"v{cabecera['version']}, checksums correctos"
+    except (VolcadoInvalido, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {args.accion} {args.archivo}: {_resumen(cabecera)} - {detalle} en {time.perf_counter() - inicio:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,23 @@
 Script para extraer datos reales del Excel y convertirlos a código Python
 """
 
-import pandas as pd
+import os
+import sys
 import json
-from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from app.excel import COLUMNAS_FECHA, leer_indicadores
 
 def extract_real_data():
-    # Leer Excel
-    df = pd.read_excel('backend/Base de datos.xlsx')
+    # Leer Excel (solo las columnas usadas, fechas ya convertidas; ver backend/app/excel.py)
+    df = leer_indicadores('backend/Base de datos.xlsx')
     print(f"📊 Total filas leídas: {len(df)}")
     
-    # Convertir fechas a string para JSON
-    def convert_dates(df):
-        for col in ['Fecha de Inicio', 'Fecha Finalizacion', 'Fecha de Carga']:
-            if col in df.columns:
-                df[col] = df[col].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) and hasattr(x, 'strftime') else str(x) if pd.notnull(x) else None)
-        return df
-
-    df = convert_dates(df)
+    # Convertir fechas a string para JSON (una sola vez por columna)
+    for col in COLUMNAS_FECHA:
+        df[col] = df[col].dt.strftime('%Y-%m-%d').astype(object).where(df[col].notna(), None)
 
     # Agrupar por indicador
     indicadores_data = []
@@ -1,9 +1,42 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
 import { useToast } from '@/components/ui/use-toast';
 import { indicadoresApi } from '@/lib/api';
 
 const IndicadoresContext = createContext();
 
+// Copia local de los indicadores y el token del último cambio visto: al abrir se
+// muestra al instante y se piden solo los cambios posteriores (/api/indicadores/cambios)
+const CLAVE_CACHE = 'indicadores-sincronizados';
+
+const leerCache = () => {
+  try {
+    const cache = JSON.parse(localStorage.getItem(CLAVE_CACHE));
+    return cache && Array.isArray(cache.indicadores) && cache.token ? cache : null;
+  } catch {
+    return null;
+  }
+};
+
+const guardarCache = (indicadores, token) => {
+  try {
+    localStorage.setItem(CLAVE_CACHE, JSON.stringify({ indicadores, token }));
+  } catch (err) {
+    // Sin espacio o sin localStorage: se sigue sin copia local
+    console.warn('⚠️ CONTEXTO - No se pudo guardar la copia local:', err);
+  }
+};
+
+// Reemplaza los indicadores que cambiaron, agrega los nuevos y quita los borrados
+const aplicarCambios = (actuales, cambios) => {
+  const borrados = new Set(cambios.borrados.indicadores);
+  const cambiados = new Map(cambios.indicadores.map(ind => [ind.id, ind]));
+  const existentes = new Set(actuales.map(ind => ind.id));
+  return [
+    ...actuales.filter(ind => !borrados.has(ind.id)).map(ind => cambiados.get(ind.id) || ind),
+    ...cambios.indicadores.filter(ind => !existentes.has(ind.id)),
+  ];
+};
+
 export const useIndicadores = () => {
   const context = useContext(IndicadoresContext);
   if (!context) {
@@ -17,20 +50,27 @@ export const IndicadoresProvider = ({ children }) => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const { toast } = useToast();
+  // Token del último cambio aplicado (null hasta la primera carga completa)
+  const tokenRef = useRef(null);
 
-  // VPs basados en los datos reales
-  const vps = [
-    'VPD',
-    'VPE', 
-    'PRE'
-  ];
+  // Opciones de filtros servidas por /api/indicadores/dimensiones (null hasta cargar)
+  const [dimensiones, setDimensiones] = useState(null);
+
+  // VPs basados en los datos reales (valores por defecto mientras cargan las dimensiones)
+  const vps = dimensiones?.vps?.length
+    ? dimensiones.vps.map(d => d.valor)
+    : ['VPD', 'VPE', 'PRE'];
 
   // Áreas basadas en los datos reales (nombres exactos como aparecen en la BD)
-  const areasPorVP = {
-    VPD: ['Alianza Estratégica', 'Análisis y Estudios Ecónomicos', 'Efectividad y Desarrollo'],
-    VPE: ['TEI', 'Talento Humano'],
-    PRE: ['Auditoria', 'Comunicación', 'Gestión de Riesgos', 'Legal']
-  };
+  const areasPorVP = dimensiones?.areas && Object.keys(dimensiones.areas).length
+    ? Object.fromEntries(
+        Object.entries(dimensiones.areas).map(([vp, lista]) => [vp, lista.map(d => d.valor)])
+      )
+    : {
+        VPD: ['Alianza Estratégica', 'Análisis y Estudios Ecónomicos', 'Efectividad y Desarrollo'],
+        VPE: ['TEI', 'Talento Humano'],
+        PRE: ['Auditoria', 'Comunicación', 'Gestión de Riesgos', 'Legal']
+      };
 
   // Lista completa de todas las áreas para compatibilidad
   const areas = Object.values(areasPorVP).flat();
@@ -41,11 +81,12 @@ export const IndicadoresProvider = ({ children }) => {
   };
 
   // Estados basados en los datos reales (nombres exactos como aparecen en la BD)
-  const estados = [
-    'Completado',
-    'En Progreso', 
-    'Por Comenzar'
-  ];
+  const estados = dimensiones?.estados?.length
+    ? dimensiones.estados.map(d => d.valor)
+    : ['Completado', 'En Progreso', 'Por Comenzar'];
+
+  // Responsables de hitos con conteo, para los selectores
+  const responsables = (dimensiones?.responsables || []).map(d => d.valor);
 
   // Tipos de indicador basados en los datos reales (nombres exactos como aparecen en la BD)
   const tiposIndicador = [
@@ -98,24 +139,77 @@ export const IndicadoresProvider = ({ children }) => {
       }, 100);
       
       setError(null);
+      return dataToUse;
     } catch (err) {
       console.error('❌ CONTEXTO - Error final al cargar los indicadores:', err);
       setError('Error al cargar los indicadores: ' + err.message);
       setIndicadores([]); // Asegurar que sea array vacío en caso de error
+      return null;
     } finally {
       setLoading(false);
       console.log('🔍 CONTEXTO - Loading finalizado');
     }
   };
 
+  const cargarDimensiones = async () => {
+    try {
+      setDimensiones(await indicadoresApi.getDimensiones());
+    } catch (err) {
+      console.error('❌ CONTEXTO - Error al cargar dimensiones:', err);
+    }
+  };
+
+  // Pide los cambios desde el token hasta ponerse al día; si el servidor ya no
+  // puede responder desde ese token (o no hay), recarga todo
+  const sincronizar = async () => {
+    try {
+      let cambios;
+      do {
+        cambios = await indicadoresApi.getCambios(tokenRef.current);
+        if (cambios.completo) {
+          // El token se toma antes de la carga: lo que cambie entre medio se vuelve a aplicar
+          const datos = await cargarIndicadores();
+          if (datos) {
+            tokenRef.current = cambios.token;
+            guardarCache(datos, cambios.token);
+          }
+          return;
+        }
+        setIndicadores(prev => aplicarCambios(prev, cambios));
+        tokenRef.current = cambios.token;
+      } while (cambios.hay_mas);
+      console.log('🔄 CONTEXTO - Sincronizado hasta el cambio', tokenRef.current);
+    } catch (err) {
+      // Sin conexión: se sigue mostrando la copia local
+      console.error('❌ CONTEXTO - Error al sincronizar:', err);
+    }
+  };
+
   useEffect(() => {
-    cargarIndicadores();
+    const cache = leerCache();
+    if (cache) {
+      tokenRef.current = cache.token;
+      setIndicadores(cache.indicadores);
+      setLoading(false);
+    }
+    sincronizar();
+    cargarDimensiones();
+
+    window.addEventListener('online', sincronizar);
+    return () => window.removeEventListener('online', sincronizar);
   }, []);
 
+  useEffect(() => {
+    if (tokenRef.current) {
+      guardarCache(indicadores, tokenRef.current);
+    }
+  }, [indicadores]);
+
   const agregarIndicador = async (nuevoIndicador) => {
     try {
       const response = await indicadoresApi.createIndicador(nuevoIndicador);
       setIndicadores(prev => [...prev, response.data]);
+      cargarDimensiones();
       toast({
         title: "Indicador agregado",
         description: "El indicador y sus hitos han sido agregados exitosamente.",
@@ -154,6 +248,7 @@ export const IndicadoresProvider = ({ children }) => {
     try {
       const response = await indicadoresApi.updateIndicador(id, datosActualizados);
       setIndicadores(prev => prev.map(ind => ind.id === id ? response.data : ind));
+      cargarDimensiones();
       toast({
         title: "Hito actualizado",
         description: "El hito ha sido actualizado exitosamente.",
@@ -171,6 +266,7 @@ export const IndicadoresProvider = ({ children }) => {
     try {
       await indicadoresApi.deleteIndicador(id);
       setIndicadores(prev => prev.filter(ind => ind.id !== id));
+      cargarDimensiones();
       toast({
         title: "Indicador eliminado",
         description: "El indicador ha sido eliminado exitosamente.",
@@ -297,11 +393,13 @@ export const IndicadoresProvider = ({ children }) => {
     areasPorVP,
     obtenerAreasPorVP,
     estados,
+    responsables,
     tiposIndicador,
     agregarIndicador,
     actualizarIndicador,
     eliminarIndicador,
     cargarIndicadores,
+    sincronizar,
     obtenerEstadisticas,
     filtrarPorArea,
     exportarXLSX
@@ -255,6 +255,13 @@ export const indicadoresApi = {
     return result.data;
   },
 
+  // 🧩 GET /api/indicadores?fields=... - Solo las columnas pedidas (proyección)
+  getIndicadoresCampos: async (fields, { skip = 0, limit = 100 } = {}) => {
+    const params = new URLSearchParams({ fields, skip, limit });
+    const result = await secureApiCall(`/api/indicadores/?${params}`);
+    return result.data;
+  },
+
   // 🏢 GET /api/indicadores/area/:area - Indicadores por área
   getIndicadoresByArea: async (area) => {
     const encodedArea = encodeURIComponent(area);
@@ -300,6 +307,28 @@ export const indicadoresApi = {
     return result.data;
   },
 
+  // 🧭 GET /api/indicadores/dimensiones - Opciones de filtros (vps, áreas por vp, responsables, estados)
+  getDimensiones: async () => {
+    const result = await secureApiCall('/api/indicadores/dimensiones');
+    return result.data;
+  },
+
+  // 🔄 GET /api/indicadores/cambios?token= - Cambios desde el último token (sincronización incremental)
+  getCambios: async (token) => {
+    const params = new URLSearchParams(token ? { token } : {});
+    const result = await secureApiCall(`/api/indicadores/cambios?${params}`);
+    return result.data;
+  },
+
+  // 🚦 GET /api/indicadores/riesgo - Hitos vencidos o atrasados, de mayor a menor riesgo
+  getRiesgo: async (filtros = {}) => {
+    const params = new URLSearchParams(
+      Object.entries(filtros).filter(([, valor]) => valor !== undefined && valor !== null)
+    );
+    const result = await secureApiCall(`/api/indicadores/riesgo?${params}`);
+    return result.data;
+  },
+
   // 🔍 GET /health - Health check del backend
   healthCheck: async () => {
     const result = await secureApiCall('/health');
@@ -1,7 +1,8 @@
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect, useMemo, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { useIndicadores } from '@/context/IndicadoresContext';
+import { indicadoresApi } from '@/lib/api';
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
@@ -9,9 +10,15 @@ import { Label } from '@/components/ui/label';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { Edit3, Filter, RefreshCw, CheckCircle, Clock, Circle, Target } from 'lucide-react';
 
+// Solo las columnas que muestran los selectores y la tabla; las fechas del
+// hito y el resto del indicador se leen del indicador completo al editar
+const CATALOGO_CAMPOS = 'vp,area,nombreIndicador,hitos.idHito,hitos.nombreHito,hitos.responsableHito,' +
+  'hitos.avanceHito,hitos.estadoHito';
+const CATALOGO_PAGINA = 500;
+
 const ActualizarIndicador = () => {
   const navigate = useNavigate();
-  const { indicadores, actualizarIndicador, estados, vps, areas } = useIndicadores();
+  const { indicadores, actualizarIndicador, estados, vps, areas, obtenerAreasPorVP } = useIndicadores();
   
   // Estados para filtros siguiendo jerarquía: VP → Área → Indicador → Hito → Responsable
   const [vpFiltro, setVpFiltro] = useState('');
@@ -20,6 +27,29 @@ const ActualizarIndicador = () => {
   const [hitoFiltro, setHitoFiltro] = useState('');
   const [responsableFiltro, setResponsableFiltro] = useState('');
   
+  // Catálogo liviano (indicadores con sus hitos) para los selectores y la tabla.
+  // Se pide por páginas al montar la vista y otra vez después de guardar un hito
+  const [catalogo, setCatalogo] = useState([]);
+
+  const cargarCatalogo = useCallback(async () => {
+    try {
+      const todos = [];
+      for (let skip = 0; ; skip += CATALOGO_PAGINA) {
+        const pagina = await indicadoresApi.getIndicadoresCampos(CATALOGO_CAMPOS, { skip, limit: CATALOGO_PAGINA });
+        if (!Array.isArray(pagina)) break;
+        todos.push(...pagina);
+        if (pagina.length < CATALOGO_PAGINA) break;
+      }
+      setCatalogo(todos);
+    } catch (err) {
+      console.error('❌ Error al cargar catálogo de indicadores:', err);
+    }
+  }, []);
+
+  useEffect(() => {
+    cargarCatalogo();
+  }, [cargarCatalogo]);
+
   // Estados para la actualización
   const [hitoSeleccionado, setHitoSeleccionado] = useState(null);
   const [mostrarModal, setMostrarModal] = useState(false);
@@ -34,9 +64,7 @@ const ActualizarIndicador = () => {
 
   // Crear lista de todos los hitos con información del indicador padre
   const todosLosHitos = useMemo(() => {
-    if (!Array.isArray(indicadores)) return [];
-    
-    return indicadores.flatMap(indicador => {
+    return catalogo.flatMap(indicador => {
       if (!indicador || !Array.isArray(indicador.hitos)) return [];
       
       return indicador.hitos
@@ -46,39 +74,33 @@ const ActualizarIndicador = () => {
           indicadorId: indicador.id,
           indicadorNombre: indicador.nombreIndicador || 'Sin nombre',
           vp: indicador.vp || 'Sin VP',
-          area: indicador.area || 'Sin área',
-          tipoIndicador: indicador.tipoIndicador || 'Sin tipo'
+          area: indicador.area || 'Sin área'
         }));
     });
-  }, [indicadores]);
+  }, [catalogo]);
 
   // Obtener áreas disponibles según VP seleccionado
   const areasDisponibles = useMemo(() => {
-    if (!vpFiltro || !Array.isArray(indicadores)) return [];
+    if (!vpFiltro) return [];
     
-    return [...new Set(
-      indicadores
-        .filter(ind => ind && ind.vp === vpFiltro)
-        .map(ind => ind.area)
-        .filter(Boolean) // Filtrar valores null/undefined
-    )];
-  }, [vpFiltro, indicadores]);
+    return obtenerAreasPorVP(vpFiltro);
+  }, [vpFiltro, obtenerAreasPorVP]);
 
   // Obtener indicadores disponibles según VP y Área seleccionados
   const indicadoresDisponibles = useMemo(() => {
-    if (!vpFiltro || !areaFiltro || !Array.isArray(indicadores)) return [];
+    if (!vpFiltro || !areaFiltro) return [];
     
-    return indicadores.filter(ind => ind && ind.vp === vpFiltro && ind.area === areaFiltro);
-  }, [vpFiltro, areaFiltro, indicadores]);
+    return catalogo.filter(ind => ind && ind.vp === vpFiltro && ind.area === areaFiltro);
+  }, [vpFiltro, areaFiltro, catalogo]);
 
   // Obtener hitos disponibles según indicador seleccionado
   const hitosDisponibles = useMemo(() => {
-    if (!indicadorFiltro || !Array.isArray(indicadores)) return [];
+    if (!indicadorFiltro) return [];
     
-    const indicadorSeleccionado = indicadores.find(ind => ind && ind.id === indicadorFiltro);
+    const indicadorSeleccionado = catalogo.find(ind => ind && ind.id === indicadorFiltro);
     return indicadorSeleccionado && Array.isArray(indicadorSeleccionado.hitos) ? 
       indicadorSeleccionado.hitos.filter(hito => hito) : [];
-  }, [indicadorFiltro, indicadores]);
+  }, [indicadorFiltro, catalogo]);
 
   // Obtener responsables disponibles según los filtros actuales
   const responsablesDisponibles = useMemo(() => {
@@ -153,7 +175,11 @@ const ActualizarIndicador = () => {
     }
   }, [responsableFiltro, responsablesDisponibles]);
 
-  const abrirModalActualizacion = (hito) => {
+  const abrirModalActualizacion = (hitoCatalogo) => {
+    // Completar con el hito del indicador completo (el mismo que se guarda): fechas y demás campos
+    const indicadorActual = indicadores.find(ind => ind && ind.id === hitoCatalogo.indicadorId);
+    const hitoCompleto = indicadorActual?.hitos?.find(h => h && h.idHito === hitoCatalogo.idHito) || {};
+    const hito = { ...hitoCompleto, ...hitoCatalogo };
     setHitoSeleccionado(hito);
     setFormData({
       avanceHito: hito.avanceHito || 0,
@@ -198,6 +224,7 @@ const ActualizarIndicador = () => {
       };
       
       await actualizarIndicador(hitoSeleccionado.indicadorId, indicadorActualizado);
+      await cargarCatalogo();
       cerrarModal();
     } catch (error) {
       console.error('Error al actualizar el hito:', error);
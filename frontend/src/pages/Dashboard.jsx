@@ -10,17 +10,22 @@ import {
   ListChecks,
   TrendingUp,
   PlusCircle,
-  RefreshCw
+  RefreshCw,
+  AlertTriangle
 } from 'lucide-react';
 import { useIndicadores } from '@/context/IndicadoresContext';
+import { indicadoresApi } from '@/lib/api';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 
+const NIVELES_RIESGO = { vencido: 'Vencido', en_riesgo: 'En riesgo', al_dia: 'Al día' };
+
 const Dashboard = () => {
   const { indicadores, areas } = useIndicadores();
   const [areaSeleccionada, setAreaSeleccionada] = useState('Todas');
   const [indicadoresFiltrados, setIndicadoresFiltrados] = useState([]);
+  const [hitosEnRiesgo, setHitosEnRiesgo] = useState([]);
 
 
 
@@ -39,6 +44,15 @@ const Dashboard = () => {
     }
   }, [indicadores, areaSeleccionada]);
 
+  // Hitos vencidos o atrasados (lo calcula el backend); se recarga cuando cambian los indicadores
+  useEffect(() => {
+    let vigente = true;
+    indicadoresApi.getRiesgo({ limit: 10, area: areaSeleccionada === 'Todas' ? null : areaSeleccionada })
+      .then(riesgo => { if (vigente) setHitosEnRiesgo(riesgo?.hitos || []); })
+      .catch(error => console.warn('⚠️ DASHBOARD - No se pudo cargar el riesgo de hitos:', error));
+    return () => { vigente = false; };
+  }, [indicadores, areaSeleccionada]);
+
   // Calcular estadísticas basadas en los indicadores filtrados
   const estadisticasFiltradas = React.useMemo(() => {
     console.log('🔍 DASHBOARD - Calculando estadísticas');
@@ -350,6 +364,67 @@ const Dashboard = () => {
         </motion.div>
       </motion.div>
 
+      <motion.div 
+        variants={containerVariants}
+        initial="hidden"
+        animate="visible"
+        className="mt-8"
+      >
+        <motion.div variants={itemVariants}>
+          <Card>
+            <CardHeader>
+              <CardTitle className="flex items-center gap-2">
+                <AlertTriangle className="h-5 w-5 text-red-500" />
+                Hitos en Riesgo ({areaSeleccionada === 'Todas' ? 'Todas las áreas' : areaSeleccionada})
+              </CardTitle>
+            </CardHeader>
+            <CardContent>
+              <div className="overflow-x-auto">
+                <table className="w-full">
+                  <thead>
+                    <tr className="border-b">
+                      <th className="text-left py-3 px-4 font-medium text-gray-600">Indicador</th>
+                      <th className="text-left py-3 px-4 font-medium text-gray-600">Hito</th>
+                      <th className="text-left py-3 px-4 font-medium text-gray-600">Área</th>
+                      <th className="text-left py-3 px-4 font-medium text-gray-600">Avance / Esperado</th>
+                      <th className="text-left py-3 px-4 font-medium text-gray-600">Vencido</th>
+                      <th className="text-left py-3 px-4 font-medium text-gray-600">Riesgo</th>
+                    </tr>
+                  </thead>
+                  <tbody>
+                    {hitosEnRiesgo.map(hito => (
+                      <tr key={hito.id} className="table-row-alt">
+                        <td className="py-3 px-4">{hito.nombreIndicador}</td>
+                        <td className="py-3 px-4">{hito.nombreHito}</td>
+                        <td className="py-3 px-4">{hito.area}</td>
+                        <td className="py-3 px-4">{hito.avanceHito}% / {hito.avanceEsperado}%</td>
+                        <td className="py-3 px-4">{hito.diasVencido > 0 ? `${hito.diasVencido} días` : '-'}</td>
+                        <td className="py-3 px-4">
+                          <span className={`px-2 py-1 rounded-full text-xs font-medium ${
+                            hito.nivelRiesgo === 'vencido' ? 'bg-red-100 text-red-800' :
+                            hito.nivelRiesgo === 'en_riesgo' ? 'bg-amber-100 text-amber-800' :
+                            'bg-gray-100 text-gray-800'
+                          }`}>
+                            {hito.puntajeRiesgo} {NIVELES_RIESGO[hito.nivelRiesgo] || hito.nivelRiesgo}
+                          </span>
+                        </td>
+                      </tr>
+                    ))}
+                    {hitosEnRiesgo.length === 0 && (
+                      <tr>
+                        <td colSpan="6" className="py-4 px-4 text-center text-gray-500">
+                          No hay hitos vencidos ni atrasados para el área seleccionada.
+                        </td>
+                      </tr>
+                    )}
+                  </tbody>
+                </table>
+              </div>
+            </CardContent>
+          </Card>
+        </motion.div>
+      </motion.div>
+
       <motion.div 
         variants={containerVariants}
         initial="hidden"
@@ -5,7 +5,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@
 import { Filter as FilterIcon } from 'lucide-react';
 
 const GanttChart = () => {
-  const { indicadores, vps, areas } = useIndicadores();
+  const { indicadores, vps, areas, obtenerAreasPorVP } = useIndicadores();
   
   // Estados para filtros (sin forzar jerarquía)
   const [vpFiltro, setVpFiltro] = React.useState('todas');
@@ -14,15 +14,10 @@ const GanttChart = () => {
 
   // Obtener áreas disponibles según VP seleccionado (opcional)
   const areasDisponibles = useMemo(() => {
-    if (vpFiltro === 'todas' || !Array.isArray(indicadores)) return areas || [];
+    if (vpFiltro === 'todas') return areas || [];
     
-    return [...new Set(
-      indicadores
-        .filter(ind => ind && ind.vp === vpFiltro)
-        .map(ind => ind.area)
-        .filter(Boolean)
-    )];
-  }, [vpFiltro, indicadores, areas]);
+    return obtenerAreasPorVP(vpFiltro);
+  }, [vpFiltro, obtenerAreasPorVP, areas]);
 
   // Obtener indicadores disponibles según filtros
   const indicadoresDisponibles = useMemo(() => {
@@ -10,7 +10,7 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '@
 import { Label } from '@/components/ui/label';
 
 const HistorialIndicadores = () => {
-  const { indicadores, vps, areas, estados, exportarXLSX } = useIndicadores();
+  const { indicadores, vps, areas, estados, exportarXLSX, obtenerAreasPorVP } = useIndicadores();
   
   console.log('🔍 HISTORIAL - Componente renderizándose');
   console.log('🔍 HISTORIAL - indicadores:', indicadores);
@@ -27,15 +27,10 @@ const HistorialIndicadores = () => {
 
   // Áreas filtradas basadas en VP seleccionado
   const areasFiltradas = useMemo(() => {
-    if (!vpFiltro || !Array.isArray(indicadores)) return [];
+    if (!vpFiltro) return [];
     
-    return [...new Set(
-      indicadores
-        .filter(ind => ind && ind.vp === vpFiltro)
-        .map(ind => ind.area)
-        .filter(Boolean) // Filtrar valores null/undefined
-    )].sort();
-  }, [indicadores, vpFiltro]);
+    return [...obtenerAreasPorVP(vpFiltro)].sort();
+  }, [obtenerAreasPorVP, vpFiltro]);
 
   // Indicadores filtrados basados en VP y Área seleccionados
   const indicadoresFiltrados = useMemo(() => {